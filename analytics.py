@@ -0,0 +1,140 @@
+"""Показатели загрузки отелей по дневным агрегатам DailyStats.
+
+    Загрузка (occupancy) = проданные номеро-ночи / доступные номеро-ночи
+    ADR    = выручка / проданные номеро-ночи
+    RevPAR = выручка / доступные номеро-ночи
+
+Доступные номеро-ночи - число номеров отеля (типа) в Rooms, умноженное на число дней.
+Запуск: python analytics.py hotels.db 2024-01-01 2025-01-01 [--by day] [--csv report.csv]
+"""
+import argparse
+import csv
+import sys
+from datetime import timedelta
+
+from hotel_management import Database, parse_date
+
+GROUPINGS = ("hotel", "room_type", "day")
+
+COLUMNS = {
+    "hotel": ("HotelId", "Hotel", "Rooms", "RoomsSold", "Revenue", "Occupancy", "ADR", "RevPAR"),
+    "room_type": ("HotelId", "Hotel", "RoomType", "Rooms", "RoomsSold", "Revenue", "Occupancy", "ADR", "RevPAR"),
+    "day": ("HotelId", "Hotel", "Day", "Rooms", "RoomsSold", "Revenue", "Occupancy", "ADR", "RevPAR"),
+}
+# Заголовки для CSV и окна отчета
+COLUMN_TITLES = {
+    "HotelId": "ID отеля", "Hotel": "Отель", "RoomType": "Тип номера", "Day": "Дата", "Rooms": "Номеров",
+    "RoomsSold": "Продано ночей", "Revenue": "Выручка", "Occupancy": "Загрузка, %", "ADR": "ADR", "RevPAR": "RevPAR",
+}
+
+
+def report(db, start, end, by="hotel", hotel_id=None):
+    """Показатели за дни [start, end) с группировкой by: по отелю, типу номера или дню.
+
+    Возвращает список кортежей в порядке COLUMNS[by]. Читаются только агрегаты DailyStats
+    и число номеров из Rooms, поэтому время не зависит от числа бронирований.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Группировка должна быть одной из: {', '.join(GROUPINGS)}")
+    start, end = parse_date(start), parse_date(end)
+    if end <= start:
+        raise ValueError("Конец периода должен быть позже начала")
+    days = (end - start).days
+    period = (start.isoformat(), end.isoformat())
+    hotel_filter = "AND h.Id = ?" if hotel_id else ""
+    hotel_param = (int(hotel_id),) if hotel_id else ()
+
+    if by == "day":
+        rows = db._execute_sql(f"""
+            SELECT HotelId, Day, SUM(RoomsSold), SUM(Revenue)
+            FROM DailyStats
+            WHERE Day >= ? AND Day < ? {"AND HotelId = ?" if hotel_id else ""}
+            GROUP BY HotelId, Day
+        """, period + hotel_param) or []
+        sold = {(hotel, day): (count, revenue) for hotel, day, count, revenue in rows}
+        # Дни без продаж тоже попадают в отчет с нулями
+        result = []
+        for hotel, name, rooms in _hotel_rooms(db, hotel_id):
+            for offset in range(days):
+                day = (start + timedelta(days=offset)).isoformat()
+                count, revenue = sold.get((hotel, day), (0, 0))
+                result.append((hotel, name, day) + _metrics(rooms, count, revenue, 1))
+        return result
+
+    group = "HotelId, RoomType" if by == "room_type" else "HotelId"
+    rows = db._execute_sql(f"""
+        SELECT h.Id, h.Name, {"r.RoomType, " if by == "room_type" else ""}r.Rooms,
+               COALESCE(s.Sold, 0), COALESCE(s.Revenue, 0)
+        FROM (SELECT {group}, COUNT(*) AS Rooms FROM Rooms GROUP BY {group}) AS r
+        JOIN Hotels h ON h.Id = r.HotelId {hotel_filter}
+        LEFT JOIN (
+            SELECT {group}, SUM(RoomsSold) AS Sold, SUM(Revenue) AS Revenue
+            FROM DailyStats
+            WHERE Day >= ? AND Day < ?
+            GROUP BY {group}
+        ) AS s ON {" AND ".join(f"s.{column} = r.{column}" for column in group.split(", "))}
+        ORDER BY h.Id{", r.RoomType" if by == "room_type" else ""}
+    """, hotel_param + period) or []
+    return [row[:-3] + _metrics(*row[-3:], days) for row in rows]
+
+
+def _hotel_rooms(db, hotel_id=None):
+    """(Id, название, число номеров) отелей, у которых есть номера"""
+    sql = """
+        SELECT h.Id, h.Name, COUNT(*)
+        FROM Hotels h
+        JOIN Rooms r ON r.HotelId = h.Id
+    """
+    if hotel_id:
+        return db._execute_sql(sql + " WHERE h.Id = ? GROUP BY h.Id, h.Name", (int(hotel_id),)) or []
+    return db._execute_sql(sql + " GROUP BY h.Id, h.Name") or []
+
+
+def _metrics(rooms, sold, revenue, days):
+    """(номеров, продано, выручка, загрузка %, ADR, RevPAR) с округлением"""
+    available = rooms * days
+    occupancy = 100.0 * sold / available if available else 0.0
+    adr = revenue / sold if sold else 0.0
+    revpar = revenue / available if available else 0.0
+    return rooms, sold, round(revenue, 2), round(occupancy, 2), round(adr, 2), round(revpar, 2)
+
+
+def write_csv(rows, by, path_or_file):
+    """Сохраняет отчет в CSV (UTF-8 с BOM, чтобы Excel распознал кириллицу)"""
+    if isinstance(path_or_file, str):
+        with open(path_or_file, "w", newline="", encoding="utf-8-sig") as f:
+            return write_csv(rows, by, f)
+    writer = csv.writer(path_or_file)
+    writer.writerow([COLUMN_TITLES[column] for column in COLUMNS[by]])
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Загрузка, ADR и RevPAR отелей за период")
+    parser.add_argument("database", help="файл базы данных SQLite")
+    parser.add_argument("start", help="первый день периода (dd.mm.yyyy или yyyy-mm-dd)")
+    parser.add_argument("end", help="день после последнего дня периода")
+    parser.add_argument("--by", choices=GROUPINGS, default="hotel")
+    parser.add_argument("--hotel", type=int, help="только указанный отель")
+    parser.add_argument("--csv", metavar="PATH", help="записать отчет в файл вместо вывода")
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать DailyStats целиком перед отчетом")
+    args = parser.parse_args(argv)
+
+    db = Database(args.database)
+    if not db.connect():
+        raise SystemExit(f"Не удалось открыть {args.database}")
+    db.migrate()
+    if args.rebuild:
+        with db.transaction():
+            db.rebuild_daily_stats()
+    try:
+        rows = report(db, args.start, args.end, args.by, args.hotel)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+    write_csv(rows, args.by, args.csv or sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
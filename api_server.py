@@ -0,0 +1,344 @@
+"""HTTP/JSON API бронирований на asyncio поверх Database (только стандартная библиотека).
+
+    GET    /hotels, /rooms, /bookings   список (потоково, ?after_id=&limit=)
+    GET    /bookings/{id}               бронирование с номерами
+    POST   /bookings                    {"hotel_id", "guest_name", "check_in", "check_out", "room_ids"}
+    PATCH  /bookings/{id}               {"check_in", "check_out"}
+    DELETE /bookings/{id}               отмена
+    GET    /availability                ?check_in=&check_out=&guests=&hotel_id=&city=
+    GET    /stats                       счетчики сервера
+
+Запуск: python api_server.py hotels.db --port 8080 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from booking_service import BookingError, BookingService
+from hotel_management import Database
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class DatabasePool:
+    """Ограниченный пул потоков; у каждого потока свое соединение (Database) и BookingService.
+
+    Событийный цикл не ждет БД: запросы передаются в потоки через run_in_executor.
+    """
+
+    def __init__(self, db_factory, workers=4):
+        self._db_factory = db_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._local = threading.local()
+        self._databases = []
+        self._lock = threading.Lock()
+        self.workers = workers
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            db = self._db_factory()
+            with self._lock:
+                self._databases.append(db)
+            service = self._local.service = BookingService(db)
+        return service
+
+    def _call(self, fn, args):
+        return fn(self._service(), *args)
+
+    async def run(self, fn, *args):
+        """Выполняет fn(service, *args) в потоке пула"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, fn, args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for db in self._databases:
+                db.close()
+            self._databases.clear()
+
+
+class ApiServer:
+    """Обработка HTTP/1.1 с keep-alive; большие списки отдаются chunked-ответом по страницам"""
+
+    PAGE_SIZE = 500
+    MAX_BODY = 1 << 20
+    LISTINGS = {"hotels": "Hotels", "rooms": "Rooms", "bookings": "Bookings"}
+
+    def __init__(self, pool, host="127.0.0.1", port=8080):
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.server = None
+        # Одинаковые одновременные запросы свободных номеров ждут один общий результат
+        self._availability = {}
+        self.stats = {"requests": 0, "errors": 0, "availability_queries": 0, "availability_coalesced": 0}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, query, body, keep_alive = request
+                self.stats["requests"] += 1
+                try:
+                    await self.dispatch(method, path, query, body, writer, keep_alive)
+                except ConnectionError:
+                    raise
+                except HttpError as e:
+                    self.stats["errors"] += 1
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive)
+                except BookingError as e:
+                    self.stats["errors"] += 1
+                    await self._send_json(writer, 400, {"error": str(e)}, keep_alive)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"API error: {e}")
+                    await self._send_json(writer, 500, {"error": "внутренняя ошибка сервера"}, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise ConnectionError("некорректная строка запроса")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > self.MAX_BODY:
+            raise ConnectionError("слишком большое тело запроса")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), body, keep_alive
+
+    async def dispatch(self, method, path, query, body, writer, keep_alive):
+        parts = path.strip("/").split("/")
+        if len(parts) == 1 and parts[0] in self.LISTINGS:
+            if method == "GET":
+                return await self.stream_listing(writer, self.LISTINGS[parts[0]], query, keep_alive)
+            if method == "POST" and parts[0] == "bookings":
+                return await self.create_booking(writer, _json_body(body), keep_alive)
+        elif len(parts) == 2 and parts[0] == "bookings":
+            booking_id = _int(parts[1], "id")
+            if method == "GET":
+                return await self.get_booking(writer, booking_id, keep_alive)
+            if method == "PATCH":
+                data = _json_body(body)
+                await self.pool.run(BookingService.change_dates, booking_id,
+                                    _field(data, "check_in"), _field(data, "check_out"))
+                return await self._send_json(writer, 200, {"booking_id": booking_id}, keep_alive)
+            if method == "DELETE":
+                released = await self.pool.run(BookingService.cancel_booking, booking_id)
+                return await self._send_json(writer, 200, {"booking_id": booking_id, "released_rooms": released},
+                                             keep_alive)
+        elif parts == ["availability"] and method == "GET":
+            return await self.availability(writer, query, keep_alive)
+        elif parts == ["stats"] and method == "GET":
+            return await self._send_json(writer, 200, dict(self.stats, workers=self.pool.workers), keep_alive)
+        else:
+            raise HttpError(404, "не найдено")
+        raise HttpError(405, "метод не поддерживается")
+
+    async def stream_listing(self, writer, table, query, keep_alive):
+        """Список строк таблицы: страницы по Id читаются из пула по одной и сразу отправляются.
+
+        Первая страница читается до заголовков, поэтому ошибка в ней - обычный ответ
+        4xx/5xx. После начала chunked-ответа статус уже не изменить: при ошибке
+        соединение закрывается без завершающего блока, и клиент видит оборванный ответ.
+        """
+        after_id = _int(query["after_id"], "after_id") if "after_id" in query else None
+        limit = _int(query["limit"], "limit") if "limit" in query else None
+        if limit is not None and limit < 0:
+            raise HttpError(400, "limit: ожидалось неотрицательное число")
+
+        def fetch(service, after, size):
+            service._open()
+            rows = service.db.select_page(table, after_id=after, limit=size)
+            if rows is None:
+                raise RuntimeError(f"не удалось прочитать страницу {table}")
+            return service.db.catalog().columns(table), rows
+
+        def page_size(sent):
+            return self.PAGE_SIZE if limit is None else min(self.PAGE_SIZE, limit - sent)
+
+        size = page_size(0)
+        columns, rows = await self.pool.run(fetch, after_id, size) if size else ([], [])
+        await self._start_response(writer, 200, keep_alive, chunked=True)
+        try:
+            await self._write_chunk(writer, b"[")
+            sent = 0
+            while rows:
+                items = ",".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in rows)
+                await self._write_chunk(writer, (items if not sent else "," + items).encode("utf-8"))
+                sent += len(rows)
+                after_id = rows[-1][0]
+                if len(rows) < size:
+                    break
+                size = page_size(sent)
+                if not size:
+                    break
+                columns, rows = await self.pool.run(fetch, after_id, size)
+            await self._write_chunk(writer, b"]")
+            await self._write_chunk(writer, b"")
+        except ConnectionError:
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"API error: {e}")
+            raise ConnectionAbortedError(f"ответ {table} прерван: {e}")
+
+    async def get_booking(self, writer, booking_id, keep_alive):
+        def fetch(service):
+            found = service.get_booking(booking_id)
+            if found is None:
+                return None
+            booking, rooms = found
+            columns = service.db.catalog().columns("Bookings")
+            return dict(dict(zip(columns, booking)), rooms=[
+                {"room_id": room_id, "nights": nights, "price_per_night": price} for room_id, nights, price in rooms])
+
+        result = await self.pool.run(fetch)
+        if result is None:
+            raise HttpError(404, f"бронирование {booking_id} не найдено")
+        await self._send_json(writer, 200, result, keep_alive)
+
+    async def create_booking(self, writer, data, keep_alive):
+        room_ids = data.get("room_ids")
+        if not isinstance(room_ids, list):
+            raise HttpError(400, "room_ids должен быть списком")
+        booking_id = await self.pool.run(BookingService.create_booking, _field(data, "hotel_id"),
+                                         _field(data, "guest_name"), _field(data, "check_in"),
+                                         _field(data, "check_out"), room_ids)
+        await self._send_json(writer, 201, {"booking_id": booking_id}, keep_alive)
+
+    async def availability(self, writer, query, keep_alive):
+        key = (query.get("check_in"), query.get("check_out"), _int(query.get("guests") or 1, "guests"),
+               _int(query["hotel_id"], "hotel_id") if query.get("hotel_id") else None, query.get("city") or None)
+        if not (key[0] and key[1]):
+            raise HttpError(400, "нужны параметры check_in и check_out")
+        self.stats["availability_queries"] += 1
+        future = self._availability.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.pool.run(BookingService.availability, *key))
+            self._availability[key] = future
+            future.add_done_callback(lambda _: self._availability.pop(key, None))
+        else:
+            self.stats["availability_coalesced"] += 1
+        rows = await asyncio.shield(future)
+        columns = ("room_id", "hotel", "city", "room_type", "max_guests", "price_per_night", "total_cost")
+        await self._send_json(writer, 200, [dict(zip(columns, row)) for row in rows], keep_alive)
+
+    async def _start_response(self, writer, status, keep_alive, chunked=False, length=None):
+        headers = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                   "Content-Type: application/json; charset=utf-8",
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        headers.append("Transfer-Encoding: chunked" if chunked else f"Content-Length: {length}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+
+    async def _write_chunk(self, writer, data):
+        writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._start_response(writer, status, keep_alive, length=len(body))
+        writer.write(body)
+        await writer.drain()
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "тело запроса должно быть JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "тело запроса должно быть JSON-объектом")
+    return data
+
+
+def _field(data, name):
+    if data.get(name) in (None, ""):
+        raise HttpError(400, f"не заполнено поле {name}")
+    return data[name]
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{name}: ожидалось целое число")
+
+
+async def serve(args):
+    if args.postgres:
+        from backends import PostgresBackend
+        backend = PostgresBackend(args.postgres, maxconn=args.workers)
+        db_factory = lambda: Database(backend=backend)  # noqa: E731
+    else:
+        db_factory = lambda: Database(args.database)  # noqa: E731
+    db = db_factory()
+    if not db.connect():
+        raise SystemExit(f"Не удалось открыть {args.database or args.postgres}")
+    db.migrate()
+    db.close()
+
+    pool = DatabasePool(db_factory, args.workers)
+    api = ApiServer(pool, args.host, args.port)
+    server = await api.start()
+    print(f"Слушаю http://{api.host}:{api.port} ({args.workers} потоков БД)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON API бронирований")
+    parser.add_argument("database", nargs="?", help="файл базы данных SQLite")
+    parser.add_argument("--postgres", metavar="DSN", help="строка подключения PostgreSQL вместо файла")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 - любой свободный порт")
+    parser.add_argument("--workers", type=int, default=4, help="потоков (соединений) для работы с БД")
+    args = parser.parse_args(argv)
+    if not (args.database or args.postgres):
+        parser.error("нужен файл базы данных или --postgres")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Архив завершенных бронирований: перенос старых строк Bookings и BookedRooms из горячих таблиц.
+
+Архив - схема archive: в SQLite это отдельный файл, присоединенный командой
+ATTACH (по умолчанию {имя базы}.archive.db рядом с ней; Database присоединяет
+его сам при каждом соединении), в PostgreSQL - схема той же базы. Бронирования
+с выездом раньше даты отсечки переносятся пачками, каждая пачка - своя транзакция.
+
+Итоги не меняются: TotalCost переносится как есть, а дневные агрегаты DailyStats
+за архивные ночи остаются на месте. Триггеры не снимаются: пачка удаляется из
+горячих таблиц через них (уходят интервалы RoomOccupancy - для поиска свободных
+номеров прошлые проживания не нужны - и записи полнотекстового индекса), а то,
+что они вычтут из DailyStats, заранее прибавляется одним запросом.
+Строки BookedRooms хранят в архиве снимок номера (отель, тип, цена), поэтому
+rebuild_daily_stats() учитывает архивные ночи, даже если номер потом изменили.
+
+    python archive.py hotels.db --before 01.01.2024
+    python archive.py hotels.db --summary
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+ARCHIVE_SCHEMA = "archive"
+# Столбцы горячих таблиц, которые переносятся в архив и возвращаются при поиске
+ARCHIVE_COLUMNS = {
+    "Bookings": ("Id", "HotelId", "GuestName", "CheckInDate", "CheckOutDate", "TotalCost"),
+    "BookedRooms": ("Id", "BookingId", "RoomId", "NumberOfNights"),
+}
+ARCHIVE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.Bookings (
+        Id INTEGER PRIMARY KEY,
+        HotelId INTEGER NOT NULL,
+        GuestName TEXT NOT NULL,
+        CheckInDate TEXT NOT NULL,
+        CheckOutDate TEXT NOT NULL,
+        TotalCost REAL DEFAULT 0,
+        ArchivedAt TEXT NOT NULL
+    )
+    """,
+    # Снимок номера на момент переноса: номер в Rooms могут изменить или удалить
+    """
+    CREATE TABLE IF NOT EXISTS archive.BookedRooms (
+        Id INTEGER PRIMARY KEY,
+        BookingId INTEGER NOT NULL,
+        RoomId INTEGER NOT NULL,
+        NumberOfNights INTEGER NOT NULL,
+        HotelId INTEGER NOT NULL,
+        RoomType TEXT NOT NULL,
+        PricePerNight REAL NOT NULL
+    )
+    """,
+]
+_IN_BATCH = "IN (SELECT value FROM json_each(?))"
+
+
+class ArchiveReport:
+    """Итог переноса в архив или возврата из него"""
+
+    def __init__(self):
+        self.bookings = 0
+        self.booked_rooms = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    def __str__(self):
+        rate = self.bookings / self.elapsed if self.elapsed else 0.0
+        return (f"бронирований {self.bookings}, номеров {self.booked_rooms}, пачек {self.batches}, "
+                f"{self.elapsed:.2f} с ({rate:.0f} бронирований/с)")
+
+
+def archive_file_for(db_name):
+    """Файл архива по умолчанию: hotels.db -> hotels.archive.db"""
+    root, ext = os.path.splitext(db_name)
+    return f"{root}.archive{ext or '.db'}"
+
+
+def is_attached(db):
+    """Есть ли у соединения архив с таблицами"""
+    if db.dialect == "sqlite":
+        if ARCHIVE_SCHEMA not in [row[1] for row in db._execute_sql("PRAGMA database_list") or []]:
+            return False
+        return bool(db._execute_sql(
+            "SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = 'Bookings'"))
+    return bool(db._execute_sql(
+        "SELECT 1 FROM information_schema.tables WHERE table_schema = 'archive' AND table_name = 'bookings'"))
+
+
+def archive_fts(db):
+    """Есть ли полнотекстовый индекс архива (archive.Bookings_fts)"""
+    return db.dialect == "sqlite" and bool(db._execute_sql(
+        "SELECT 1 FROM archive.sqlite_master WHERE name = 'Bookings_fts'"))
+
+
+def attach(db, path=None):
+    """Подключает архив (в SQLite - файл path или файл по умолчанию) и создает его таблицы"""
+    if db.dialect == "sqlite":
+        db.archive_path = path or archive_file_for(db.db_name)
+        db.close()  # ATTACH выполняется при соединении, вне транзакции
+    if not db.connect():
+        raise OSError("База данных не открыта")
+    with db.transaction():
+        if db.dialect != "sqlite":
+            db._execute_sql(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+        for query in ARCHIVE_TABLES:
+            db._execute_sql(query)
+        if db.dialect == "sqlite":
+            db._execute_sql("CREATE INDEX IF NOT EXISTS archive.idx_BookedRooms_BookingId ON BookedRooms(BookingId)")
+            if db.fts5_supported():
+                db._execute_sql("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS archive.Bookings_fts USING fts5(
+                        GuestName, content='Bookings', content_rowid='Id',
+                        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                    )
+                """)
+        else:
+            db._execute_sql("CREATE INDEX IF NOT EXISTS idx_BookedRooms_BookingId ON archive.BookedRooms(BookingId)")
+
+
+def _cutoff(value):
+    from hotel_management import parse_date
+
+    cutoff = value if isinstance(value, date) else parse_date(value)
+    if cutoff > date.today():
+        raise ValueError("Архивировать можно только завершенные проживания: дата отсечки позже сегодняшней")
+    return cutoff.isoformat()
+
+
+def archive_bookings(db, before, batch_size=5000, on_progress=None):
+    """Переносит в архив бронирования с выездом раньше before пачками по batch_size.
+
+    Каждая пачка - отдельная транзакция, on_progress(перенесено, всего) вызывается
+    между ними: отмена оставляет уже перенесенные пачки в архиве, а текущую - на
+    месте. Между файлами SQLite в WAL фиксация не атомарна, поэтому пачка,
+    которая после сбоя осталась и в архиве, и в горячих таблицах, при повторе
+    второй раз не копируется, а только удаляется из горячих таблиц.
+    """
+    if not is_attached(db):
+        attach(db)
+    cutoff = _cutoff(before)
+    archived_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    fts = archive_fts(db)
+    report = ArchiveReport()
+    started = time.perf_counter()
+    total = db._execute_sql("SELECT COUNT(*) FROM Bookings WHERE CheckOutDate < ?", (cutoff,))[0][0]
+    while True:
+        with db.transaction():
+            ids = [row[0] for row in db._execute_sql(
+                "SELECT Id FROM Bookings WHERE CheckOutDate < ? ORDER BY Id LIMIT ?", (cutoff, int(batch_size)))]
+            if not ids:
+                break
+            report.booked_rooms += _move_batch(db, json.dumps(ids), archived_at, fts)
+        report.bookings += len(ids)
+        report.batches += 1
+        if on_progress:
+            on_progress(report.bookings, total)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _move_batch(db, batch, archived_at, fts):
+    """Копирует пачку в архив и удаляет ее из горячих таблиц; возвращает число строк BookedRooms"""
+    booking_columns = ", ".join(ARCHIVE_COLUMNS["Bookings"])
+    new = f"Id {_IN_BATCH} AND Id NOT IN (SELECT Id FROM archive.Bookings)"
+    if fts:
+        db._execute_sql(f"INSERT INTO archive.Bookings_fts(rowid, GuestName) SELECT Id, GuestName FROM Bookings "
+                        f"WHERE {new}", (batch,))
+    db._execute_sql(f"""
+        INSERT INTO archive.Bookings ({booking_columns}, ArchivedAt)
+        SELECT {booking_columns}, ? FROM Bookings WHERE {new}
+    """, (archived_at, batch))
+    db._execute_sql(f"""
+        INSERT INTO archive.BookedRooms (Id, BookingId, RoomId, NumberOfNights, HotelId, RoomType, PricePerNight)
+        SELECT br.Id, br.BookingId, br.RoomId, br.NumberOfNights, r.HotelId, r.RoomType, r.PricePerNight
+        FROM BookedRooms br
+        JOIN Rooms r ON r.Id = br.RoomId
+        WHERE br.BookingId {_IN_BATCH} AND br.Id NOT IN (SELECT Id FROM archive.BookedRooms)
+    """, (batch,))
+
+    # Триггеры удаления занятости вычтут ночи пачки из DailyStats - возмещаем заранее
+    _shift_daily_stats(db, f"""
+        SELECT o.RoomId, o.CheckInDate, o.CheckOutDate
+        FROM RoomOccupancy o
+        JOIN BookedRooms br ON br.Id = o.BookedRoomId
+        WHERE br.BookingId {_IN_BATCH}
+    """, batch, 1)
+    db._execute_sql(f"DELETE FROM BookedRooms WHERE BookingId {_IN_BATCH}", (batch,))
+    booked_rooms = db.cursor.rowcount
+    db._execute_sql(f"DELETE FROM Bookings WHERE Id {_IN_BATCH}", (batch,))
+    return booked_rooms
+
+
+def _shift_daily_stats(db, occupancy, batch, sign):
+    """Прибавляет (sign=1) или вычитает (sign=-1) ночи интервалов occupancy (RoomId, заезд, выезд)
+    в DailyStats по текущим ценам номеров - так же, как это делают триггеры занятости"""
+    db._execute_sql(f"""
+        INSERT INTO DailyStats (HotelId, RoomType, Day, RoomsSold, Revenue)
+        SELECT r.HotelId, r.RoomType, c.Day, {sign} * COUNT(*), {sign} * SUM(r.PricePerNight)
+        FROM ({occupancy}) AS o
+        JOIN Rooms r ON r.Id = o.RoomId
+        JOIN Calendar c ON c.Day >= o.CheckInDate AND c.Day < o.CheckOutDate
+        GROUP BY r.HotelId, r.RoomType, c.Day
+        ON CONFLICT (HotelId, RoomType, Day) DO UPDATE
+        SET RoomsSold = DailyStats.RoomsSold + excluded.RoomsSold,
+            Revenue = DailyStats.Revenue + excluded.Revenue
+    """, (batch,))
+
+
+def restore_bookings(db, booking_ids):
+    """Возвращает бронирования из архива в горячие таблицы одной транзакцией.
+
+    Номера и отели должны существовать (иначе ошибка внешнего ключа). TotalCost
+    остается архивным: DailyStats за эти ночи и так их учитывает, поэтому то, что
+    прибавят триггеры вставки, заранее вычитается.
+    """
+    if not is_attached(db):
+        raise ValueError("Архив не подключен")
+    batch = json.dumps([int(booking_id) for booking_id in booking_ids])
+    report = ArchiveReport()
+    started = time.perf_counter()
+    booking_columns = ", ".join(ARCHIVE_COLUMNS["Bookings"])
+    room_columns = ", ".join(ARCHIVE_COLUMNS["BookedRooms"])
+    with db.transaction():
+        _shift_daily_stats(db, f"""
+            SELECT br.RoomId, b.CheckInDate, b.CheckOutDate
+            FROM archive.BookedRooms br
+            JOIN archive.Bookings b ON b.Id = br.BookingId
+            WHERE b.Id {_IN_BATCH}
+        """, batch, -1)
+        db._execute_sql(f"""
+            INSERT INTO Bookings ({booking_columns})
+            SELECT {booking_columns} FROM archive.Bookings WHERE Id {_IN_BATCH}
+        """, (batch,))
+        report.bookings = db.cursor.rowcount
+        db._execute_sql(f"""
+            INSERT INTO BookedRooms ({room_columns})
+            SELECT {room_columns} FROM archive.BookedRooms WHERE BookingId {_IN_BATCH}
+        """, (batch,))
+        report.booked_rooms = db.cursor.rowcount
+        # Триггеры стоимости прибавили номера к архивной TotalCost
+        db._execute_sql(f"""
+            UPDATE Bookings SET TotalCost = (SELECT a.TotalCost FROM archive.Bookings a WHERE a.Id = Bookings.Id)
+            WHERE Id {_IN_BATCH}
+        """, (batch,))
+        if archive_fts(db):
+            db._execute_sql(f"""
+                INSERT INTO archive.Bookings_fts(Bookings_fts, rowid, GuestName)
+                SELECT 'delete', Id, GuestName FROM archive.Bookings WHERE Id {_IN_BATCH}
+            """, (batch,))
+        db._execute_sql(f"DELETE FROM archive.BookedRooms WHERE BookingId {_IN_BATCH}", (batch,))
+        db._execute_sql(f"DELETE FROM archive.Bookings WHERE Id {_IN_BATCH}", (batch,))
+    report.batches = 1
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def search(db, table, column, search_term, limit=1000):
+    """Поиск в архивной таблице; строки в столбцах горячей таблицы (ARCHIVE_COLUMNS)"""
+    columns = ARCHIVE_COLUMNS[table]
+    if column not in columns:
+        raise ValueError(f"Неизвестный столбец: {column}")
+    select = ", ".join(f"t.{name}" for name in columns)
+    if table == "Bookings" and column == "GuestName" and archive_fts(db):
+        match = db.fts_match(column, search_term)
+        if match is None:
+            return []
+        return db._execute_sql(f"""
+            SELECT {select} FROM archive.Bookings_fts f
+            JOIN archive.Bookings t ON t.Id = f.rowid
+            WHERE f.Bookings_fts MATCH ?
+            ORDER BY f.rank
+            LIMIT ?
+        """, (match, limit)) or []
+    return db._execute_sql(f"SELECT {select} FROM archive.{table} t WHERE t.{column} LIKE ? LIMIT ?",
+                           (f"%{search_term}%", limit)) or []
+
+
+def summary(db):
+    """Строки и суммы горячих таблиц и архива.
+
+    revenue (сумма DailyStats) равна hot_cost + archived_cost: архивные бронирования
+    удаленных отелей остаются в архиве, но в обе суммы не входят.
+    """
+    result = {
+        "hot_bookings": db.count_rows("Bookings"),
+        "hot_cost": db._execute_sql("SELECT COALESCE(SUM(TotalCost), 0) FROM Bookings")[0][0],
+        "oldest_hot_checkout": db._execute_sql("SELECT MIN(CheckOutDate) FROM Bookings")[0][0],
+        "archived_bookings": 0,
+        "archived_cost": 0,
+        "revenue": db._execute_sql("SELECT COALESCE(SUM(Revenue), 0) FROM DailyStats")[0][0],
+    }
+    if is_attached(db):
+        result["archived_bookings"], result["archived_cost"] = db._execute_sql(
+            "SELECT COUNT(*), COALESCE(SUM(TotalCost), 0) FROM archive.Bookings "
+            "WHERE HotelId IN (SELECT Id FROM Hotels)")[0]
+    return result
+
+
+def main(argv=None):
+    from hotel_management import Database
+
+    parser = argparse.ArgumentParser(description="Перенос завершенных бронирований в архив")
+    parser.add_argument("database", help="файл базы данных SQLite")
+    parser.add_argument("--before", help="архивировать выезды раньше этой даты (dd.mm.yyyy или yyyy-mm-dd)")
+    parser.add_argument("--archive", help="файл архива (по умолчанию - DATABASE.archive.db рядом с базой)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--restore", type=int, nargs="+", metavar="ID", help="вернуть бронирования из архива")
+    parser.add_argument("--summary", action="store_true", help="вывести размеры и суммы горячих таблиц и архива")
+    args = parser.parse_args(argv)
+    if not (args.before or args.restore or args.summary):
+        parser.error("укажите --before, --restore или --summary")
+
+    db = Database(args.database)
+    if not db.connect():
+        raise SystemExit(f"Не удалось открыть {args.database}")
+    try:
+        db.migrate()
+        attach(db, args.archive)
+
+        def progress(done, total):
+            print(f"\r{done}/{total} бронирований", end="", flush=True)
+
+        if args.before:
+            report = archive_bookings(db, args.before, args.batch_size, on_progress=progress)
+            print(f"\rВ архив перенесено: {report}")
+        if args.restore:
+            print(f"Из архива возвращено: {restore_bookings(db, args.restore)}")
+        if args.summary:
+            for key, value in summary(db).items():
+                print(f"{key}: {value}")
+    except (ValueError, db.Error) as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Хранилища для Database: SQLite (файл) и PostgreSQL (центральный сервер).
+
+Database пишет SQL в диалекте SQLite; бэкенд открывает соединения, переводит
+запросы в свой диалект и реализует операции, которые в разных СУБД делаются
+по-разному: начало транзакции, потоковое чтение, массовая загрузка.
+"""
+import csv
+import functools
+import importlib
+import io
+import itertools
+import queue
+import re
+import sqlite3
+import threading
+
+
+class SQLiteBackend:
+    """Один файл БД; каждое соединение работает в WAL-режиме"""
+
+    dialect = "sqlite"
+    Error = sqlite3.Error
+    BEGIN = "BEGIN IMMEDIATE"  # сразу берет блокировку записи, чтобы не получить BUSY посреди транзакции
+
+    def __init__(self, path, synchronous="NORMAL", busy_timeout=5.0, cached_statements=128, attachments=None):
+        self.path = path
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.attachments = attachments or {}  # {схема: файл}, присоединяемые командой ATTACH
+
+    def connect(self):
+        # isolation_level=None: транзакциями управляет Database.transaction(), а не модуль sqlite3
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        # Действия ON DELETE и RESTRICT из схемы SQLite выполняет только с включенными внешними ключами
+        conn.execute("PRAGMA foreign_keys=ON")
+        for schema, path in self.attachments.items():
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+            conn.execute(f"PRAGMA {schema}.journal_mode=WAL")
+            conn.execute(f"PRAGMA {schema}.synchronous={self.synchronous}")
+        return conn
+
+    def release(self, conn):
+        """Закрывает соединение, перенося содержимое WAL в основной файл"""
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+    def translate(self, sql, has_params=False):
+        return sql
+
+    @staticmethod
+    def in_transaction(conn):
+        return conn.in_transaction
+
+    @staticmethod
+    def changes(conn):
+        return conn.total_changes
+
+    @staticmethod
+    def interrupt(conn):
+        conn.interrupt()
+
+    @staticmethod
+    def is_lock_error(error):
+        """SQLITE_BUSY/SQLITE_LOCKED: файл заблокирован другим соединением"""
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+    @staticmethod
+    def checkpoint(cursor):
+        cursor.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    @staticmethod
+    def explain(conn, sql, params):
+        """План запроса строками EXPLAIN QUERY PLAN (отдельным курсором, не трогая основной)"""
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return [row[3] for row in rows]
+
+    @staticmethod
+    def user_version(cursor):
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def set_user_version(cursor, version):
+        cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+    @staticmethod
+    def schema_version(cursor):
+        cursor.execute("PRAGMA schema_version")
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def iter_query(conn, sql, params, batch_size):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def copy_rows(cursor, table, columns, rows):
+        placeholders = ", ".join("?" for _ in columns)
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+
+class ConnectionPool:
+    """Ограниченный пул: не больше maxconn соединений, acquire ждет освободившееся до timeout секунд"""
+
+    def __init__(self, factory, maxconn=5, timeout=30.0):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.maxconn = maxconn
+        self.timeout = timeout
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Нет свободных соединений в пуле (maxconn={self.maxconn})")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._factory()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        if discard:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class PostgresBackend:
+    """PostgreSQL через psycopg2 (или другой DB-API модуль с тем же интерфейсом).
+
+    Соединения берутся из общего ограниченного пула: каждый объект Database
+    держит одно соединение, пока открыт, поэтому пул можно разделить между
+    потоками-обработчиками. psycopg2 импортируется только при первом соединении;
+    вместо него можно передать driver - например, заглушку для тестов в одном процессе.
+    """
+
+    dialect = "postgresql"
+    BEGIN = "BEGIN"
+    LOCK_ERROR_CODES = ("40001", "40P01", "55P03")  # serialization_failure, deadlock, lock_not_available
+
+    def __init__(self, dsn="", maxconn=5, pool_timeout=30.0, driver=None, server_side_cursors=True,
+                 **connect_kwargs):
+        self.dsn = dsn
+        self.connect_kwargs = connect_kwargs
+        self.server_side_cursors = server_side_cursors
+        self._driver = driver
+        self._cursor_ids = itertools.count(1)
+        self.pool = ConnectionPool(self._new_connection, maxconn, pool_timeout)
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = importlib.import_module("psycopg2")
+        return self._driver
+
+    @property
+    def Error(self):
+        return self.driver.Error
+
+    def _new_connection(self):
+        conn = self.driver.connect(self.dsn, **self.connect_kwargs)
+        conn.autocommit = True  # как isolation_level=None в SQLite: BEGIN/COMMIT выдает Database
+        return conn
+
+    def connect(self):
+        return self.pool.acquire()
+
+    def release(self, conn):
+        broken = bool(getattr(conn, "closed", False))
+        if not broken and self.in_transaction(conn):
+            conn.rollback()
+        self.pool.release(conn, discard=broken)
+
+    def close(self):
+        self.pool.close()
+
+    def translate(self, sql, has_params=False):
+        return translate_to_postgres(sql, has_params)
+
+    @staticmethod
+    def in_transaction(conn):
+        return conn.get_transaction_status() != 0  # TRANSACTION_STATUS_IDLE
+
+    @staticmethod
+    def changes(conn):
+        return 0
+
+    @staticmethod
+    def interrupt(conn):
+        conn.cancel()
+
+    def is_lock_error(self, error):
+        return getattr(error, "pgcode", None) in self.LOCK_ERROR_CODES
+
+    @staticmethod
+    def checkpoint(cursor):
+        pass  # контрольными точками сервер управляет сам
+
+    @staticmethod
+    def explain(conn, sql, params):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def user_version(cursor):
+        cursor.execute("CREATE TABLE IF NOT EXISTS SchemaVersion (Version INTEGER NOT NULL)")
+        cursor.execute("SELECT MAX(Version) FROM SchemaVersion")
+        row = cursor.fetchone()
+        return row[0] if row and row[0] is not None else 0
+
+    @staticmethod
+    def set_user_version(cursor, version):
+        cursor.execute("DELETE FROM SchemaVersion")
+        cursor.execute("INSERT INTO SchemaVersion (Version) VALUES (%s)", (int(version),))
+
+    @staticmethod
+    def schema_version(cursor):
+        return None  # счетчика изменений схемы нет: каталог сбрасывается после миграции
+
+    def iter_query(self, conn, sql, params, batch_size):
+        """Чтение серверным курсором: в памяти клиента не больше batch_size строк"""
+        if self.server_side_cursors:
+            # WITH HOLD: курсор переживает COMMIT автофиксации, в которой его открыли
+            cursor = conn.cursor(name=f"stream_{next(self._cursor_ids)}", withhold=True)
+            cursor.itersize = batch_size
+        else:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def copy_rows(cursor, table, columns, rows):
+        """Загрузка через COPY ... FROM STDIN вместо построчных INSERT"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        if "Id" in columns:
+            # Явные Id не сдвигают identity-последовательность - иначе следующий INSERT получит занятый Id
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table.lower()}', 'id'), "
+                           f"(SELECT MAX(Id) FROM {table}))")
+
+
+@functools.lru_cache(maxsize=None)
+def _postgres_patterns():
+    """Регулярные выражения перевода компилируются при первом обращении к PostgresBackend"""
+    trigger = re.compile(
+        r"^\s*CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+(BEFORE|AFTER)\s+(.+?)\s+ON\s+(\w+)\s+"
+        r"(?:WHEN\s+(.+?)\s+)?BEGIN\s+(.*?)\bEND\s*;?\s*$",
+        re.IGNORECASE | re.DOTALL)
+    drop_trigger = re.compile(r"^\s*DROP\s+TRIGGER\s+IF\s+EXISTS\s+(\w+)\s*;?\s*$", re.IGNORECASE)
+    upsert = re.compile(r"INSERT\s+OR\s+REPLACE\s+INTO\s+(\w+)\s*\(([^)]*)\)(.*)", re.IGNORECASE | re.DOTALL)
+    rewrites = [
+        (re.compile(r"\bINTEGER\s+PRIMARY\s+KEY\s+AUTOINCREMENT\b", re.IGNORECASE),
+         "INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY"),
+        # Даты хранятся текстом ISO-8601; разность дат в PostgreSQL - сразу целое число дней
+        (re.compile(r"\bjulianday\(([\w.?]+)\)", re.IGNORECASE), r"(\1)::date"),
+        (re.compile(r"\bSELECT\s+value\s+FROM\s+json_each\(\?\)", re.IGNORECASE),
+         "SELECT value::bigint FROM json_array_elements_text(?::json)"),
+        (re.compile(r"\bIS\s+NOT\s+(?!NULL\b)", re.IGNORECASE), "IS DISTINCT FROM "),
+        # LIKE в SQLite не различает регистр
+        (re.compile(r"\bLIKE\b", re.IGNORECASE), "ILIKE"),
+    ]
+    return trigger, drop_trigger, upsert, rewrites
+
+
+@functools.lru_cache(maxsize=512)
+def translate_to_postgres(sql, has_params=False):
+    """Переводит запрос из диалекта SQLite, которым пользуется Database, в PostgreSQL.
+
+    Поддерживается то, что встречается в этом проекте: плейсхолдеры ?, AUTOINCREMENT
+    и REAL в CREATE TABLE, julianday, json_each, IS NOT, INSERT OR REPLACE (ключом
+    конфликта считается первый столбец) и триггеры, которые превращаются в функции
+    plpgsql. Результат кешируется: Database выполняет одни и те же тексты запросов.
+    """
+    trigger, drop_trigger, _, _ = _postgres_patterns()
+    match = drop_trigger.match(sql)
+    if match:
+        # Триггер PostgreSQL принадлежит таблице; удаление его функции каскадно удаляет и его
+        return f"DROP FUNCTION IF EXISTS {match.group(1)}_fn() CASCADE"
+    match = trigger.match(sql)
+    if match:
+        return _translate_trigger(*match.groups())
+    return _translate_placeholders(_translate_statement(sql), has_params)
+
+
+def _translate_statement(sql):
+    sql = sql.strip().rstrip(";")
+    if re.match(r"CREATE\s+TABLE\b", sql, re.IGNORECASE):
+        sql = re.sub(r"\bREAL\b", "DOUBLE PRECISION", sql)
+    _, _, upsert, rewrites = _postgres_patterns()
+    for pattern, replacement in rewrites:
+        sql = pattern.sub(replacement, sql)
+    match = upsert.match(sql)
+    if match:
+        table, column_list, rest = match.groups()
+        columns = [column.strip() for column in column_list.split(",")]
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns[1:])
+        sql = (f"INSERT INTO {table} ({column_list}){rest.rstrip()} "
+               f"ON CONFLICT ({columns[0]}) DO UPDATE SET {updates}")
+    return sql
+
+
+def _translate_trigger(name, timing, event, table, condition, body):
+    statements = [_translate_statement(statement) for statement in _split_statements(body)]
+    body_sql = "".join(f"    {statement};\n" for statement in statements)
+    returns = "NULL" if timing.upper() == "AFTER" else "NEW"
+    when = f" WHEN ({_translate_statement(condition)})" if condition else ""
+    return (f"CREATE OR REPLACE FUNCTION {name}_fn() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+            f"BEGIN\n{body_sql}    RETURN {returns};\nEND\n$$;\n"
+            f"CREATE TRIGGER {name} {timing.upper()} {' '.join(event.split())} ON {table} "
+            f"FOR EACH ROW{when} EXECUTE FUNCTION {name}_fn()")
+
+
+def _split_statements(body):
+    """Делит тело триггера на запросы по ; вне строковых литералов"""
+    statements = []
+    start = 0
+    in_literal = False
+    for index, char in enumerate(body):
+        if char == "'":
+            in_literal = not in_literal
+        elif char == ";" and not in_literal:
+            statements.append(body[start:index])
+            start = index + 1
+    statements.append(body[start:])
+    return [statement for statement in statements if statement.strip()]
+
+
+def _translate_placeholders(sql, has_params):
+    """? вне строковых литералов -> %s; при параметрах % экранируется для psycopg2"""
+    if not has_params:
+        return sql
+    out = []
+    in_literal = False
+    for char in sql:
+        if char == "'":
+            in_literal = not in_literal
+        if char == "?" and not in_literal:
+            out.append("%s")
+        elif char == "%":
+            out.append("%%")
+        else:
+            out.append(char)
+    return "".join(out)
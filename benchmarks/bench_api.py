@@ -0,0 +1,170 @@
+"""Нагрузочный тест HTTP API (api_server.py) на временной базе.
+
+Сервер запускается отдельным процессом, клиенты - корутины с keep-alive
+соединениями. Смесь запросов: поиск свободных номеров (несколько популярных
+периодов, поэтому одновременные одинаковые запросы объединяются), создание
+бронирований и чтение бронирований по Id; в конце - потоковая выгрузка /bookings.
+Запуск:
+
+    python benchmarks/bench_api.py --clients 1 16 64 --requests 200 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hotel_management import Database  # noqa: E402
+
+HOTELS = 10
+ROOMS_PER_HOTEL = 50
+BOOKINGS = 20000
+PERIODS = [("2025-07-01", "2025-07-05"), ("2025-07-10", "2025-07-12"), ("2025-08-01", "2025-08-08")]
+
+
+def build_database(path):
+    db = Database(path)
+    db.connect()
+    db.migrate()
+    rnd = random.Random(42)
+    with db.transaction():
+        db.cursor.executemany(
+            "INSERT INTO Hotels (Id, Name, City, Address) VALUES (?, ?, 'Москва', 'ул. Тверская, 1')",
+            ((i, f"Отель {i}") for i in range(1, HOTELS + 1)))
+        db.cursor.executemany(
+            "INSERT INTO Rooms (HotelId, RoomType, PricePerNight, MaxGuests) VALUES (?, 'Стандарт', ?, 2)",
+            ((hotel, rnd.randint(2000, 9000)) for hotel in range(1, HOTELS + 1) for _ in range(ROOMS_PER_HOTEL)))
+        bookings = []
+        booked = []
+        for booking in range(1, BOOKINGS + 1):
+            hotel = rnd.randint(1, HOTELS)
+            day = rnd.randint(0, 300)
+            check_in = time.strftime("%Y-%m-%d", time.gmtime(1704067200 + day * 86400))
+            check_out = time.strftime("%Y-%m-%d", time.gmtime(1704067200 + (day + rnd.randint(1, 7)) * 86400))
+            bookings.append((booking, hotel, f"Гость {booking}", check_in, check_out))
+            booked.append((booking, (hotel - 1) * ROOMS_PER_HOTEL + rnd.randint(1, ROOMS_PER_HOTEL)))
+        db.cursor.executemany("INSERT INTO Bookings (Id, HotelId, GuestName, CheckInDate, CheckOutDate, TotalCost) "
+                              "VALUES (?, ?, ?, ?, ?, 0)", bookings)
+        db.cursor.executemany("INSERT INTO BookedRooms (BookingId, RoomId, NumberOfNights) VALUES (?, ?, 0)", booked)
+        db.recalculate_nights()
+    db.close()
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Один запрос по keep-alive соединению; возвращает (статус, тело)"""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            parts.append(chunk[:-2])
+        return status, b"".join(parts)
+    return status, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+async def client(port, requests, seed, timings, statuses):
+    rnd = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(requests):
+        kind = rnd.random()
+        if kind < 0.8:
+            check_in, check_out = rnd.choice(PERIODS)
+            args = ("GET", f"/availability?check_in={check_in}&check_out={check_out}&guests=2")
+        elif kind < 0.9:
+            hotel = rnd.randint(1, HOTELS)
+            day = rnd.randint(1, 28)
+            args = ("POST", "/bookings", {
+                "hotel_id": hotel, "guest_name": f"Клиент {seed}-{i}",
+                "check_in": f"2026-03-{day:02d}", "check_out": f"2026-04-{day:02d}",
+                "room_ids": [(hotel - 1) * ROOMS_PER_HOTEL + rnd.randint(1, ROOMS_PER_HOTEL)]})
+        else:
+            args = ("GET", f"/bookings/{rnd.randint(1, BOOKINGS)}")
+        started = time.perf_counter()
+        status, _ = await request(reader, writer, *args)
+        timings.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, len(ordered) * q // 100)]
+
+
+async def run(port, clients, requests):
+    timings = []
+    statuses = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, seed, timings, statuses) for seed in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    return len(timings) / elapsed, timings, statuses, json.loads(stats)
+
+
+async def stream_listing(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    started = time.perf_counter()
+    _, body = await request(reader, writer, "GET", "/bookings")
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return len(json.loads(body)), len(body), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=200, help="запросов на клиента")
+    parser.add_argument("--workers", type=int, default=4, help="потоков БД на сервере")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_api.db")
+        build_database(path)
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "api_server.py"), path, "--port", "0",
+                                   "--workers", str(args.workers)], stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline().split("http://")[1].split()[0].rsplit(":", 1)[1])
+            print(f"{'клиентов':>9} {'запр/с':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} "
+                  f"{'объединено':>11}  статусы")
+            coalesced = 0
+            for clients in args.clients:
+                throughput, timings, statuses, stats = asyncio.run(run(port, clients, args.requests))
+                merged = stats["availability_coalesced"] - coalesced
+                coalesced = stats["availability_coalesced"]
+                print(f"{clients:>9} {throughput:>8.0f} {percentile(timings, 50):>9.2f} "
+                      f"{percentile(timings, 95):>9.2f} {percentile(timings, 99):>9.2f} {merged:>11}  "
+                      f"{dict(sorted(statuses.items()))}")
+            rows, size, elapsed = asyncio.run(stream_listing(port))
+            print(f"GET /bookings: {rows} строк, {size / 1e6:.1f} МБ за {elapsed:.2f} с ({rows / elapsed:.0f} строк/с)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Нагрузка на один файл БД от нескольких процессов-писателей.
+
+Каждый процесс, как отдельная стойка регистрации, в цикле создает бронирование
+с одним номером в своей транзакции. Выводит общую пропускную способность,
+задержки транзакций (p50/p95/p99) и число транзакций, не дождавшихся блокировки.
+Запуск:
+
+    python benchmarks/bench_concurrent_writers.py --writers 1 4 8 --transactions 500
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hotel_management import Database  # noqa: E402
+
+HOTELS = 10
+ROOMS_PER_HOTEL = 50
+
+
+def build_database(path):
+    db = Database(path)
+    db.connect()
+    db.migrate()
+    rnd = random.Random(42)
+    with db.transaction():
+        db.cursor.executemany(
+            "INSERT INTO Hotels (Id, Name, City, Address) VALUES (?, ?, 'Москва', 'ул. Тверская, 1')",
+            ((i, f"Отель {i}") for i in range(1, HOTELS + 1)))
+        db.cursor.executemany(
+            "INSERT INTO Rooms (HotelId, RoomType, PricePerNight, MaxGuests) VALUES (?, 'Стандарт', ?, 2)",
+            ((hotel, rnd.randint(2000, 9000)) for hotel in range(1, HOTELS + 1) for _ in range(ROOMS_PER_HOTEL)))
+    db.close()
+
+
+def writer(path, transactions, busy_timeout, lock_retries, seed):
+    """Выполняет transactions транзакций; возвращает (задержки в мс, число неудач)"""
+    db = Database(path, busy_timeout=busy_timeout, lock_retries=lock_retries)
+    db.connect()
+    rnd = random.Random(seed)
+    timings = []
+    failures = 0
+    for i in range(transactions):
+        hotel = rnd.randint(1, HOTELS)
+        room = (hotel - 1) * ROOMS_PER_HOTEL + rnd.randint(1, ROOMS_PER_HOTEL)
+        nights = rnd.randint(1, 7)
+        started = time.perf_counter()
+        try:
+            with db.transaction():
+                booking_id = db.insert_data("Bookings", {
+                    "HotelId": hotel,
+                    "GuestName": f"Гость {seed}-{i}",
+                    "CheckInDate": "2024-06-01",
+                    "CheckOutDate": f"2024-06-{1 + nights:02d}",
+                    "TotalCost": 0,
+                })
+                db.insert_data("BookedRooms", {"BookingId": booking_id, "RoomId": room, "NumberOfNights": 0})
+                db.recalculate_nights([booking_id])
+        except sqlite3.OperationalError:
+            failures += 1
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+    db.close()
+    return timings, failures
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, len(ordered) * q // 100)]
+
+
+def run(path, writers, transactions, busy_timeout, lock_retries):
+    args = [(path, transactions, busy_timeout, lock_retries, seed) for seed in range(writers)]
+    started = time.perf_counter()
+    with multiprocessing.Pool(writers) as pool:
+        results = pool.starmap(writer, args)
+    elapsed = time.perf_counter() - started
+    timings = [t for result, _ in results for t in result]
+    failures = sum(f for _, f in results)
+    return len(timings) / elapsed, timings, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--transactions", type=int, default=500, help="транзакций на процесс")
+    parser.add_argument("--busy-timeout", type=float, default=5.0, help="секунды ожидания блокировки")
+    parser.add_argument("--lock-retries", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'процессов':>10} {'транз/с':>10} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'неудач':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in args.writers:
+            path = os.path.join(tmp, f"bench_{writers}.db")
+            build_database(path)
+            throughput, timings, failures = run(path, writers, args.transactions,
+                                                args.busy_timeout, args.lock_retries)
+            print(f"{writers:>10} {throughput:>10.0f} {percentile(timings, 50):>9.2f} "
+                  f"{percentile(timings, 95):>9.2f} {percentile(timings, 99):>9.2f} {failures:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Стоимость изменения цены номера в зависимости от размера BookedRooms.
+
+Сравнивает прежние триггеры (полный SUM по соединению без индексов) с
+инкрементальными из Database.create_trigger. В обоих столбцах триггеры DailyStats
+сняты, чтобы сравнивался только пересчет TotalCost; последний столбец - полная
+стоимость изменения цены с триггерами DailyStats, которые раскладывают по дням
+все интервалы номера и растут с числом проданных им ночей. Запуск:
+
+    python benchmarks/bench_price_update.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hotel_management import Database  # noqa: E402
+
+# Триггер Rooms из прежней версии create_trigger - базовая линия для сравнения
+LEGACY_ROOMS_TRIGGER = """
+    CREATE TRIGGER CalculateBookingCostOnRoomsUpdate
+    AFTER UPDATE ON Rooms
+    BEGIN
+        UPDATE Bookings
+        SET TotalCost = (
+            SELECT SUM(r.PricePerNight * br.NumberOfNights)
+            FROM Rooms r
+            JOIN BookedRooms br ON r.Id = br.RoomId
+            WHERE br.BookingId IN (SELECT BookingId FROM BookedRooms WHERE RoomId = NEW.Id)
+        )
+        WHERE Id IN (SELECT BookingId FROM BookedRooms WHERE RoomId = NEW.Id);
+    END;
+"""
+
+ROOMS = 200
+HOT_ROOM_SHARE = 0.05  # доля строк BookedRooms, приходящаяся на "популярный" номер 1
+
+
+def build_database(path, booked_rooms, legacy, analytics=False):
+    db = Database(path)
+    db.connect()
+    db.migrate()
+    if not analytics:
+        for name in Database.ANALYTICS_TRIGGERS:
+            db._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+    if legacy:
+        db.drop_cost_triggers()
+    rnd = random.Random(42)
+    bookings = max(1, booked_rooms // 2)
+    with db.transaction():
+        db.cursor.execute("INSERT INTO Hotels (Id, Name, City, Address) VALUES (1, 'Отель', 'Москва', 'ул. Тверская, 1')")
+        db.cursor.executemany(
+            "INSERT INTO Rooms (Id, HotelId, RoomType, PricePerNight, MaxGuests) VALUES (?, 1, 'Стандарт', ?, 2)",
+            ((i, rnd.randint(2000, 9000)) for i in range(1, ROOMS + 1)))
+        db.cursor.executemany(
+            "INSERT INTO Bookings (Id, HotelId, GuestName, CheckInDate, CheckOutDate, TotalCost) "
+            "VALUES (?, 1, ?, '2024-03-01', '2024-03-04', 0)",
+            ((i, f"Гость {i}") for i in range(1, bookings + 1)))
+        db.cursor.executemany(
+            "INSERT INTO BookedRooms (BookingId, RoomId, NumberOfNights) VALUES (?, ?, 3)",
+            ((rnd.randint(1, bookings), 1 if rnd.random() < HOT_ROOM_SHARE else rnd.randint(2, ROOMS))
+             for _ in range(booked_rooms)))
+    if legacy:
+        # Прежняя схема: без индексов BookedRooms и с полным пересчетом SUM
+        db._execute_sql("DROP INDEX idx_BookedRooms_RoomId_BookingId")
+        db._execute_sql("DROP INDEX idx_BookedRooms_BookingId")
+        db._execute_sql(LEGACY_ROOMS_TRIGGER)
+    db.recalculate_total_cost()
+    return db
+
+
+def measure(db, repeats):
+    timings = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        with db.transaction():
+            db.cursor.execute("UPDATE Rooms SET PricePerNight = ? WHERE Id = 1", (5000 + i,))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--skip-legacy-above", type=int, default=1000000,
+                        help="не запускать прежние триггеры на объемах больше указанного")
+    args = parser.parse_args(argv)
+
+    print(f"{'BookedRooms':>12} {'прежние, мс':>14} {'инкрементальные, мс':>20} {'+ DailyStats, мс':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            results = []
+            for legacy, analytics in ((True, False), (False, False), (False, True)):
+                if legacy and size > args.skip_legacy_above:
+                    results.append(None)
+                    continue
+                db = build_database(os.path.join(tmp, f"bench_{size}_{legacy}_{analytics}.db"), size, legacy,
+                                    analytics)
+                results.append(measure(db, args.repeats))
+                db.close()
+            legacy_ms, incremental_ms, analytics_ms = results
+            legacy_text = f"{legacy_ms:.2f}" if legacy_ms is not None else "-"
+            print(f"{size:>12} {legacy_text:>14} {incremental_ms:>20.2f} {analytics_ms:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Время запуска без интерфейса: import hotel_management и открытие файла SQLite.
+
+Каждый замер - отдельный процесс python, чтобы модули не были уже загружены.
+Проверяет, что tkinter и psycopg2 при этом не импортируются. Запуск:
+
+    python benchmarks/bench_startup.py --repeats 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+from hotel_management import Database
+db = Database(sys.argv[1])
+db.connect()
+db.migrate()
+elapsed = time.perf_counter() - started
+db.close()
+heavy = [name for name in ("tkinter", "psycopg2") if name in sys.modules]
+print(elapsed * 1000, ",".join(heavy))
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="допустимая медиана, мс")
+    args = parser.parse_args(argv)
+
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "startup.db")
+        for _ in range(args.repeats + 1):
+            output = subprocess.run([sys.executable, "-c", PROBE, path], cwd=ROOT, check=True,
+                                    capture_output=True, text=True).stdout.split()
+            if len(output) > 1:
+                sys.exit(f"При запуске без интерфейса импортированы: {output[1]}")
+            timings.append(float(output[0]))
+    # Первый запуск создает схему в новом файле - в статистику не входит
+    timings = timings[1:]
+    median = statistics.median(timings)
+    print(f"import + connect + migrate: медиана {median:.1f} мс, "
+          f"мин {min(timings):.1f} мс, макс {max(timings):.1f} мс ({args.repeats} запусков)")
+    if median > args.budget_ms:
+        sys.exit(f"Медиана превышает {args.budget_ms:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Набор замеров схемы отелей на синтетических данных с результатами в JSON.
+
+База строится synthetic_data.py (один seed - одни и те же данные), затем по
+очереди выполняются случаи: вставка бронирований, изменение цен через триггеры
+CalculateBookingCost*, поиск (search_data), полный просмотр таблицы страницами,
+как в окне "Показать все данные", удаление номера из бронирования на несколько
+номеров с пересчетом TotalCost, отмена бронирований и изменение дат с
+пересчетом ночей. Результат сохраняется в JSON вместе с коммитом, и его можно
+сравнить с прошлым прогоном:
+
+    python benchmarks/bench_suite.py --bookings 100000 --output base.json
+    python benchmarks/bench_suite.py --bookings 100000 --compare base.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_service import BookingError, BookingService  # noqa: E402
+from hotel_management import Database  # noqa: E402
+import synthetic_data  # noqa: E402
+
+CASES = ("insert", "price_update", "search", "scan", "remove_room", "cancel", "change_dates")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, len(ordered) * q // 100)]
+
+
+def timed(operations):
+    """Выполняет операции по одной; возвращает задержки в мс"""
+    timings = []
+    for operation in operations:
+        started = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def case_insert(service, rnd, ops):
+    rooms = service.db._execute_sql("SELECT Id, HotelId FROM Rooms ORDER BY Id")
+    start = date(2030, 1, 1)
+
+    def insert(i):
+        # Каждый номер получает следующий интервал после всех данных - без пересечений
+        room_id, hotel_id = rooms[i % len(rooms)]
+        check_in = start + timedelta(days=15 * (i // len(rooms)))
+        check_out = check_in + timedelta(days=rnd.randint(1, 14))
+        service.create_booking(hotel_id, f"Гость {i}", check_in.isoformat(), check_out.isoformat(), [room_id])
+
+    return timed(lambda i=i: insert(i) for i in range(ops))
+
+
+def case_price_update(service, rnd, ops):
+    db = service.db
+    room_count = db.count_rows("Rooms")
+
+    def update():
+        with db.transaction():
+            db.update_data("Rooms", {"PricePerNight": rnd.randrange(2000, 15000, 100)},
+                           [("Id", "=", rnd.randint(1, room_count))])
+
+    return timed(update for _ in range(ops))
+
+
+def case_search(service, rnd, ops):
+    queries = [("Bookings", "GuestName", name) for name in synthetic_data.LAST_NAMES + synthetic_data.FIRST_NAMES]
+    queries += [("Hotels", "City", city) for city in synthetic_data.CITIES]
+    return timed(lambda query=rnd.choice(queries): service.search(*query) for _ in range(ops))
+
+
+def case_scan(service, rnd, ops):
+    """Одна операция - просмотр всей таблицы Bookings страницами по 200 строк"""
+    db = service.db
+
+    def scan():
+        after_id = None
+        while True:
+            rows = db.select_page("Bookings", after_id=after_id, limit=200)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+
+    return timed(scan for _ in range(max(3, ops // 100)))
+
+
+def _random_bookings(db, rnd, ops):
+    max_id = db._execute_sql("SELECT MAX(Id) FROM Bookings")[0][0]
+    return rnd.sample(range(1, max_id + 1), min(ops, max_id))
+
+
+def case_remove_room(service, rnd, ops):
+    """Удаление одного номера из бронирования на несколько номеров: триггеры уменьшают
+    TotalCost и снимают занятость и DailyStats по ночам этого номера"""
+    db = service.db
+    rows = db._execute_sql("SELECT MIN(Id) FROM BookedRooms GROUP BY BookingId HAVING COUNT(*) > 1")
+    booked_ids = rnd.sample([row[0] for row in rows], min(ops, len(rows)))
+
+    def remove(booked_id):
+        with db.transaction():
+            db.delete_data("BookedRooms", [("Id", "=", booked_id)])
+
+    return timed(lambda booked_id=booked_id: remove(booked_id) for booked_id in booked_ids)
+
+
+def case_cancel(service, rnd, ops):
+    def cancel(booking_id):
+        try:
+            service.cancel_booking(booking_id)
+        except BookingError:
+            pass  # уже отменено предыдущим случаем
+
+    return timed(lambda booking_id=booking_id: cancel(booking_id)
+                 for booking_id in _random_bookings(service.db, rnd, ops))
+
+
+def case_change_dates(service, rnd, ops):
+    """Сокращение проживания на ночь: номера остаются свободными, пересчитываются ночи и стоимость"""
+    db = service.db
+
+    def change(booking_id):
+        row = db.select_data("Bookings", ["CheckInDate", "CheckOutDate"], [("Id", "=", booking_id)])
+        if not row:
+            return
+        check_in, check_out = (date.fromisoformat(value) for value in row[0])
+        if (check_out - check_in).days > 1:
+            service.change_dates(booking_id, check_in.isoformat(), (check_out - timedelta(days=1)).isoformat())
+
+    return timed(lambda booking_id=booking_id: change(booking_id)
+                 for booking_id in _random_bookings(db, rnd, ops))
+
+
+def summarize(timings, seconds, rows=None):
+    result = {
+        "ops": len(timings),
+        "seconds": round(seconds, 3),
+        "ops_per_sec": round(len(timings) / seconds, 1) if seconds else None,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
+    if rows is not None:
+        result["rows_per_sec"] = round(rows * len(timings) / seconds) if seconds else None
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, path):
+    db = Database(path)
+    db.connect()
+    service = BookingService(db)
+    bookings = db.count_rows("Bookings")
+    results = {}
+    for name in args.cases:
+        rnd = random.Random(f"{args.seed}-{name}")
+        started = time.perf_counter()
+        timings = globals()[f"case_{name}"](service, rnd, args.ops)
+        results[name] = summarize(timings, time.perf_counter() - started, bookings if name == "scan" else None)
+        print(f"{name:>14} {results[name]['ops']:>7} {results[name]['ops_per_sec']:>10} "
+              f"{results[name]['p50_ms']:>9.3f} {results[name]['p95_ms']:>9.3f} {results[name]['p99_ms']:>9.3f}",
+              file=sys.stderr)
+    db.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Печатает изменения относительно baseline; возвращает число регрессий.
+
+    Регрессией считается рост медианной задержки больше чем на tolerance %:
+    медиана устойчивее к редким выбросам (checkpoint, сборка мусора), чем оп/с.
+    """
+    regressions = 0
+    print(f"{'случай':>14} {'было оп/с':>10} {'стало оп/с':>11} {'p50 было':>9} {'p50 стало':>10} {'изм.':>8}")
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("p50_ms"):
+            continue
+        change = 100.0 * (current["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+        mark = ""
+        if change > tolerance:
+            regressions += 1
+            mark = "  регрессия"
+        print(f"{name:>14} {before['ops_per_sec']:>10} {current['ops_per_sec']:>11} {before['p50_ms']:>9.3f} "
+              f"{current['p50_ms']:>10.3f} {change:>+7.1f}%{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=100000, help="объем синтетических данных")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ops", type=int, default=1000, help="операций в каждом случае")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--data", help="готовая база synthetic_data.py (копируется перед замерами)")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию - stdout)")
+    parser.add_argument("--compare", metavar="JSON", help="результаты прошлого прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="допустимый рост медианной задержки, %%")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        if args.data:
+            shutil.copyfile(args.data, path)
+        else:
+            db = Database(path)
+            db.connect()
+            synthetic_data.populate(db, args.bookings, args.seed)
+            db.close()
+        print(f"данные готовы за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+        print(f"{'случай':>14} {'операций':>7} {'оп/с':>10} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}",
+              file=sys.stderr)
+        results = run(args, path)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "params": {"bookings": args.bookings if not args.data else None, "data": args.data,
+                   "seed": args.seed, "ops": args.ops},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Детерминированный генератор данных для схемы отелей.
+
+Сети отелей в городах с разным уровнем цен, номерной фонд из типов номеров
+с разной вместимостью и ценой, бронирования с сезонным спросом (пик летом и
+в новогодние дни, больше заездов в пятницу и субботу) и длительностью
+проживания от 1 до 14 ночей. Заезды генерируются по дням в хронологическом
+порядке, номер выдается только свободный, поэтому бронирования одного номера
+не пересекаются. При одном seed и объеме результат всегда одинаков.
+
+    python benchmarks/synthetic_data.py hotels.db --bookings 1000000 --seed 1
+"""
+import argparse
+import heapq
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hotel_management import Database  # noqa: E402
+
+CHAINS = ["Северная звезда", "Волна", "Гранд", "Уют", "Сити Лофт", "Парк Отель", "Берег", "Старый город"]
+# Город -> множитель цены
+CITIES = {
+    "Москва": 1.6, "Санкт-Петербург": 1.4, "Сочи": 1.3, "Казань": 1.0, "Калининград": 0.95,
+    "Екатеринбург": 0.95, "Новосибирск": 0.9, "Владивосток": 1.0, "Нижний Новгород": 0.85, "Ярославль": 0.8,
+}
+STREETS = ["ул. Ленина", "пр. Мира", "ул. Гагарина", "Набережная ул.", "ул. Пушкина", "Центральная ул.",
+           "ул. Победы", "Садовая ул."]
+# (тип номера, доля в фонде, вместимость, множитель цены)
+ROOM_TYPES = [("Стандарт", 0.55, 2, 1.0), ("Улучшенный", 0.25, 2, 1.4), ("Семейный", 0.12, 4, 1.7),
+              ("Люкс", 0.08, 3, 2.8)]
+BASE_PRICE = 3500
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Елена", "Андрей", "Ольга", "Иван", "Наталья",
+               "Михаил", "Татьяна", "Алексей", "Ирина", "Николай", "Екатерина", "Павел", "Светлана"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков",
+              "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров", "Павлов", "Козлов"]
+# Длительность проживания: ночи и их веса
+STAY_NIGHTS = list(range(1, 15))
+STAY_WEIGHTS = [18, 20, 16, 11, 8, 6, 9, 3, 2, 2, 1, 1, 1, 2]
+ROOMS_PER_BOOKING = ((1, 2, 3), (85, 12, 3))
+TARGET_OCCUPANCY = 0.65
+START = date(2023, 1, 1)
+
+
+def seasonal_demand(day):
+    """Относительный спрос на заезд в день day (около 1.0 в среднем)"""
+    season = 1.0 + 0.35 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365)
+    if (day.month == 12 and day.day >= 28) or (day.month == 1 and day.day <= 8):
+        season *= 1.4
+    if day.weekday() in (4, 5):
+        season *= 1.3
+    return season
+
+
+def _mean(values, weights):
+    return sum(v * w for v, w in zip(values, weights)) / sum(weights)
+
+
+AVG_NIGHTS = _mean(STAY_NIGHTS, STAY_WEIGHTS)
+AVG_ROOMS = _mean(*ROOMS_PER_BOOKING)
+AVG_HOTEL_ROOMS = 80
+MEAN_DEMAND = sum(seasonal_demand(START + timedelta(days=i)) for i in range(364)) / 364
+
+
+def plan(bookings, hotels=None):
+    """(отелей, дней): по умолчанию отелей столько, чтобы бронирования заняли около года"""
+    room_nights = bookings * AVG_NIGHTS * AVG_ROOMS
+    if hotels is None:
+        hotels = min(2000, max(5, round(room_nights / (365 * TARGET_OCCUPANCY * AVG_HOTEL_ROOMS))))
+    return hotels, math.ceil(room_nights / (hotels * AVG_HOTEL_ROOMS * TARGET_OCCUPANCY))
+
+
+def generate_hotels(rnd, count):
+    """Строки Hotels и Rooms: (hotels, rooms), Id с 1"""
+    hotels = []
+    rooms = []
+    cities = list(CITIES)
+    for hotel_id in range(1, count + 1):
+        city = cities[(hotel_id - 1) % len(cities)] if hotel_id <= len(cities) else rnd.choice(cities)
+        name = f"{rnd.choice(CHAINS)} {city}" + (f" {hotel_id}" if hotel_id > len(cities) else "")
+        address = f"{rnd.choice(STREETS)}, {rnd.randint(1, 150)}"
+        rating = round(rnd.triangular(3.0, 5.0, 4.3), 1)
+        hotels.append((hotel_id, name, city, address, rating))
+        for _ in range(rnd.randint(20, 2 * AVG_HOTEL_ROOMS - 20)):
+            room_type, _, guests, factor = rnd.choices(ROOM_TYPES, weights=[t[1] for t in ROOM_TYPES])[0]
+            price = round(BASE_PRICE * CITIES[city] * factor * rnd.uniform(0.85, 1.15), -2)
+            rooms.append((len(rooms) + 1, hotel_id, room_type, price, guests))
+    return hotels, rooms
+
+
+def generate_bookings(rnd, rooms, target, days):
+    """Бронирования и строки BookedRooms по дням заезда, пока не наберется target бронирований.
+
+    Yields (booking, [booked rooms]). Номер занят до дня выезда: свободные номера
+    отеля хранятся в куче по дню освобождения.
+    """
+    free = {}  # отель -> куча (день освобождения, Id номера)
+    for room_id, hotel_id, *_ in rooms:
+        free.setdefault(hotel_id, []).append((0, room_id))
+    for heap in free.values():
+        heapq.heapify(heap)
+    rate = TARGET_OCCUPANCY / (AVG_NIGHTS * AVG_ROOMS * MEAN_DEMAND)  # заездов на номер в день
+    booking_id = booked_id = 0
+    for offset in range(days * 2):
+        day = START + timedelta(days=offset)
+        demand = seasonal_demand(day) * rate
+        for hotel_id, heap in free.items():
+            arrivals = int(demand * len(heap) * rnd.uniform(0.6, 1.4) + rnd.random())
+            for _ in range(arrivals):
+                count = rnd.choices(*ROOMS_PER_BOOKING)[0]
+                if heap[0][0] > offset or (count > 1 and heapq.nsmallest(count, heap)[-1][0] > offset):
+                    break  # свободных номеров на этот день не осталось
+                nights = rnd.choices(STAY_NIGHTS, weights=STAY_WEIGHTS)[0]
+                booking_id += 1
+                booked = []
+                for _ in range(count):
+                    _, room_id = heapq.heappop(heap)
+                    booked_id += 1
+                    booked.append((booked_id, booking_id, room_id, nights))
+                for _, _, room_id, _ in booked:
+                    heapq.heappush(heap, (offset + nights, room_id))
+                guest = f"{rnd.choice(LAST_NAMES)} {rnd.choice(FIRST_NAMES)}"
+                check_out = day + timedelta(days=nights)
+                yield (booking_id, hotel_id, guest, day.isoformat(), check_out.isoformat(), 0), booked
+                if booking_id >= target:
+                    return
+
+
+def populate(db, bookings, seed=1, hotels=None, batch_size=50000, progress=None):
+    """Заполняет пустую открытую БД; возвращает (отелей, номеров, бронирований).
+
+    Триггеры производных данных снимаются на время загрузки, после нее ночи,
+    стоимость, занятость, DailyStats и полнотекстовые индексы пересчитываются
+    одним проходом каждый.
+    """
+    rnd = random.Random(seed)
+    hotel_count, days = plan(bookings, hotels)
+    hotel_rows, room_rows = generate_hotels(rnd, hotel_count)
+    db.migrate()
+    with db.transaction():
+        db.drop_all_triggers()
+        db.bulk_insert("Hotels", ("Id", "Name", "City", "Address", "Rating"), hotel_rows)
+        db.bulk_insert("Rooms", ("Id", "HotelId", "RoomType", "PricePerNight", "MaxGuests"), room_rows)
+    done = 0
+    batch = []
+    booked_batch = []
+    for booking, booked in generate_bookings(rnd, room_rows, bookings, days):
+        batch.append(booking)
+        booked_batch.extend(booked)
+        if len(batch) >= batch_size:
+            done += _flush(db, batch, booked_batch)
+            batch, booked_batch = [], []
+            if progress:
+                progress(done, bookings)
+    if batch:
+        done += _flush(db, batch, booked_batch)
+    with db.transaction():
+        db.rebuild_derived()
+        db.create_trigger()
+    return hotel_count, len(room_rows), done
+
+
+def _flush(db, bookings, booked_rooms):
+    with db.transaction():
+        db.bulk_insert("Bookings", ("Id", "HotelId", "GuestName", "CheckInDate", "CheckOutDate", "TotalCost"),
+                       bookings)
+        db.bulk_insert("BookedRooms", ("Id", "BookingId", "RoomId", "NumberOfNights"), booked_rooms)
+    return len(bookings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("database", help="новый файл базы данных SQLite")
+    parser.add_argument("--bookings", type=int, default=100000, help="число бронирований (10 тыс. - 10 млн)")
+    parser.add_argument("--hotels", type=int, help="число отелей (по умолчанию - по объему)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} уже существует")
+
+    db = Database(args.database)
+    db.connect()
+    started = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} бронирований", end="", file=sys.stderr, flush=True)
+
+    try:
+        hotels, rooms, bookings = populate(db, args.bookings, args.seed, args.hotels, progress=progress)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    print(f"\rотелей {hotels}, номеров {rooms}, бронирований {bookings} за {elapsed:.1f} с "
+          f"({bookings / elapsed:.0f} бронирований/с)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Операции с бронированиями без интерфейса: для форм Tk, скриптов и пакетных файлов команд"""
+import argparse
+import json
+import shlex
+import sys
+import time
+
+from cascade import DeleteRestricted
+from hotel_management import Database, check_stay_date, parse_date
+from validation import existing_ids, validate_rows
+
+
+class BookingError(ValueError):
+    """Операция отклонена; сообщение можно показать пользователю как есть"""
+
+
+class BookingService:
+    """Бронирования и записи таблиц поверх Database.
+
+    Каждая операция выполняется в одной транзакции, поэтому проверка (например,
+    что номер свободен) и изменение не разделены записью другого клиента.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _open(self):
+        if not self.db.connect():
+            raise BookingError("Не удалось подключиться к базе данных")
+
+    @staticmethod
+    def _stay_date(value):
+        """Дата заезда или выезда dd.mm.yyyy или ISO -> date в пределах Database.CALENDAR_RANGE"""
+        try:
+            value = parse_date(value)
+        except ValueError:
+            raise BookingError("Неверный формат даты")
+        try:
+            return check_stay_date(value)
+        except ValueError as e:
+            raise BookingError(f"Неверная дата: {e}")
+
+    @classmethod
+    def _dates(cls, check_in, check_out):
+        """Даты dd.mm.yyyy или ISO -> пара строк ISO-8601 с проверкой порядка"""
+        check_in, check_out = cls._stay_date(check_in), cls._stay_date(check_out)
+        if check_out <= check_in:
+            raise BookingError("Дата выезда должна быть больше даты заезда хотя бы на 1 день.")
+        return check_in.isoformat(), check_out.isoformat()
+
+    def _busy_rooms(self, room_ids, check_in, check_out, booking_id=None):
+        """Номера из room_ids, занятые другими бронированиями на [check_in, check_out)"""
+        rows = self.db._execute_sql("""
+            SELECT DISTINCT o.RoomId
+            FROM RoomOccupancy o
+            JOIN BookedRooms br ON br.Id = o.BookedRoomId
+            WHERE o.RoomId IN (SELECT value FROM json_each(?))
+              AND o.CheckOutDate > ? AND o.CheckInDate < ?
+              AND br.BookingId != ?
+        """, (json.dumps(list(room_ids)), check_in, check_out, booking_id or 0)) or []
+        return sorted(row[0] for row in rows)
+
+    # Бронирования
+
+    def create_booking(self, hotel_id, guest_name, check_in, check_out, room_ids):
+        """Создает бронирование с номерами room_ids и возвращает его Id"""
+        check_in, check_out = self._dates(check_in, check_out)
+        guest_name = (guest_name or "").strip()
+        if not guest_name:
+            raise BookingError("Не указано имя гостя")
+        room_ids = sorted({int(room_id) for room_id in room_ids})
+        if not room_ids:
+            raise BookingError("Не выбраны номера")
+        self._open()
+        with self.db.transaction():
+            errors = validate_rows(self.db, "Bookings", [{"HotelId": hotel_id}])
+            if errors:
+                raise BookingError("\n".join(str(error) for error in errors))
+            rooms = dict(self.db._execute_sql(
+                "SELECT Id, HotelId FROM Rooms WHERE Id IN (SELECT value FROM json_each(?))",
+                (json.dumps(room_ids),)) or [])
+            foreign = [room_id for room_id in room_ids if rooms.get(room_id) != int(hotel_id)]
+            if foreign:
+                raise BookingError(f"Номера {foreign} не существуют в отеле {hotel_id}")
+            busy = self._busy_rooms(room_ids, check_in, check_out)
+            if busy:
+                raise BookingError(f"Номера {busy} заняты на эти даты")
+            booking_id = self.db.insert_data("Bookings", {
+                "HotelId": int(hotel_id),
+                "GuestName": guest_name,
+                "CheckInDate": check_in,
+                "CheckOutDate": check_out,
+                "TotalCost": 0,
+            })
+            # Ночи вычисляются одним UPDATE, стоимость затем поправят триггеры
+            self.db.bulk_insert("BookedRooms", ("BookingId", "RoomId", "NumberOfNights"),
+                                [(booking_id, room_id, 0) for room_id in room_ids])
+            self.db.recalculate_nights([booking_id])
+        return booking_id
+
+    def change_dates(self, booking_id, check_in, check_out):
+        """Переносит бронирование; ночи, стоимость и занятость пересчитывают триггеры"""
+        check_in, check_out = self._dates(check_in, check_out)
+        booking_id = int(booking_id)
+        self._open()
+        with self.db.transaction():
+            if not existing_ids(self.db, "Bookings", [booking_id]):
+                raise BookingError(f"Бронирование {booking_id} не существует")
+            room_ids = [row[0] for row in self.db._execute_sql(
+                "SELECT RoomId FROM BookedRooms WHERE BookingId = ?", (booking_id,)) or []]
+            busy = self._busy_rooms(room_ids, check_in, check_out, booking_id)
+            if busy:
+                raise BookingError(f"Номера {busy} заняты на эти даты")
+            self.db.update_data("Bookings", {"CheckInDate": check_in, "CheckOutDate": check_out},
+                                [("Id", "=", booking_id)])
+
+    def cancel_booking(self, booking_id):
+        """Удаляет бронирование вместе с его номерами (ON DELETE CASCADE); возвращает число освобожденных номеров"""
+        booking_id = int(booking_id)
+        self._open()
+        with self.db.transaction():
+            released = self.db._execute_sql("SELECT COUNT(*) FROM BookedRooms WHERE BookingId = ?", (booking_id,))[0][0]
+            # Одна строка: строки BookedRooms удаляет сам SQLite по ON DELETE CASCADE, без плана delete_cascade
+            self.db._execute_sql("DELETE FROM Bookings WHERE Id = ?", (booking_id,))
+            if self.db.cursor.rowcount == 0:
+                raise BookingError(f"Бронирование {booking_id} не существует")
+        return released
+
+    def get_booking(self, booking_id):
+        """Строка Bookings и список номеров (RoomId, NumberOfNights, PricePerNight) или None"""
+        self._open()
+        rows = self.db._execute_sql("SELECT * FROM Bookings WHERE Id = ?", (int(booking_id),))
+        if not rows:
+            return None
+        rooms = self.db._execute_sql("""
+            SELECT br.RoomId, br.NumberOfNights, r.PricePerNight
+            FROM BookedRooms br
+            JOIN Rooms r ON r.Id = br.RoomId
+            WHERE br.BookingId = ?
+            ORDER BY br.RoomId
+        """, (int(booking_id),)) or []
+        return rows[0], rooms
+
+    def search(self, table, column, term, limit=1000, include_archive=False):
+        """Поиск по столбцу; include_archive - и по перенесенным в архив строкам (archive.py)"""
+        self._open()
+        if column in Database.DATE_COLUMNS.get(table, ()):
+            term = self._storage_value(term)
+        return self.db.search_data(table, column, term, limit, include_archive=include_archive) or []
+
+    def availability(self, check_in, check_out, guests=1, hotel_id=None, city=None):
+        """Свободные номера: (Id, отель, город, тип, вместимость, цена за ночь, стоимость)"""
+        check_in, check_out = self._dates(check_in, check_out)
+        self._open()
+        return self.db.find_available_rooms(check_in, check_out, int(guests),
+                                            hotel_id=int(hotel_id) if hotel_id else None,
+                                            city=city or None) or []
+
+    # Записи таблиц (формы вставки, изменения и удаления)
+
+    @staticmethod
+    def _storage_value(value):
+        try:
+            return parse_date(value).isoformat()
+        except ValueError:
+            return value
+
+    def insert_record(self, table, data):
+        """Вставляет строку из формы и возвращает её Id"""
+        data = dict(data)
+        if table == "Bookings":
+            if not (data.get("CheckInDate") and data.get("CheckOutDate")):
+                raise BookingError("Необходимо ввести дату заезда и выезда.")
+            data["CheckInDate"], data["CheckOutDate"] = self._dates(data["CheckInDate"], data["CheckOutDate"])
+            data["TotalCost"] = 0
+        elif table == "BookedRooms":
+            data["NumberOfNights"] = 0  # вычисляется в SQL после вставки
+        self._open()
+        with self.db.transaction():
+            # Id и все внешние ключи проверяются одним запросом на каждую таблицу
+            errors = validate_rows(self.db, table, [data])
+            if errors:
+                raise BookingError("\n".join(str(error) for error in errors))
+            record_id = self.db.insert_data(table, data)
+            if table == "BookedRooms":
+                self.db.recalculate_nights([data.get("BookingId")])
+        return record_id
+
+    def update_record(self, table, record_id, data):
+        """Обновляет строку по Id; при изменении дат ночи и стоимость пересчитывают триггеры"""
+        if not str(record_id).isdigit():
+            raise BookingError("Введённый ID не существует")
+        data = dict(data)
+        for column in Database.DATE_COLUMNS.get(table, ()):
+            if data.get(column):
+                data[column] = self._stay_date(data[column]).isoformat()
+        if table == "Bookings" and data.get("CheckInDate") and data.get("CheckOutDate"):
+            self._dates(data["CheckInDate"], data["CheckOutDate"])
+        self._open()
+        with self.db.transaction():
+            if not existing_ids(self.db, table, [int(record_id)]):
+                raise BookingError("Введённый ID не существует")
+            self.db.update_data(table, data, [("Id", "=", int(record_id))])
+
+    def _delete_conditions(self, table, column, value):
+        if column in Database.DATE_COLUMNS.get(table, ()):
+            value = self._storage_value(value)
+        return [(column, "=", value)]
+
+    def preview_delete(self, table, column, value):
+        """Что удалит delete_records: DeletePlan с числом строк по таблицам (ничего не меняет)"""
+        self._open()
+        return self.db.preview_delete(table, self._delete_conditions(table, column, value))
+
+    def delete_records(self, table, column, value, on_progress=None):
+        """Удаляет строки, где column = value, вместе с зависимыми; возвращает DeletePlan.
+
+        on_progress(удалено, всего) вызывается после каждой таблицы; исключение из
+        on_progress откатывает всё удаление. Ссылки с RESTRICT - BookingError.
+        """
+        conditions = self._delete_conditions(table, column, value)
+        self._open()
+        try:
+            return self.db.delete_cascade(table, conditions, on_progress=on_progress)
+        except DeleteRestricted as e:
+            raise BookingError(str(e))
+
+
+class _BatchParser(argparse.ArgumentParser):
+    """Ошибка разбора строки пакетного файла - ошибка этой команды, а не выход из программы"""
+
+    def error(self, message):
+        raise BookingError(f"некорректная команда: {message}")
+
+
+def build_parser(prog=None, parser_class=argparse.ArgumentParser):
+    """Разбор одной команды - из командной строки или строки пакетного файла"""
+    parser = parser_class(prog=prog)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("create-booking", help="создать бронирование")
+    command.add_argument("--hotel", type=int, required=True)
+    command.add_argument("--guest", required=True)
+    command.add_argument("--check-in", required=True)
+    command.add_argument("--check-out", required=True)
+    command.add_argument("--rooms", type=int, nargs="+", required=True)
+
+    command = commands.add_parser("change-dates", help="перенести бронирование")
+    command.add_argument("booking_id", type=int)
+    command.add_argument("check_in")
+    command.add_argument("check_out")
+
+    command = commands.add_parser("cancel", help="отменить бронирование")
+    command.add_argument("booking_id", type=int)
+
+    command = commands.add_parser("search", help="поиск по текстовому полю")
+    command.add_argument("table")
+    command.add_argument("column")
+    command.add_argument("term")
+    command.add_argument("--limit", type=int, default=1000)
+
+    command = commands.add_parser("availability", help="свободные номера")
+    command.add_argument("check_in")
+    command.add_argument("check_out")
+    command.add_argument("--guests", type=int, default=1)
+    command.add_argument("--hotel", type=int)
+    command.add_argument("--city")
+
+    command = commands.add_parser("batch", help="выполнить команды из файла, по одной в строке")
+    command.add_argument("file")
+    command.add_argument("--stop-on-error", action="store_true")
+    return parser
+
+
+def run_command(service, args):
+    """Выполняет разобранную команду; результат пригоден для json.dumps"""
+    if args.command == "create-booking":
+        return {"booking_id": service.create_booking(args.hotel, args.guest, args.check_in, args.check_out,
+                                                     args.rooms)}
+    if args.command == "change-dates":
+        service.change_dates(args.booking_id, args.check_in, args.check_out)
+        return {"booking_id": args.booking_id}
+    if args.command == "cancel":
+        return {"booking_id": args.booking_id, "released_rooms": service.cancel_booking(args.booking_id)}
+    if args.command == "search":
+        return [list(row) for row in service.search(args.table, args.column, args.term, args.limit)]
+    if args.command == "availability":
+        return [list(row) for row in service.availability(args.check_in, args.check_out, args.guests,
+                                                          args.hotel, args.city)]
+    raise BookingError(f"Неизвестная команда: {args.command}")
+
+
+def run_batch(service, path, stop_on_error=False, out=sys.stdout):
+    """Выполняет команды файла (пустые строки и строки с # пропускаются).
+
+    На каждую команду выводится строка JSON с результатом или ошибкой;
+    возвращает (выполнено, ошибок, секунд).
+    """
+    parser = build_parser(prog="batch", parser_class=_BatchParser)
+    done = failed = 0
+    started = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            record = {"line": line_no, "command": line}
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command == "batch":
+                    raise BookingError("Вложенный batch не поддерживается")
+                record["result"] = run_command(service, args)
+                record["ok"] = True
+                done += 1
+            except SystemExit:  # -h в строке файла
+                record.update(ok=False, error="некорректная команда")
+                failed += 1
+            except (BookingError, ValueError, service.db.Error) as e:
+                record.update(ok=False, error=str(e))
+                failed += 1
+            print(json.dumps(record, ensure_ascii=False), file=out)
+            if failed and stop_on_error:
+                break
+    return done, failed, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Операции с бронированиями из командной строки",
+        epilog="Команды: create-booking, change-dates, cancel, search, availability, batch; "
+               "справка по команде: DATABASE КОМАНДА -h")
+    parser.add_argument("database", help="файл базы данных SQLite")
+    parser.add_argument("--stats", action="store_true", help="вывести статистику запросов в stderr")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="команда и её аргументы")
+    args = parser.parse_args(argv)
+    command = build_parser(prog=f"{parser.prog} {args.database}").parse_args(args.command)
+
+    db = Database(args.database)
+    if args.stats:
+        db.enable_instrumentation()
+    service = BookingService(db)
+    try:
+        if not db.connect():
+            sys.exit(f"Не удалось открыть {args.database}")
+        db.migrate()
+        if command.command == "batch":
+            done, failed, elapsed = run_batch(service, command.file, command.stop_on_error)
+            rate = (done + failed) / elapsed if elapsed else 0.0
+            print(f"выполнено {done}, ошибок {failed}, {elapsed:.2f} с, {rate:.0f} команд/с", file=sys.stderr)
+            if failed:
+                sys.exit(1)
+        else:
+            try:
+                result = run_command(service, command)
+            except BookingError as e:
+                sys.exit(str(e))
+            print(json.dumps(result, ensure_ascii=False))
+    finally:
+        if db.instrumentation is not None:
+            print(db.instrumentation.report(synchronous=db.synchronous), file=sys.stderr)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Массовая загрузка Hotels/Rooms/Bookings/BookedRooms из CSV и JSON Lines"""
+import argparse
+import csv
+import json
+import os
+import time
+
+from hotel_management import check_stay_date, parse_date
+from validation import validate_rows
+
+# Порядок столбцов при вставке; Id можно не указывать - тогда его назначит AUTOINCREMENT
+TABLE_COLUMNS = {
+    "Hotels": ["Id", "Name", "City", "Address", "Rating"],
+    "Rooms": ["Id", "HotelId", "RoomType", "PricePerNight", "MaxGuests"],
+    "Bookings": ["Id", "HotelId", "GuestName", "CheckInDate", "CheckOutDate", "TotalCost"],
+    "BookedRooms": ["Id", "BookingId", "RoomId", "NumberOfNights"],
+}
+
+
+class ImportReport:
+    """Итог загрузки одного файла"""
+
+    MAX_ERRORS = 100
+
+    def __init__(self, table, path):
+        self.table = table
+        self.path = path
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []  # (номер строки, причина), не больше MAX_ERRORS
+        self.elapsed = 0.0
+
+    def reject(self, line_no, reason):
+        self.rejected += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append((line_no, reason))
+
+    @property
+    def rows_per_sec(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.table}: вставлено {self.inserted}, отклонено {self.rejected}, "
+                f"{self.elapsed:.2f} с, {self.rows_per_sec:.0f} строк/с")
+
+
+class BulkImporter:
+    """Потоковая загрузка через Database.bulk_insert (executemany или COPY) с фиксацией пачками.
+
+    Id и внешние ключи каждой пачки проверяются validate_rows одним запросом на
+    таблицу, NumberOfNights вычисляется одним UPDATE в той же транзакции.
+    При defer_triggers=True триггеры CalculateBookingCost* снимаются внутри
+    транзакции каждой пачки BookedRooms, а TotalCost ее бронирований пересчитывается
+    одним проходом перед восстановлением триггеров. Другие соединения не видят
+    состояния без триггеров, а ошибка в пачке откатывает ее вместе со снятием.
+    """
+
+    def __init__(self, db, batch_size=5000, defer_triggers=True):
+        self.db = db
+        self.batch_size = batch_size
+        self.defer_triggers = defer_triggers
+
+    def import_file(self, table, path, fmt=None, on_progress=None):
+        """Загружает файл в table; on_progress(прочитано байт, размер файла) - после каждой пачки.
+
+        Исключение из on_progress (например, отмена) прекращает загрузку: уже
+        зафиксированные пачки остаются в базе.
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Неизвестная таблица: {table}")
+        if not self.db.connect():
+            raise OSError("База данных не открыта")
+        fmt = fmt or self._detect_format(path)
+        foreign_keys = list(self.db.catalog().foreign_keys(table))
+        report = ImportReport(table, path)
+        started = time.perf_counter()
+
+        size = os.path.getsize(path)
+        batch = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for line_no, raw in self._read_rows(f, fmt):
+                try:
+                    row = self._prepare_row(table, raw, foreign_keys)
+                except ValueError as e:
+                    report.reject(line_no, str(e))
+                    continue
+                batch.append((line_no, row))
+                if len(batch) >= self.batch_size:
+                    self._flush(table, batch, report)
+                    batch = []
+                    if on_progress:
+                        on_progress(f.buffer.tell(), size)
+            if batch:
+                self._flush(table, batch, report)
+        if on_progress:
+            on_progress(size, size)
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _flush(self, table, batch, report):
+        """Проверяет и вставляет пачку одной транзакцией"""
+        rows = [row for _, row in batch]
+        rejected = set()
+        for error in validate_rows(self.db, table, rows):
+            if error.row not in rejected:
+                rejected.add(error.row)
+                report.reject(batch[error.row][0], str(error))
+
+        # Строки без Id и с Id вставляются разными запросами
+        groups = {}
+        for index, row in enumerate(rows):
+            if index not in rejected:
+                groups.setdefault(tuple(row), []).append(tuple(row.values()))
+        booking_ids = set()
+        inserted = 0
+        defer = self.defer_triggers and table == "BookedRooms"
+        with self.db.transaction():
+            if defer:
+                self.db.drop_cost_triggers()
+            for columns, values in groups.items():
+                self.db.bulk_insert(table, columns, values)
+                inserted += len(values)
+                if table == "BookedRooms":
+                    booking_index = columns.index("BookingId")
+                    booking_ids.update(value[booking_index] for value in values)
+            if booking_ids:
+                self.db.recalculate_nights(booking_ids)
+            if defer:
+                if booking_ids:
+                    self.db.recalculate_total_cost(booking_ids)
+                self.db.create_cost_triggers()
+        # Пачка зачтена только после фиксации
+        report.inserted += inserted
+
+    @staticmethod
+    def _detect_format(path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".csv":
+            return "csv"
+        if ext in (".jsonl", ".ndjson", ".json"):
+            return "jsonl"
+        raise ValueError(f"Не удалось определить формат файла: {path}")
+
+    @staticmethod
+    def _read_rows(f, fmt):
+        """Построчно читает открытый файл, не загружая его в память целиком"""
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, {"__error__": f"некорректный JSON: {e}"}
+        else:
+            raise ValueError(f"Неподдерживаемый формат: {fmt}")
+
+    def _prepare_row(self, table, raw, foreign_keys):
+        """Приводит типы и проверяет строку; ValueError - строка отклоняется.
+
+        Существование ссылок и занятость Id проверяются позже, на всю пачку сразу.
+        """
+        if "__error__" in raw:
+            raise ValueError(raw["__error__"])
+        row = {}
+        for column in TABLE_COLUMNS[table]:
+            value = raw.get(column)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, ""):
+                continue
+            row[column] = value
+
+        if "Id" in row:
+            row["Id"] = _to_int(row["Id"], "Id")
+
+        for column in foreign_keys:
+            _require(row, column)
+            row[column] = _to_int(row[column], column)
+
+        if table == "Hotels":
+            _require(row, "Name", "City", "Address")
+            if "Rating" in row:
+                row["Rating"] = _to_float(row["Rating"], "Rating")
+        elif table == "Rooms":
+            _require(row, "RoomType", "PricePerNight", "MaxGuests")
+            row["PricePerNight"] = _to_float(row["PricePerNight"], "PricePerNight")
+            row["MaxGuests"] = _to_int(row["MaxGuests"], "MaxGuests")
+        elif table == "Bookings":
+            _require(row, "GuestName", "CheckInDate", "CheckOutDate")
+            check_in = check_stay_date(parse_date(row["CheckInDate"]))
+            check_out = check_stay_date(parse_date(row["CheckOutDate"]))
+            row["CheckInDate"] = check_in.isoformat()
+            row["CheckOutDate"] = check_out.isoformat()
+            if (check_out - check_in).days <= 0:
+                raise ValueError("дата выезда должна быть позже даты заезда")
+            row["TotalCost"] = 0
+        elif table == "BookedRooms":
+            row["NumberOfNights"] = 0  # пересчитывается в _flush по датам бронирования
+        return row
+
+
+def _require(row, *columns):
+    for column in columns:
+        if column not in row:
+            raise ValueError(f"не заполнено поле {column}")
+
+
+def _to_int(value, column):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{column}: ожидалось целое число, получено {value!r}")
+
+
+def _to_float(value, column):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{column}: ожидалось число, получено {value!r}")
+
+
+def main(argv=None):
+    from hotel_management import Database
+
+    parser = argparse.ArgumentParser(description="Массовая загрузка данных в базу отелей")
+    parser.add_argument("database", help="файл базы данных SQLite")
+    parser.add_argument("table", choices=list(TABLE_COLUMNS))
+    parser.add_argument("files", nargs="+", help="файлы .csv или .jsonl")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--no-defer-triggers", action="store_true",
+                        help="не снимать триггеры стоимости на время загрузки")
+    args = parser.parse_args(argv)
+
+    db = Database(args.database)
+    if not db.connect():
+        raise SystemExit(f"Не удалось открыть {args.database}")
+    db.migrate()
+    importer = BulkImporter(db, batch_size=args.batch_size, defer_triggers=not args.no_defer_triggers)
+    try:
+        for path in args.files:
+            report = importer.import_file(args.table, path)
+            print(report)
+            for line_no, reason in report.errors:
+                print(f"  строка {line_no}: {reason}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
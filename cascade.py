@@ -0,0 +1,156 @@
+"""Каскадное удаление по объявленным в схеме ON DELETE внешних ключей.
+
+План строится по каталогу схемы: от удаляемых строк таблицы по ключам с
+ON DELETE CASCADE собираются зависимые таблицы, и для каждой строится подзапрос,
+выбирающий ее удаляемые Id. Ключи RESTRICT (и NO ACTION) запрещают удаление,
+если на удаляемые строки ссылаются строки, которые сами не удаляются. Удаление
+выполняется одним DELETE на таблицу, от зависимых таблиц к исходной, поэтому
+внешние ключи не нарушаются ни на одном шаге.
+
+Подзапросы вложены друг в друга; для больших удалений materialize() сохраняет
+Id каждой таблицы во временную таблицу cascade_{таблица}, чтобы цепочка
+подзапросов не вычислялась заново в каждом запросе.
+"""
+from collections import deque
+
+from query_builder import identifier, normalize, params, where
+
+
+class DeleteRestricted(ValueError):
+    """На удаляемые строки ссылаются строки через внешний ключ с RESTRICT"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        references = ", ".join(f"{child}.{column} -> {parent}: {count}"
+                               for child, column, parent, count in plan.restricted)
+        super().__init__(f"Удаление запрещено: на удаляемые строки ссылаются другие записи ({references})")
+
+
+class DeletePlan:
+    """Что удалит каскад: таблицы от исходной к зависимым, подзапросы их Id и число строк"""
+
+    def __init__(self, table):
+        self.table = table
+        self.tables = []  # исходная таблица, затем зависимые (родители раньше потомков)
+        self.selects = {}  # таблица -> (SELECT Id удаляемых строк, параметры)
+        self.counts = {}  # таблица -> число удаляемых строк
+        self.restricted = []  # (таблица, столбец, родитель, число строк), запрещающие удаление
+        self.materialized = []  # таблицы, Id которых сохранены во временные таблицы
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def affects(self, table):
+        return self.counts.get(table, 0) > 0
+
+    def __str__(self):
+        return ", ".join(f"{table}: {self.counts[table]}" for table in self.tables if self.counts[table])
+
+
+def plan_delete(db, table, conditions):
+    """Строит план удаления строк table по условиям (тройкам столбец, оператор, значение) и считает строки"""
+    conditions = normalize(conditions)
+    if not conditions:
+        raise ValueError("Не задано условие удаления")
+    table = identifier(table)
+    catalog = db.catalog()
+    if not catalog.has_table(table):
+        raise ValueError(f"Неизвестная таблица: {table}")
+
+    # Зависимые таблицы и ключи, по которым до них доходит каскад
+    edges = {}  # таблица -> [(столбец, родитель)]
+    reached = [table]
+    queue = deque([table])
+    while queue:
+        parent = queue.popleft()
+        for child, column, action in catalog.referencing(parent):
+            if action != "CASCADE" or child == parent:
+                continue
+            edges.setdefault(child, []).append((column, parent))
+            if child not in reached:
+                reached.append(child)
+                queue.append(child)
+
+    plan = DeletePlan(table)
+    plan.tables.append(table)
+    plan.selects[table] = (f"SELECT Id FROM {table} {where(conditions)}", params(conditions))
+    pending = reached[1:]
+    while pending:
+        # Подзапрос таблицы строится, когда готовы подзапросы всех ее родителей
+        child = next((name for name in pending if all(parent in plan.selects for _, parent in edges[name])), None)
+        if child is None:
+            raise ValueError(f"Циклические ON DELETE CASCADE не поддерживаются: {', '.join(pending)}")
+        parts = []
+        values = ()
+        for column, parent in edges[child]:
+            sql, parent_values = plan.selects[parent]
+            parts.append(f"{column} IN ({sql})")
+            values += parent_values
+        plan.selects[child] = (f"SELECT Id FROM {child} WHERE {' OR '.join(parts)}", values)
+        plan.tables.append(child)
+        pending.remove(child)
+
+    for name in plan.tables:
+        sql, values = plan.selects[name]
+        plan.counts[name] = db._execute_sql(f"SELECT COUNT(*) FROM ({sql}) AS t", values)[0][0]
+
+    for name in plan.tables:
+        if not plan.affects(name):
+            continue
+        for child, column, action in catalog.referencing(name):
+            if action not in ("RESTRICT", "NO ACTION"):
+                continue
+            sql, values = plan.selects[name]
+            query = f"SELECT COUNT(*) FROM {child} WHERE {column} IN ({sql})"
+            if child in plan.selects:
+                child_sql, child_values = plan.selects[child]
+                query += f" AND Id NOT IN ({child_sql})"
+                values += child_values
+            count = db._execute_sql(query, values)[0][0]
+            if count:
+                plan.restricted.append((child, column, name, count))
+    return plan
+
+
+def materialize(db, plan):
+    """Сохраняет Id удаляемых строк во временные таблицы и подставляет их в план.
+
+    Вызывается внутри transaction(); после удаления - drop_materialized (откат
+    транзакции удаляет временные таблицы сам).
+    """
+    for table in plan.tables:
+        if not plan.affects(table):
+            continue
+        sql, values = plan.selects[table]
+        db._execute_sql(f"DROP TABLE IF EXISTS cascade_{table}")
+        db._execute_sql(f"CREATE TEMP TABLE cascade_{table} (Id INTEGER PRIMARY KEY)")
+        db._execute_sql(f"INSERT INTO cascade_{table} (Id) {sql}", values)
+        plan.selects[table] = (f"SELECT Id FROM cascade_{table}", ())
+        plan.materialized.append(table)
+
+
+def drop_materialized(db, plan):
+    for table in plan.materialized:
+        db._execute_sql(f"DROP TABLE IF EXISTS cascade_{table}")
+    plan.materialized = []
+
+
+def execute_delete(db, plan, on_progress=None):
+    """Удаляет строки по плану, от зависимых таблиц к исходной; вызывается внутри transaction().
+
+    on_progress(удалено, всего) вызывается после каждой таблицы; исключение из
+    него откатывает транзакцию вместе с уже удаленными строками.
+    """
+    if plan.restricted:
+        raise DeleteRestricted(plan)
+    done = 0
+    for name in reversed(plan.tables):
+        if not plan.affects(name):
+            continue
+        sql, values = plan.selects[name]
+        db._execute_sql(f"DELETE FROM {name} WHERE Id IN ({sql})", values)
+        done += plan.counts[name]
+        if on_progress:
+            on_progress(done, plan.total)
+    return plan
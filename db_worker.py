@@ -0,0 +1,116 @@
+"""Выполнение операций с БД в фоновом потоке, чтобы главный цикл Tk не блокировался"""
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """Операция отменена пользователем"""
+
+
+class Job:
+    """Задание для DbWorker: функция fn(job, *args) и обратные вызовы в потоке Tk.
+
+    Длинные операции вызывают job.progress(done, total) и job.check_cancelled()
+    между частями работы; cancel() также прерывает выполняющийся SQL-запрос.
+    """
+
+    def __init__(self, worker, fn, args, on_done=None, on_error=None, on_progress=None):
+        self.worker = worker
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Отменяет задание; SQL прерывается, только если задание уже выполняется.
+
+        Задание из очереди просто пропускается: interrupt() прервал бы чужое задание.
+        """
+        self._cancelled.set()
+        with self.worker._current_lock:
+            if self.worker.current is self:
+                self.worker.db.interrupt()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, done, total=None):
+        self.check_cancelled()
+        if self.on_progress:
+            self.worker._post(self.on_progress, done, total)
+
+
+class DbWorker:
+    """Выделенный поток для работы с БД с очередью заданий.
+
+    Результаты передаются обратно в главный поток через очередь, которую
+    опрашивает root.after: вызывать Tk из другого потока нельзя.
+    """
+
+    def __init__(self, root, db, poll_interval=50):
+        self.root = root
+        self.db = db
+        self.poll_interval = poll_interval
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        # Выполняемое сейчас задание; смена под блокировкой, чтобы cancel() не прервал следующее
+        self.current = None
+        self._current_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None):
+        job = Job(self, fn, args, on_done, on_error, on_progress)
+        self._jobs.put(job)
+        return job
+
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join(timeout=5)
+        if self._poll_id:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            with self._current_lock:
+                self.current = job
+            try:
+                job.check_cancelled()
+                result = job.fn(job, *job.args)
+            except Exception as e:
+                if job.cancelled and isinstance(e, (JobCancelled, self.db.Error)):
+                    e = JobCancelled()
+                if job.on_error:
+                    self._post(job.on_error, e)
+                else:
+                    print(f"Background job error: {e}")
+            else:
+                if job.on_done:
+                    self._post(job.on_done, result)
+            finally:
+                with self._current_lock:
+                    self.current = None
+
+    def _post(self, callback, *args):
+        self._results.put((callback, args))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
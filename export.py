@@ -0,0 +1,227 @@
+"""Потоковая выгрузка таблиц и результатов запросов в CSV, JSON Lines и Parquet.
+
+Строки читаются курсором пачками по batch_size (Database.iter_rows) и сразу
+записываются, поэтому расход памяти не зависит от размера таблицы. CSV и JSONL
+можно сжимать gzip (расширение .gz), Parquet пишется группами строк по пачке
+и требует пакета pyarrow.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+from itertools import islice
+
+FORMATS = ("csv", "jsonl", "parquet")
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# Объявленный тип столбца -> тип Arrow; типы столбцов запроса определяются по первой пачке
+_ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+class ExportReport:
+    """Итог выгрузки одной таблицы или запроса"""
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self.rows = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.source}: выгружено {self.rows} строк в {os.path.basename(self.path)} "
+                f"({self.bytes / 1e6:.1f} МБ), {self.elapsed:.2f} с, {self.rows_per_sec:.0f} строк/с")
+
+
+def detect_format(path):
+    """(формат, сжимать ли gzip) по расширению файла: report.csv.gz -> ("csv", True)"""
+    name = path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    fmt = EXTENSIONS.get(os.path.splitext(name)[1])
+    if fmt is None:
+        raise ValueError(f"Не удалось определить формат по имени файла: {path}")
+    return fmt, compress
+
+
+def export_table(db, table, path, fmt=None, compress=None, batch_size=5000, on_progress=None):
+    """Выгружает таблицу целиком в порядке Id"""
+    if not db.connect():
+        raise OSError("База данных не открыта")
+    info = db.catalog().tables.get(table)
+    if info is None:
+        raise ValueError(f"Неизвестная таблица: {table}")
+    total = db.count_rows(table)
+    types = [_ARROW_TYPES.get((info.types.get(column) or "").upper()) for column in info.columns]
+    return _export(db, table, f"SELECT * FROM {table} ORDER BY Id", (), info.columns, types, total,
+                   path, fmt, compress, batch_size, on_progress)
+
+
+def export_query(db, sql, path, params=None, fmt=None, compress=None, batch_size=5000, on_progress=None):
+    """Выгружает результат произвольного SELECT; имена столбцов берутся из описания курсора"""
+    if not db.connect():
+        raise OSError("База данных не открыта")
+    columns = query_columns(db, sql, params)
+    return _export(db, "запрос", sql, params or (), columns, [None] * len(columns), None,
+                   path, fmt, compress, batch_size, on_progress)
+
+
+def query_columns(db, sql, params=None):
+    """Имена столбцов результата запроса без чтения строк"""
+    with db._lock:
+        if db._execute_sql(f"SELECT * FROM ({sql}) AS q LIMIT 0", params) is None:
+            raise ValueError("Некорректный запрос")
+        return [column[0] for column in db.cursor.description]
+
+
+def _export(db, source, sql, params, columns, types, total, path, fmt, compress, batch_size, on_progress):
+    if fmt is None:
+        fmt, gz = detect_format(path)
+    else:
+        gz = path.lower().endswith(".gz")
+    compress = gz if compress is None else compress
+    if fmt not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат: {fmt}")
+    writer_class = {"csv": _CsvWriter, "jsonl": _JsonLinesWriter, "parquet": _ParquetWriter}[fmt]
+
+    report = ExportReport(source, path)
+    started = time.perf_counter()
+    rows = db.iter_rows(sql, params, batch_size)
+    writer = writer_class(path, columns, types, compress)
+    completed = False
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            writer.write(batch)
+            report.rows += len(batch)
+            if on_progress:
+                on_progress(report.rows, total)
+        completed = True
+    finally:
+        rows.close()
+        writer.close()
+        # Прерванная выгрузка (ошибка или отмена) не должна оставить файл, похожий на полный
+        if not completed:
+            os.remove(path)
+    report.elapsed = time.perf_counter() - started
+    report.bytes = os.path.getsize(path)
+    return report
+
+
+class _CsvWriter:
+    def __init__(self, path, columns, types, compress):
+        # utf-8-sig: Excel распознает кириллицу в несжатом файле
+        self.file = (gzip.open(path, "wt", compresslevel=6, encoding="utf-8", newline="") if compress
+                     else open(path, "w", encoding="utf-8-sig", newline=""))
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonLinesWriter:
+    def __init__(self, path, columns, types, compress):
+        self.file = (gzip.open(path, "wt", compresslevel=6, encoding="utf-8") if compress
+                     else open(path, "w", encoding="utf-8"))
+        self.columns = columns
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """Каждая пачка - отдельная группа строк (row group) Parquet"""
+
+    def __init__(self, path, columns, types, compress):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Для формата Parquet нужен пакет pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+        self.columns = columns
+        self.types = list(types)
+        self.compression = "gzip" if compress else "snappy"
+        self.writer = None
+
+    def _schema(self, rows):
+        fields = []
+        for index, (column, name) in enumerate(zip(self.columns, self.types)):
+            if name is None:
+                values = [row[index] for row in rows if row[index] is not None]
+                if values and all(isinstance(value, int) for value in values):
+                    name = "int64"
+                elif values and all(isinstance(value, (int, float)) for value in values):
+                    name = "float64"
+                else:
+                    name = "string"
+            fields.append(self.pa.field(column, getattr(self.pa, name)()))
+        return self.pa.schema(fields)
+
+    def write(self, rows):
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(self.path, self._schema(rows), compression=self.compression)
+        arrays = [list(column) for column in zip(*rows)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.writer.schema))
+
+    def close(self):
+        if self.writer is None:
+            # Пустой результат: файл только со схемой
+            self.writer = self.parquet.ParquetWriter(self.path, self._schema([]), compression=self.compression)
+        self.writer.close()
+
+
+def main(argv=None):
+    from hotel_management import Database
+
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка таблиц и запросов базы отелей")
+    parser.add_argument("database", help="файл базы данных SQLite")
+    parser.add_argument("output", help="файл или каталог (для нескольких таблиц): .csv, .jsonl, .parquet, + .gz")
+    parser.add_argument("tables", nargs="*", help="таблицы (по умолчанию - Hotels, Rooms, Bookings, BookedRooms)")
+    parser.add_argument("--query", help="выгрузить результат SELECT вместо таблиц")
+    parser.add_argument("--format", choices=FORMATS, help="формат каталога выгрузки (по умолчанию csv)")
+    parser.add_argument("--gzip", action="store_true", help="сжимать файлы в каталоге выгрузки")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    db = Database(args.database)
+    if not db.connect():
+        raise SystemExit(f"Не удалось открыть {args.database}")
+    try:
+        if args.query:
+            print(export_query(db, args.query, args.output, batch_size=args.batch_size))
+            return
+        tables = args.tables or ["Hotels", "Rooms", "Bookings", "BookedRooms"]
+        if len(tables) == 1 and not os.path.isdir(args.output):
+            print(export_table(db, tables[0], args.output, batch_size=args.batch_size))
+            return
+        os.makedirs(args.output, exist_ok=True)
+        fmt = args.format or "csv"
+        for table in tables:
+            path = os.path.join(args.output, f"{table}.{fmt}" + (".gz" if args.gzip else ""))
+            print(export_table(db, table, path, batch_size=args.batch_size))
+    except (ValueError, OSError, db.Error) as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
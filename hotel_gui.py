@@ -0,0 +1,1023 @@
+"""Графический интерфейс (tkinter) для работы с базой данных отелей"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import os
+import time
+import re
+from collections import deque
+from datetime import date, timedelta
+from db_worker import DbWorker, JobCancelled
+from booking_service import BookingError, BookingService
+from hotel_management import DATE_FORMAT, Database, to_display_date
+
+
+COLUMN_TRANSLATIONS = {
+    "Name": "Название",
+    "City": "Город",
+    "Address": "Адрес",
+    "Rating": "Рейтинг",
+    "HotelId": "ID отеля",
+    "RoomType": "Тип номера",
+    "PricePerNight": "Цена за ночь",
+    "MaxGuests": "Макс гостей",
+    "GuestName": "Имя гостя",
+    "CheckInDate": "Дата заезда",
+    "CheckOutDate": "Дата выезда",
+    "TotalCost": "Общая стоимость",
+    "NumberOfNights": "Количество ночей",
+    "BookingId": "ID бронирования",
+    "RoomId": "ID номера"
+}
+
+
+class PagedTreeview(ttk.Frame):
+    """Treeview, который держит в памяти только окно из нескольких страниц таблицы.
+
+    Страницы подгружаются по Id при прокрутке к краю окна; следующая страница
+    запрашивается заранее в idle-время, а страницы, ушедшие за пределы окна,
+    удаляются из виджета. Поэтому время первой отрисовки и память не зависят от
+    размера таблицы.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, db, table, columns, row_formatter=None, page_size=PAGE_SIZE, max_pages=5,
+                 initial_rows=None):
+        super().__init__(parent)
+        self.db = db
+        self.table = table
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.row_formatter = row_formatter or (lambda rows: rows)
+        self.pages = deque()  # (first_id, last_id, [item, ...])
+        self.has_more_above = False
+        self.has_more_below = True
+        # (after_id, rows); первая страница может быть получена заранее, например в DbWorker
+        self._prefetched = (None, initial_rows) if initial_rows is not None else None
+        self._loading = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings')
+        for column in columns:
+            self.tree.heading(column, text=column)
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.scrollbar = scrollbar
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=1, fill="both")
+        self.load_next()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) > 0.9 and self.has_more_below:
+            self.after_idle(self.load_next)
+        elif float(first) < 0.1 and self.has_more_above:
+            self.after_idle(self.load_previous)
+
+    def _fetch(self, after_id=None, before_id=None):
+        if not self.db.connect():
+            return []
+        return self.db.select_page(self.table, after_id=after_id, before_id=before_id,
+                                   limit=self.page_size) or []
+
+    def load_next(self):
+        if self._loading or not self.has_more_below or not self.winfo_exists():
+            return
+        self._loading = True
+        try:
+            after_id = self.pages[-1][1] if self.pages else None
+            if self._prefetched and self._prefetched[0] == after_id:
+                rows = self._prefetched[1]
+            else:
+                rows = self._fetch(after_id=after_id)
+            self._prefetched = None
+            self.has_more_below = len(rows) == self.page_size
+            if rows:
+                items = [self.tree.insert('', 'end', values=row) for row in self.row_formatter(rows)]
+                self.pages.append((rows[0][0], rows[-1][0], items))
+                if len(self.pages) > self.max_pages:
+                    # Запоминаем видимую строку, чтобы удаление верхней страницы не сдвинуло вид
+                    anchor = self.tree.identify_row(self.tree.winfo_height() // 2)
+                    self._drop_page(self.pages.popleft())
+                    self.has_more_above = True
+                    if anchor and self.tree.exists(anchor):
+                        self.tree.see(anchor)
+            if self.has_more_below:
+                self.after_idle(self._prefetch_next)
+        finally:
+            self._loading = False
+
+    def load_previous(self):
+        if self._loading or not self.has_more_above or not self.pages or not self.winfo_exists():
+            return
+        self._loading = True
+        try:
+            rows = self._fetch(before_id=self.pages[0][0])
+            self.has_more_above = len(rows) == self.page_size
+            if rows:
+                items = [self.tree.insert('', index, values=row)
+                         for index, row in enumerate(self.row_formatter(rows))]
+                self.pages.appendleft((rows[0][0], rows[-1][0], items))
+                if len(self.pages) > self.max_pages:
+                    self._drop_page(self.pages.pop())
+                    self.has_more_below = True
+                    self._prefetched = None
+                self.tree.see(items[-1])
+        finally:
+            self._loading = False
+
+    def _drop_page(self, page):
+        self.tree.delete(*page[2])
+
+    def _prefetch_next(self):
+        if not self.pages or not self.has_more_below or not self.winfo_exists():
+            return
+        after_id = self.pages[-1][1]
+        if not (self._prefetched and self._prefetched[0] == after_id):
+            self._prefetched = (after_id, self._fetch(after_id=after_id))
+
+
+class HotelBookingApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Приложение для бронирования отелей")
+        self.root.geometry("1000x600")  # Увеличиваем размер окна
+        self.db = Database()
+        self.service = BookingService(self.db)
+        # Отдельное соединение для чтения из потока Tk (страницы таблиц, метаданные, свободные номера):
+        # DbWorker держит блокировку self.db всю транзакцию задания, а в WAL чтение не ждет записи
+        self.reader = Database()
+        self.current_table = None
+        self.is_db_open = False  # Флаг для отслеживания открыта ли база
+        self.search_results = None
+        self.worker = DbWorker(self.root, self.db)
+        self.create_menu()
+        self.disable_all_actions()  # изначально все кроме создать/открыть заблокировано
+        self.input_validation = self.root.register(self.validate_input)
+        self.reset_button = None
+        self.table_label = tk.Label(self.root, text="", font=('Helvetica', 12, 'bold'))
+        self.table_label.pack(pady=5)
+        self.reset_button_frame = tk.Frame(self.root)  # Frame для кнопки сброса
+        self.reset_button_frame.pack(pady=5)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """Закрывает соединение с БД перед выходом из приложения"""
+        self.worker.stop()
+        self.reader.close()
+        self.db.close()
+        self.root.destroy()
+
+    def run_in_background(self, title, fn, *args, on_done=None, error_message="Ошибка"):
+        """Выполняет fn(job, *args) в потоке DbWorker.
+
+        Если задан title, показывает окно с индикатором прогресса и кнопкой отмены.
+        on_done(result) вызывается в потоке Tk.
+        """
+        dialog = progress = status = None
+        if title:
+            dialog = tk.Toplevel(self.root)
+            dialog.title(title)
+            dialog.transient(self.root)
+            status = tk.Label(dialog, text="Выполняется...")
+            status.pack(padx=10, pady=5)
+            progress = ttk.Progressbar(dialog, length=300, mode="indeterminate")
+            progress.pack(padx=10, pady=5)
+            progress.start()
+
+        def close_dialog():
+            if dialog is not None and dialog.winfo_exists():
+                dialog.destroy()
+
+        def on_progress(done, total):
+            if progress is None or not progress.winfo_exists():
+                return
+            if total:
+                progress.stop()
+                progress.config(mode="determinate", maximum=total, value=done)
+                status.config(text=f"{done} из {total}")
+
+        def finished(result):
+            close_dialog()
+            if on_done:
+                on_done(result)
+
+        def failed(error):
+            close_dialog()
+            if isinstance(error, JobCancelled):
+                messagebox.showinfo("Информация", "Операция отменена")
+            else:
+                messagebox.showerror("Ошибка", f"{error_message}: {error}")
+
+        job = self.worker.submit(fn, *args, on_done=finished, on_error=failed, on_progress=on_progress)
+        if dialog is not None:
+            tk.Button(dialog, text="Отмена", command=job.cancel).pack(pady=5)
+            dialog.protocol("WM_DELETE_WINDOW", job.cancel)
+        return job
+
+    def create_menu(self):
+        menu_bar = tk.Menu(self.root)
+        self.root.config(menu=menu_bar)
+
+        db_menu = tk.Menu(menu_bar, tearoff=0)
+        db_menu.add_command(label="Создать базу данных", command=self.create_database)
+        db_menu.add_command(label="Открыть базу данных", command=self.open_database)
+        db_menu.add_command(label="Удалить базу данных", command=self.delete_database)
+        db_menu.add_separator()
+        db_menu.add_command(label="Диагностика", command=self.diagnostics_window)
+        menu_bar.add_cascade(label="База данных", menu=db_menu)
+
+        self.table_menu = tk.Menu(menu_bar, tearoff=0)
+        self.table_menu.add_command(label="Отели", command=lambda: self.show_table_data("Hotels"))
+        self.table_menu.add_command(label="Номера", command=lambda: self.show_table_data("Rooms"))
+        self.table_menu.add_command(label="Бронирования", command=lambda: self.show_table_data("Bookings"))
+        self.table_menu.add_command(label="Забронированные номера", command=lambda: self.show_table_data("BookedRooms"))
+        menu_bar.add_cascade(label="Таблицы", menu=self.table_menu)
+
+        self.operations_menu = tk.Menu(menu_bar, tearoff=0)
+        self.operations_menu.add_command(label="Показать все данные", command=self.show_all_data)
+        self.operations_menu.add_command(label="Очистить таблицу", command=self.clear_table_data)
+        self.operations_menu.add_command(label="Вставить данные", command=self.insert_data_window)
+        self.operations_menu.add_command(label="Обновить данные", command=self.update_data_window)
+        self.operations_menu.add_command(label="Удалить данные", command=self.delete_data_window)
+        self.operations_menu.add_command(label="Поиск данных", command=self.search_data_window)
+        self.operations_menu.add_command(label="Импорт данных", command=self.import_data)
+        self.operations_menu.add_command(label="Экспорт данных", command=self.export_data)
+        self.operations_menu.add_command(label="Свободные номера", command=self.availability_window)
+        self.operations_menu.add_command(label="Аналитика", command=self.analytics_window)
+        self.operations_menu.add_command(label="Архивировать старые бронирования", command=self.archive_window)
+        self.operations_menu.add_command(label="Очистить все таблицы", command=self.clear_all_tables)
+        menu_bar.add_cascade(label="Операции", menu=self.operations_menu)
+
+    def enable_all_actions(self):
+        """Включает все действия кроме создания и открытия БД."""
+        self.is_db_open = True
+        self.table_menu.entryconfig("Отели", state="normal")
+        self.table_menu.entryconfig("Номера", state="normal")
+        self.table_menu.entryconfig("Бронирования", state="normal")
+        self.table_menu.entryconfig("Забронированные номера", state="normal")
+
+        self.operations_menu.entryconfig("Показать все данные", state="normal")
+        self.operations_menu.entryconfig("Очистить таблицу", state="normal")
+        self.operations_menu.entryconfig("Вставить данные", state="normal")
+        self.operations_menu.entryconfig("Обновить данные", state="normal")
+        self.operations_menu.entryconfig("Удалить данные", state="normal")
+        self.operations_menu.entryconfig("Поиск данных", state="normal")
+        self.operations_menu.entryconfig("Импорт данных", state="normal")
+        self.operations_menu.entryconfig("Экспорт данных", state="normal")
+        self.operations_menu.entryconfig("Свободные номера", state="normal")
+        self.operations_menu.entryconfig("Аналитика", state="normal")
+        self.operations_menu.entryconfig("Архивировать старые бронирования", state="normal")
+        self.operations_menu.entryconfig("Очистить все таблицы", state="normal")
+
+    def disable_all_actions(self):
+        """Отключает все действия, кроме создания и открытия БД."""
+        self.is_db_open = False
+        self.table_menu.entryconfig("Отели", state="disabled")
+        self.table_menu.entryconfig("Номера", state="disabled")
+        self.table_menu.entryconfig("Бронирования", state="disabled")
+        self.table_menu.entryconfig("Забронированные номера", state="disabled")
+
+        self.operations_menu.entryconfig("Показать все данные", state="disabled")
+        self.operations_menu.entryconfig("Очистить таблицу", state="disabled")
+        self.operations_menu.entryconfig("Вставить данные", state="disabled")
+        self.operations_menu.entryconfig("Обновить данные", state="disabled")
+        self.operations_menu.entryconfig("Удалить данные", state="disabled")
+        self.operations_menu.entryconfig("Поиск данных", state="disabled")
+        self.operations_menu.entryconfig("Импорт данных", state="disabled")
+        self.operations_menu.entryconfig("Экспорт данных", state="disabled")
+        self.operations_menu.entryconfig("Свободные номера", state="disabled")
+        self.operations_menu.entryconfig("Аналитика", state="disabled")
+        self.operations_menu.entryconfig("Архивировать старые бронирования", state="disabled")
+        self.operations_menu.entryconfig("Очистить все таблицы", state="disabled")
+
+    def diagnostics_window(self):
+        """Статистика запросов: счетчики, самые дорогие запросы и журнал медленных с планами"""
+        window = tk.Toplevel(self.root)
+        window.title("Диагностика")
+        window.geometry("900x600")
+        controls = tk.Frame(window)
+        controls.pack(fill="x", padx=5, pady=5)
+        enabled = tk.BooleanVar(window, value=self.db.instrumentation is not None)
+        tk.Label(controls, text="Медленные от, мс:").pack(side="left")
+        threshold = tk.Entry(controls, width=8, validate="key", validatecommand=(self.input_validation, "%P", "%V"))
+        threshold.insert(0, str(int(self.db.instrumentation.slow_ms)) if self.db.instrumentation else "100")
+        threshold.pack(side="left", padx=5)
+
+        counters = tk.Label(window, text="", justify="left", anchor="w")
+        counters.pack(fill="x", padx=5)
+        columns = ["Вызовов", "Всего, мс", "Среднее, мс", "p95, мс", "Макс., мс", "Строк", "Запрос"]
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=80 if column != "Запрос" else 420, stretch=column == "Запрос")
+        tree.pack(fill="both", expand=1, padx=5)
+        slow_log = tk.Text(window, height=10, wrap="none")
+        slow_log.pack(fill="both", expand=1, padx=5, pady=5)
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            diagnostics = self.db.diagnostics()
+            counters.config(text=", ".join(f"{name}: {value}" for name, value in diagnostics.items()))
+            tree.delete(*tree.get_children())
+            slow_log.delete("1.0", "end")
+            instrumentation = self.db.instrumentation
+            if instrumentation is not None:
+                for stats in instrumentation.top(50):
+                    tree.insert("", "end", values=(stats.calls, f"{stats.total_ms:.1f}", f"{stats.avg_ms:.2f}",
+                                                   f"{stats.percentile(95):.2f}", f"{stats.max_ms:.1f}", stats.rows,
+                                                   stats.sql))
+                slow_queries = reversed(list(instrumentation.slow_log))
+                slow_log.insert("end", "\n\n".join(str(query) for query in slow_queries))
+            window.after(1000, refresh)
+
+        def toggle():
+            if enabled.get():
+                self.db.enable_instrumentation(float(threshold.get() or 0))
+            else:
+                self.db.disable_instrumentation()
+
+        def reset():
+            if self.db.instrumentation is not None:
+                self.db.instrumentation.reset()
+            self.db.statements.hits = self.db.statements.misses = 0
+
+        tk.Checkbutton(controls, text="Собирать статистику", variable=enabled, command=toggle).pack(side="left")
+        tk.Button(controls, text="Применить порог", command=toggle).pack(side="left", padx=5)
+        tk.Button(controls, text="Сбросить", command=reset).pack(side="left", padx=5)
+        refresh()
+
+    def create_database(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
+        if file_path:
+            self._set_db_name(file_path)
+            if self._connect_and_migrate():
+                self.enable_all_actions()
+                messagebox.showinfo("Успех", "База данных создана успешно!")
+                self.show_table_data("Hotels")  # Открыть таблицу отели
+            else:
+                messagebox.showerror("Ошибка", "Не удалось создать базу данных!")
+
+    def open_database(self):
+        file_path = filedialog.askopenfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
+        if file_path:
+            self._set_db_name(file_path)
+            if self._connect_and_migrate():
+                self.enable_all_actions()
+                messagebox.showinfo("Успех", "База данных открыта успешно!")
+                self.show_table_data("Hotels")
+            else:
+                messagebox.showerror("Ошибка", "Не удалось открыть базу данных!")
+
+    def _set_db_name(self, db_name):
+        self.db.set_db_name(db_name)
+        self.reader.set_db_name(db_name)
+
+    def _connect_and_migrate(self):
+        """Открывает файл БД и обновляет схему до текущей версии"""
+        if not self.db.connect():
+            return False
+        try:
+            self.db.migrate()
+        except (self.db.Error, OSError) as e:
+            print(f"Migration error: {e}")
+            self.db.close()
+            return False
+        if self.db.quarantined:
+            moved = "\n".join(f"{self.get_translated_table_name(table)}: {count}"
+                              for table, count in self.db.quarantined.items())
+            messagebox.showwarning("Обновление базы данных",
+                                   f"Записи, ссылающиеся на удаленные строки, перенесены в таблицы Orphaned*:\n{moved}")
+        # Соединение для чтения открывается после миграции: схема уже обновлена
+        self.reader.close()
+        return self.reader.connect()
+
+    def delete_database(self):
+        file_path = filedialog.askopenfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
+        if file_path:
+            if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить выбранную базу данных?"):
+                try:
+
+                    if self.db.db_name == file_path:
+                        self.reader.close()
+                        self.db.close()
+                    else:
+                        db_to_delete = Database(file_path)
+                        if db_to_delete.connect():
+                            db_to_delete.close()  # checkpoint переносит WAL в файл и удаляет -wal/-shm
+
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                        for suffix in ("-wal", "-shm"):
+                            if os.path.exists(file_path + suffix):
+                                os.remove(file_path + suffix)
+                        if self.db.db_name == file_path:
+                            self.disable_all_actions()
+                            self.clear_treeview()
+                            self._set_db_name(None)
+                        messagebox.showinfo("Успех", "База данных удалена успешно!")
+
+                    else:
+                        messagebox.showinfo("Информация", "База данных не найдена.")
+
+                except FileNotFoundError:
+                    messagebox.showerror("Ошибка", "Файл базы данных не найден!")
+                except Exception as e:
+                    messagebox.showerror("Ошибка", f"Не удалось удалить базу данных: {e}")
+
+    def show_table_data(self, table):
+        self.current_table = table
+        if self.reader.connect():
+            display_columns, db_columns = self.get_table_columns(table)
+            self.table_label.config(text=self.get_translated_table_name(table))
+            self.show_table_pages(table, display_columns, db_columns, self.root)
+        else:
+            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
+
+    def _display_rows(self, table, rows, db_columns):
+        """Переводит даты из формата хранения ISO-8601 в формат форм dd.mm.yyyy"""
+        date_columns = Database.DATE_COLUMNS.get(table)
+        if not date_columns or not rows:
+            return rows
+        indexes = {i for i, column in enumerate(db_columns) if column in date_columns}
+        return [tuple(to_display_date(value) if i in indexes else value for i, value in enumerate(row))
+                for row in rows]
+
+    def get_translated_table_name(self, table):
+        translations = {
+            "Hotels": "Отели",
+            "Rooms": "Номера",
+            "Bookings": "Бронирования",
+            "BookedRooms": "Забронированные номера"
+        }
+        return translations.get(table, table)
+
+    def show_all_data(self):
+        if self.reader.connect():
+            tables = ["Hotels", "Rooms", "Bookings", "BookedRooms"]
+
+            def load(job):
+                """Число строк и первая страница каждой таблицы - в фоновом потоке"""
+                pages = {}
+                for i, table in enumerate(tables):
+                    job.progress(i, len(tables))
+                    rows = self.db.select_page(table, limit=PagedTreeview.PAGE_SIZE) or []
+                    pages[table] = (self.db.count_rows(table), rows)
+                return pages
+
+            self.run_in_background("Загрузка данных", load, on_done=self.show_all_data_in_tabs,
+                                   error_message="Не удалось загрузить данные")
+        else:
+            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
+
+    def get_table_columns(self, table):
+        if self.reader.connect():
+            columns = self.reader.catalog().columns(table)
+            display_columns = [COLUMN_TRANSLATIONS.get(col, col) for col in columns]  # перевод, если есть, иначе как есть
+            display_columns = [col.replace('_', ' ') for col in display_columns]
+            return display_columns, columns  # возвращаем кортеж: отображаемые и реальные имена столбцов
+        else:
+            return [], []
+
+    def clear_table_data(self):
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+        if not self.reader.connect():
+            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
+            return
+        table = self.current_table
+        # Зависимые таблицы очищаются каскадом (например, номера и бронирования вместе с отелями)
+        conditions = [("Id", "IS NOT NULL", None)]
+
+        def clear_job(job):
+            return self.db.delete_cascade(table, conditions, on_progress=job.progress)
+
+        def confirm(plan):
+            self._confirm_delete(plan, f"Очистка таблицы {self.get_translated_table_name(table)}", clear_job,
+                                 lambda _: self.show_table_data(table), "Не удалось очистить таблицу")
+
+        self.run_in_background(None, lambda job: self.db.preview_delete(table, conditions), on_done=confirm,
+                               error_message="Не удалось подсчитать удаляемые записи")
+
+    def _confirm_delete(self, plan, title, delete_job, on_done, error_message):
+        """Показывает по плану каскада, сколько записей каких таблиц будет удалено, и после
+        подтверждения выполняет delete_job в DbWorker"""
+        if plan.restricted:
+            references = "\n".join(
+                f"{self.get_translated_table_name(child)}: {count}" for child, _, _, count in plan.restricted)
+            messagebox.showerror("Удаление невозможно", f"На удаляемые записи ссылаются другие записи:\n{references}")
+            return
+        if not plan.total:
+            messagebox.showinfo("Информация", "Нет записей, подходящих под условие.")
+            return
+        counts = "\n".join(f"{self.get_translated_table_name(name)}: {plan.counts[name]}"
+                           for name in plan.tables if plan.counts[name])
+        if messagebox.askyesno("Подтверждение", f"Будут удалены записи:\n{counts}\n\nПродолжить?"):
+            self.run_in_background(title, delete_job, on_done=on_done, error_message=error_message)
+
+    def show_all_data_in_tabs(self, pages):
+        """Отображает все данные из всех таблиц в разных вкладках; строки подгружаются страницами.
+
+        pages: {таблица: (число строк, первая страница)}
+        """
+        window = tk.Toplevel(self.root)
+        window.title("Все данные")
+        tabControl = ttk.Notebook(window)
+        tabControl.pack(expand=1, fill="both")
+
+        translations = {
+            "Hotels": "Отели",
+            "Rooms": "Номера",
+            "Bookings": "Бронирования",
+            "BookedRooms": "Забронированные номера"
+        }
+
+        for table, (count, first_page) in pages.items():
+            frame = ttk.Frame(tabControl)
+            tabControl.add(frame, text=f"{translations.get(table, table)} ({count})")
+            display_columns, db_columns = self.get_table_columns(table)
+            self.show_table_pages(table, display_columns, db_columns, frame, first_page)
+
+    def show_table_pages(self, table, display_columns, db_columns, parent, first_page=None):
+        """Отображает таблицу БД в PagedTreeview, заменяя предыдущую таблицу в parent"""
+        self._clear_tables(parent)
+        view = PagedTreeview(parent, self.reader, table, display_columns,
+                             row_formatter=lambda rows: self._display_rows(table, rows, db_columns),
+                             initial_rows=first_page)
+        view.pack(expand=1, fill="both")
+        return view
+
+    def _clear_tables(self, parent):
+        for child in parent.winfo_children():
+            if isinstance(child, (ttk.Treeview, PagedTreeview)):
+                child.destroy()
+
+    def show_data_in_tree(self, data, columns, parent=None, table_name=None):
+        """Отображает данные в виджете Treeview"""
+        if parent is None:
+            parent = self.root
+        self._clear_tables(parent)
+
+        tree = ttk.Treeview(parent, columns=columns, show='headings')
+        for column in columns:
+            tree.heading(column, text=column)
+
+        for row in data:
+            tree.insert('', 'end', values=row)
+
+        tree.pack(expand=1, fill="both")
+
+        if self.search_results and parent == self.root:
+            if not self.reset_button:
+                self.reset_button = tk.Button(self.reset_button_frame, text="Сбросить поиск", command=self.reset_search)
+                self.reset_button.pack(pady=5)
+
+        return tree
+
+    def clear_treeview(self):
+        """Очищает все виджеты treeview"""
+        self._clear_tables(self.root)
+
+    def validate_input(self, new_value, reason):
+        """Проверяет, что в поле ввода только цифры"""
+        if reason == 'focusin' or reason == 'focusout' or new_value == "":
+            return True  # Разрешаем фокус и пустое поле
+        return re.match(r'^\d*$', new_value) is not None
+
+    def insert_data_window(self):
+        """Окно для вставки данных"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Вставить данные в {self.get_translated_table_name(self.current_table)}")
+        display_columns, db_columns = self.get_table_columns(self.current_table)
+        labels, entries = [], []
+
+        for i, column in enumerate(display_columns):
+            if column == "Общая стоимость" or column == "Количество ночей":
+                continue
+            tk.Label(window, text=column).grid(row=i, column=0, padx=5, pady=5)
+            if column == "Id":
+                # Пустое поле - Id назначит база данных при вставке
+                entry = tk.Entry(window, validate="key", validatecommand=(self.input_validation, '%P', '%V'))
+            elif column in ["Дата заезда", "Дата выезда"]:
+                entry = tk.Entry(window)
+            elif column == "Количество ночей" or column == "Общая стоимость":
+                continue
+            else:
+                entry = tk.Entry(window)
+            entry.grid(row=i, column=1, padx=5, pady=5)
+            labels.append(db_columns[i])  # Используем db_columns для записи в БД
+            entries.append(entry)
+
+        def insert_action():
+            data = {}
+            for i, label in enumerate(labels):
+                data[label] = entries[i].get()
+            table = self.current_table
+
+            def inserted(_):
+                self.show_table_data(table)
+                if window.winfo_exists():
+                    window.destroy()
+
+            self.run_in_background(None, lambda job: self.service.insert_record(table, data), on_done=inserted,
+                                   error_message="Не удалось вставить данные")
+
+        tk.Button(window, text="Вставить", command=insert_action).grid(row=len(labels), column=0, columnspan=2, padx=5,
+                                                                       pady=10)
+
+    def update_data_window(self):
+        """Окно для обновления данных"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Обновить данные в {self.get_translated_table_name(self.current_table)}")
+        display_columns, db_columns = self.get_table_columns(self.current_table)
+        labels, entries = [], []
+
+        tk.Label(window, text="ID записи:").grid(row=0, column=0, padx=5, pady=5)
+        id_entry = tk.Entry(window, validate="key", validatecommand=(self.input_validation, '%P', '%V'))
+        id_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        for i, column in enumerate(display_columns[1:]):
+            if column == "Общая стоимость" or column == "Количество ночей":
+                continue
+            tk.Label(window, text=column).grid(row=i + 1, column=0, padx=5, pady=5)
+            entry = tk.Entry(window)
+            entry.grid(row=i + 1, column=1, padx=5, pady=5)
+            labels.append(db_columns[i + 1])  # Используем db_columns для записи в БД
+            entries.append(entry)
+
+        def update_action():
+            record_id = id_entry.get()
+            data = {}
+            for i, label in enumerate(labels):
+                data[label] = entries[i].get()
+            table = self.current_table
+
+            def updated(_):
+                self.show_table_data(table)
+                if window.winfo_exists():
+                    window.destroy()
+
+            self.run_in_background(None, lambda job: self.service.update_record(table, record_id, data),
+                                   on_done=updated, error_message="Не удалось обновить данные")
+
+        tk.Button(window, text="Обновить", command=update_action).grid(row=len(labels) + 2, column=0, columnspan=2,
+                                                                       padx=5, pady=10)
+
+    def delete_data_window(self):
+        """Окно для удаления данных"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Удалить данные из {self.get_translated_table_name(self.current_table)}")
+        display_columns, db_columns = self.get_table_columns(self.current_table)
+
+        tk.Label(window, text="Выбрать столбец:").grid(row=0, column=0, padx=5, pady=5)
+        column_var = tk.StringVar(window)
+        column_var.set(display_columns[1])  # select second column by default
+        column_dropdown = ttk.Combobox(window, textvariable=column_var, values=display_columns)
+        column_dropdown.grid(row=0, column=1, padx=5, pady=5)
+
+        tk.Label(window, text="Значение:").grid(row=1, column=0, padx=5, pady=5)
+        condition_entry = tk.Entry(window)
+        condition_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        def delete_action():
+            selected_column_index = display_columns.index(column_var.get())
+            column = db_columns[selected_column_index]
+            value = condition_entry.get()
+            table = self.current_table
+
+            def preview_job(job):
+                return self.service.preview_delete(table, column, value)
+
+            def delete_job(job):
+                # Зависимые строки удаляются каскадом; отмена между таблицами откатывает всю транзакцию
+                return self.service.delete_records(table, column, value, on_progress=job.progress)
+
+            def deleted(plan):
+                self.show_table_data(table)
+                if window.winfo_exists():
+                    window.destroy()
+
+            def confirm(plan):
+                self._confirm_delete(plan, "Удаление данных", delete_job, deleted, "Не удалось удалить данные")
+
+            self.run_in_background(None, preview_job, on_done=confirm,
+                                   error_message="Не удалось подсчитать удаляемые записи")
+
+        tk.Button(window, text="Удалить", command=delete_action).grid(row=2, column=0, columnspan=2, padx=5, pady=10)
+
+    def search_data_window(self):
+        """Окно для поиска данных"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Поиск данных в {self.get_translated_table_name(self.current_table)}")
+        display_columns, db_columns = self.get_table_columns(self.current_table)
+
+        tk.Label(window, text="Искать по столбцу:").grid(row=0, column=0, padx=5, pady=5)
+        column_var = tk.StringVar(window)
+        column_var.set(display_columns[1])  # Выбираем второй столбец по умолчанию
+        column_dropdown = ttk.Combobox(window, textvariable=column_var, values=display_columns)
+        column_dropdown.grid(row=0, column=1, padx=5, pady=5)
+
+        tk.Label(window, text="Поисковый запрос:").grid(row=1, column=0, padx=5, pady=5)
+        search_entry = tk.Entry(window)
+        search_entry.grid(row=1, column=1, padx=5, pady=5)
+        include_archive = tk.BooleanVar(window, value=False)
+        tk.Checkbutton(window, text="Искать в архиве", variable=include_archive).grid(
+            row=2, column=0, columnspan=2, padx=5)
+
+        def search_action():
+            selected_column_index = display_columns.index(column_var.get())
+            column = db_columns[selected_column_index]
+            table = self.current_table
+            search_term = search_entry.get()
+            with_archive = include_archive.get()
+            if not self.reader.connect():
+                messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
+                return
+
+            def search_job(job):
+                started = time.perf_counter()
+                data = self.service.search(table, column, search_term, include_archive=with_archive)
+                return data, (time.perf_counter() - started) * 1000
+
+            def found(result):
+                data, elapsed_ms = result
+                if status_label.winfo_exists():
+                    status_label.config(text=f"Найдено записей: {len(data)} ({elapsed_ms:.1f} мс)")
+                self.search_results = data
+                self.show_data_in_tree(self._display_rows(table, data, db_columns), display_columns, self.root)
+
+            status_label.config(text="Поиск...")
+            self.run_in_background(None, search_job, on_done=found, error_message="Не удалось выполнить поиск")
+
+        tk.Button(window, text="Поиск", command=search_action).grid(row=3, column=0, columnspan=2, padx=5, pady=10)
+        status_label = tk.Label(window, text="")
+        status_label.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+
+    def availability_window(self):
+        """Окно поиска свободных номеров по отелю/городу, датам и числу гостей"""
+        window = tk.Toplevel(self.root)
+        window.title("Свободные номера")
+        fields = [("ID отеля", ""), ("Город", ""), ("Дата заезда", ""), ("Дата выезда", ""), ("Гостей", "1")]
+        entries = {}
+        for i, (label, default) in enumerate(fields):
+            tk.Label(window, text=label).grid(row=i, column=0, padx=5, pady=5)
+            entry = tk.Entry(window)
+            entry.insert(0, default)
+            entry.grid(row=i, column=1, padx=5, pady=5)
+            entries[label] = entry
+
+        status_label = tk.Label(window, text="")
+        status_label.grid(row=len(fields) + 1, column=0, columnspan=2)
+        result_frame = tk.Frame(window)
+        result_frame.grid(row=len(fields) + 2, column=0, columnspan=2, sticky="nsew")
+        window.grid_rowconfigure(len(fields) + 2, weight=1)
+        window.grid_columnconfigure(1, weight=1)
+        columns = ["ID номера", "Отель", "Город", "Тип номера", "Макс гостей", "Цена за ночь", "Стоимость"]
+
+        def search_action():
+            hotel_id = entries["ID отеля"].get().strip()
+            guests = entries["Гостей"].get().strip() or "1"
+            if not (re.match(r'^\d*$', hotel_id) and re.match(r'^\d+$', guests)):
+                messagebox.showerror("Ошибка", "ID отеля и число гостей должны быть числами", parent=window)
+                return
+            started = time.perf_counter()
+            try:
+                rows = BookingService(self.reader).availability(
+                    entries["Дата заезда"].get(), entries["Дата выезда"].get(), int(guests), hotel_id,
+                    entries["Город"].get().strip())
+            except BookingError as e:
+                messagebox.showerror("Ошибка", str(e), parent=window)
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            status_label.config(text=f"Свободно номеров: {len(rows)} ({elapsed_ms:.1f} мс)")
+            self.show_data_in_tree(rows, columns, result_frame)
+
+        tk.Button(window, text="Найти", command=search_action).grid(row=len(fields), column=0, columnspan=2,
+                                                                    padx=5, pady=10)
+
+    def analytics_window(self):
+        """Окно отчета: загрузка, ADR и RevPAR за период с сохранением в CSV"""
+        import analytics
+
+        window = tk.Toplevel(self.root)
+        window.title("Аналитика")
+        fields = [("Начало периода", ""), ("Конец периода", ""), ("ID отеля", "")]
+        entries = {}
+        for i, (label, default) in enumerate(fields):
+            tk.Label(window, text=label).grid(row=i, column=0, padx=5, pady=5)
+            entry = tk.Entry(window)
+            entry.insert(0, default)
+            entry.grid(row=i, column=1, padx=5, pady=5)
+            entries[label] = entry
+        groupings = {"По отелям": "hotel", "По типам номеров": "room_type", "По дням": "day"}
+        tk.Label(window, text="Группировка").grid(row=len(fields), column=0, padx=5, pady=5)
+        grouping = ttk.Combobox(window, values=list(groupings), state="readonly")
+        grouping.current(0)
+        grouping.grid(row=len(fields), column=1, padx=5, pady=5)
+
+        buttons = tk.Frame(window)
+        buttons.grid(row=len(fields) + 1, column=0, columnspan=2, pady=10)
+        status_label = tk.Label(window, text="")
+        status_label.grid(row=len(fields) + 2, column=0, columnspan=2)
+        result_frame = tk.Frame(window)
+        result_frame.grid(row=len(fields) + 3, column=0, columnspan=2, sticky="nsew")
+        window.grid_rowconfigure(len(fields) + 3, weight=1)
+        window.grid_columnconfigure(1, weight=1)
+        last_report = {}
+
+        def report_action():
+            hotel_id = entries["ID отеля"].get().strip()
+            if not re.match(r'^\d*$', hotel_id):
+                messagebox.showerror("Ошибка", "ID отеля должен быть числом", parent=window)
+                return
+            by = groupings[grouping.get()]
+            start, end = entries["Начало периода"].get(), entries["Конец периода"].get()
+            started = time.perf_counter()
+
+            def report_job(job):
+                return analytics.report(self.db, start, end, by, hotel_id or None)
+
+            def done(rows):
+                last_report.update(rows=rows, by=by)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                status_label.config(text=f"Строк: {len(rows)} ({elapsed_ms:.1f} мс)")
+                titles = [analytics.COLUMN_TITLES[column] for column in analytics.COLUMNS[by]]
+                self.show_data_in_tree(rows, titles, result_frame)
+
+            status_label.config(text="Расчет...")
+            self.run_in_background(None, report_job, on_done=done, error_message="Не удалось построить отчет")
+
+        def save_action():
+            if not last_report:
+                messagebox.showinfo("Информация", "Сначала постройте отчет", parent=window)
+                return
+            path = filedialog.asksaveasfilename(parent=window, defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")])
+            if not path:
+                return
+            try:
+                analytics.write_csv(last_report["rows"], last_report["by"], path)
+            except OSError as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить отчет: {e}", parent=window)
+
+        tk.Button(buttons, text="Показать", command=report_action).pack(side="left", padx=5)
+        tk.Button(buttons, text="Сохранить CSV", command=save_action).pack(side="left", padx=5)
+
+    def import_data(self):
+        """Массовая загрузка CSV/JSONL файлов в текущую таблицу"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+        paths = filedialog.askopenfilenames(filetypes=[("CSV / JSON Lines", "*.csv *.jsonl *.ndjson")])
+        if not paths:
+            return
+        from bulk_import import BulkImporter
+
+        table = self.current_table
+
+        def import_job(job):
+            # Прогресс - по прочитанным байтам всех файлов; отмена оставляет зафиксированные пачки
+            sizes = [os.path.getsize(path) for path in paths]
+            total = sum(sizes)
+            importer = BulkImporter(self.db)
+            reports = []
+            for i, path in enumerate(paths):
+                offset = sum(sizes[:i])
+                reports.append(importer.import_file(
+                    table, path, on_progress=lambda done, _, offset=offset: job.progress(offset + done, total)))
+            return reports
+
+        def imported(reports):
+            messagebox.showinfo("Импорт данных", "\n".join(str(report) for report in reports))
+            self.show_table_data(table)
+
+        self.run_in_background("Импорт данных", import_job, on_done=imported,
+                               error_message="Не удалось загрузить данные")
+
+    def export_data(self):
+        """Потоковая выгрузка текущей таблицы в CSV/JSONL/Parquet (с .gz - сжатие)"""
+        if not self.current_table:
+            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
+            return
+        path = filedialog.asksaveasfilename(
+            initialfile=f"{self.current_table}.csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet"),
+                       ("Сжатые gzip", "*.csv.gz *.jsonl.gz")])
+        if not path:
+            return
+        import export
+
+        table = self.current_table
+
+        def export_job(job):
+            return export.export_table(self.db, table, path, on_progress=job.progress)
+
+        self.run_in_background("Экспорт данных", export_job,
+                               on_done=lambda report: messagebox.showinfo("Экспорт данных", str(report)),
+                               error_message="Не удалось выгрузить данные")
+
+    def archive_window(self):
+        """Перенос бронирований с выездом раньше указанной даты в архив (archive.py)"""
+        if not self.reader.connect():
+            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
+            return
+        import archive
+
+        window = tk.Toplevel(self.root)
+        window.title("Архив бронирований")
+        summary_label = tk.Label(window, text="", justify="left")
+        summary_label.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        tk.Label(window, text="Выезд раньше").grid(row=1, column=0, padx=5, pady=5)
+        before_entry = tk.Entry(window)
+        year_ago = date.today() - timedelta(days=365)
+        before_entry.insert(0, year_ago.strftime(DATE_FORMAT))
+        before_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        def show_summary(info):
+            if not window.winfo_exists():
+                return
+            summary_label.config(text=(
+                f"В рабочих таблицах: {info['hot_bookings']} бронирований "
+                f"(самый ранний выезд: {to_display_date(info['oldest_hot_checkout']) or '-'})\n"
+                f"В архиве: {info['archived_bookings']} бронирований на сумму {info['archived_cost']:.2f}"))
+
+        def archive_action():
+            before = before_entry.get()
+            if not messagebox.askyesno("Подтверждение", f"Перенести в архив бронирования с выездом раньше {before}?",
+                                       parent=window):
+                return
+
+            def archive_job(job):
+                return archive.archive_bookings(self.db, before, on_progress=job.progress)
+
+            def archived(report):
+                messagebox.showinfo("Архив бронирований", f"В архив перенесено: {report}")
+                load_summary()
+                if self.current_table:
+                    self.show_table_data(self.current_table)
+
+            self.run_in_background("Архивирование", archive_job, on_done=archived,
+                                   error_message="Не удалось перенести бронирования в архив")
+
+        tk.Button(window, text="Перенести в архив", command=archive_action).grid(
+            row=2, column=0, columnspan=2, padx=5, pady=10)
+
+        def load_summary():
+            self.run_in_background(None, lambda job: archive.summary(self.db), on_done=show_summary,
+                                   error_message="Не удалось прочитать сведения об архиве")
+
+        load_summary()
+
+    def reset_search(self):
+        if self.reset_button:
+            self.reset_button.destroy()
+            self.reset_button = None
+        self.search_results = None
+        if self.current_table:
+            self.show_table_data(self.current_table)
+
+    def clear_all_tables(self):
+        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите очистить все таблицы?"):
+            # Зависимые таблицы раньше родительских: иначе сработает RESTRICT у BookedRooms.RoomId
+            tables = ["BookedRooms", "Bookings", "Rooms", "Hotels"]
+
+            def clear_job(job):
+                with self.db.transaction():
+                    for i, table in enumerate(tables):
+                        job.progress(i, len(tables))
+                        self.db.clear_table(table)
+
+            def cleared(_):
+                messagebox.showinfo("Успех", "Все таблицы очищены")
+                if self.current_table:
+                    self.show_table_data(self.current_table)
+
+            self.run_in_background("Очистка таблиц", clear_job, on_done=cleared,
+                                   error_message="Не удалось очистить таблицы")
+
+
+def main():
+    root = tk.Tk()
+    HotelBookingApp(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
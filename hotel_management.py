@@ -1,952 +1,1311 @@
-import sqlite3
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import os
-import time
-import re
-from datetime import datetime, timedelta
-import psycopg2
-from psycopg2 import sql
-
-try:
-    # Настройки подключения
-    connection = psycopg2.connect(
-        dbname='hotel_management',
-        user='platonys',
-        password='221205',
-        host='localhost',
-        port='5432'
-    )
-
-except Exception as e:
-    print(f"Ошибка подключения: {e}")
-
-
-class Database:
-    def __init__(self, db_name=None):
-        self.db_name = db_name
-        self.conn = None
-        self.cursor = None
-
-    def set_db_name(self, db_name):
-        self.db_name = db_name
-
-    def connect(self):
-        if not self.db_name:
-            return False
-        try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.cursor = self.conn.cursor()
-            return True
-        except sqlite3.Error as e:
-            print(f"Error connecting to database: {e}")
-            return False
-
-    def disconnect(self):
-        if self.conn:
-            try:
-                self.conn.commit()  # commit before close
-                os.sync()  # принудительная запись данных на диск
-            except:
-                pass
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
-
-    def _execute_sql(self, sql, params=None):
-        """Выполнение SQL запроса с обработкой исключений."""
-        try:
-            if params:
-                self.cursor.execute(sql, params)
-            else:
-                self.cursor.execute(sql)
-            self.conn.commit()
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            print(f"SQL Execution Error: {e}")
-            self.conn.rollback()  # откат изменений в случае ошибки
-            return None
-
-    def create_tables(self):
-        """Создает таблицы базы данных"""
-        queries = [
-            """
-            CREATE TABLE IF NOT EXISTS Hotels (
-                Id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Name TEXT NOT NULL,
-                City TEXT NOT NULL,
-                Address TEXT NOT NULL,
-                Rating REAL
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Rooms (
-                Id INTEGER PRIMARY KEY AUTOINCREMENT,
-                HotelId INTEGER NOT NULL,
-                RoomType TEXT NOT NULL,
-                PricePerNight REAL NOT NULL,
-                MaxGuests INTEGER NOT NULL,
-                FOREIGN KEY (HotelId) REFERENCES Hotels(Id)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Bookings (
-                Id INTEGER PRIMARY KEY AUTOINCREMENT,
-                HotelId INTEGER NOT NULL,
-                GuestName TEXT NOT NULL,
-                CheckInDate TEXT NOT NULL,
-                CheckOutDate TEXT NOT NULL,
-                TotalCost REAL DEFAULT 0,
-                FOREIGN KEY (HotelId) REFERENCES Hotels(Id)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS BookedRooms (
-                Id INTEGER PRIMARY KEY AUTOINCREMENT,
-                BookingId INTEGER NOT NULL,
-                RoomId INTEGER NOT NULL,
-                NumberOfNights INTEGER NOT NULL,
-                FOREIGN KEY (BookingId) REFERENCES Bookings(Id),
-                FOREIGN KEY (RoomId) REFERENCES Rooms(Id)
-            )
-            """
-        ]
-        for query in queries:
-            self._execute_sql(query)
-
-    def create_trigger(self):
-        """Создает триггер для автоматического подсчета общей стоимости бронирования"""
-        # Триггер для BookedRooms при вставке
-        query = """
-            CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnInsert
-            AFTER INSERT ON BookedRooms
-            BEGIN
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId = NEW.BookingId
-                )
-                WHERE Id = NEW.BookingId;
-            END;
-        """
-        self._execute_sql(query)
-
-        # Триггер для BookedRooms при обновлении
-        query_update = """
-           CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnUpdate
-            AFTER UPDATE ON BookedRooms
-            BEGIN
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId = NEW.BookingId
-                )
-                WHERE Id = NEW.BookingId;
-            END;
-        """
-        self._execute_sql(query_update)
-
-        # Триггер для BookedRooms при удалении
-        query_delete = """
-           CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnDelete
-            AFTER DELETE ON BookedRooms
-            BEGIN
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId = OLD.BookingId
-                )
-                WHERE Id = OLD.BookingId;
-            END;
-        """
-        self._execute_sql(query_delete)
-        # Триггер для Rooms при обновлении
-        query_rooms_update = """
-            CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnRoomsUpdate
-            AFTER UPDATE ON Rooms
-            BEGIN
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId IN (SELECT BookingId FROM BookedRooms WHERE RoomId = NEW.Id)
-                )
-                WHERE Id IN (SELECT BookingId FROM BookedRooms WHERE RoomId = NEW.Id);
-            END;
-        """
-        self._execute_sql(query_rooms_update)
-
-        # Триггер для Rooms при удалении
-        query_rooms_delete = """
-            CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnRoomsDelete
-             AFTER DELETE ON Rooms
-             BEGIN
-                 UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId IN (SELECT BookingId FROM BookedRooms WHERE RoomId = OLD.Id)
-                )
-                WHERE Id IN (SELECT BookingId FROM BookedRooms WHERE RoomId = OLD.Id);
-             END;
-        """
-        self._execute_sql(query_rooms_delete)
-
-        # Триггер для Bookings при обновлении
-        query_bookings_update = """
-            CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnBookingsUpdate
-            AFTER UPDATE ON Bookings
-            BEGIN
-               SELECT HotelBookingApp._recalculate_number_of_nights(NEW.Id);
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId = NEW.Id
-                )
-                WHERE Id = NEW.Id;
-            END;
-        """
-        self._execute_sql(query_bookings_update)
-
-        # Триггер для Bookings при удалении
-        query_bookings_delete = """
-            CREATE TRIGGER IF NOT EXISTS CalculateBookingCostOnBookingsDelete
-            AFTER DELETE ON Bookings
-            BEGIN
-                UPDATE Bookings
-                SET TotalCost = (
-                    SELECT SUM(r.PricePerNight * br.NumberOfNights)
-                    FROM Rooms r
-                    JOIN BookedRooms br ON r.Id = br.RoomId
-                    WHERE br.BookingId = OLD.Id
-                )
-                WHERE Id = OLD.Id;
-            END;
-        """
-        self._execute_sql(query_bookings_delete)
-
-    def _create_index(self, table, column):
-        """Создает индекс для указанной колонки в таблице"""
-        index_name = f"idx_{table}_{column}"
-        sql = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({column})"
-        self._execute_sql(sql)
-
-    def create_indexes(self):
-        self._create_index("Hotels", "Name")
-        self._create_index("Rooms", "RoomType")
-        self._create_index("Bookings", "GuestName")
-
-    def clear_table(self, table, condition=None):
-        """Очищает данные в таблице с условием или без"""
-        sql = f"DELETE FROM {table}"
-        if condition:
-            sql += f" WHERE {condition}"
-        self._execute_sql(sql)
-
-    def insert_data(self, table, data):
-        """Вставляет данные в таблицу"""
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join(["?" for _ in data])
-        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-        self._execute_sql(sql, tuple(data.values()))
-
-    def update_data(self, table, data, condition):
-        """Обновляет данные в таблице по условию"""
-        set_clause = ", ".join([f"{key}=?" for key in data.keys()])
-        sql = f"UPDATE {table} SET {set_clause} WHERE {condition}"
-        self._execute_sql(sql, tuple(data.values()))
-
-    def delete_data(self, table, condition):
-        """Удаляет данные из таблицы по условию"""
-        sql = f"DELETE FROM {table} WHERE {condition}"
-        self._execute_sql(sql)
-
-    def select_data(self, table, columns="*", condition=None):
-        """Получает данные из таблицы"""
-        sql = f"SELECT {columns} FROM {table}"
-        if condition:
-            sql += f" WHERE {condition}"
-        return self._execute_sql(sql)
-
-    def search_data(self, table, column, search_term):
-        """Поиск данных по текстовому неключевому полю"""
-        sql = f"SELECT * FROM {table} WHERE {column} LIKE ?"
-        return self._execute_sql(sql, (f"%{search_term}%",))
-
-
-class HotelBookingApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Приложение для бронирования отелей")
-        self.root.geometry("1000x600")  # Увеличиваем размер окна
-        self.db = Database()
-        self.current_table = None
-        self.is_db_open = False  # Флаг для отслеживания открыта ли база
-        self.original_data = None
-        self.search_results = None
-        self.create_menu()
-        self.disable_all_actions()  # изначально все кроме создать/открыть заблокировано
-        self.input_validation = self.root.register(self.validate_input)
-        self.reset_button = None
-        self.table_label = tk.Label(self.root, text="", font=('Helvetica', 12, 'bold'))
-        self.table_label.pack(pady=5)
-        self.reset_button_frame = tk.Frame(self.root)  # Frame для кнопки сброса
-        self.reset_button_frame.pack(pady=5)
-
-    def create_menu(self):
-        menu_bar = tk.Menu(self.root)
-        self.root.config(menu=menu_bar)
-
-        db_menu = tk.Menu(menu_bar, tearoff=0)
-        db_menu.add_command(label="Создать базу данных", command=self.create_database)
-        db_menu.add_command(label="Открыть базу данных", command=self.open_database)
-        db_menu.add_command(label="Удалить базу данных", command=self.delete_database)
-        menu_bar.add_cascade(label="База данных", menu=db_menu)
-
-        self.table_menu = tk.Menu(menu_bar, tearoff=0)
-        self.table_menu.add_command(label="Отели", command=lambda: self.show_table_data("Hotels"))
-        self.table_menu.add_command(label="Номера", command=lambda: self.show_table_data("Rooms"))
-        self.table_menu.add_command(label="Бронирования", command=lambda: self.show_table_data("Bookings"))
-        self.table_menu.add_command(label="Забронированные номера", command=lambda: self.show_table_data("BookedRooms"))
-        menu_bar.add_cascade(label="Таблицы", menu=self.table_menu)
-
-        self.operations_menu = tk.Menu(menu_bar, tearoff=0)
-        self.operations_menu.add_command(label="Показать все данные", command=self.show_all_data)
-        self.operations_menu.add_command(label="Очистить таблицу", command=self.clear_table_data)
-        self.operations_menu.add_command(label="Вставить данные", command=self.insert_data_window)
-        self.operations_menu.add_command(label="Обновить данные", command=self.update_data_window)
-        self.operations_menu.add_command(label="Удалить данные", command=self.delete_data_window)
-        self.operations_menu.add_command(label="Поиск данных", command=self.search_data_window)
-        self.operations_menu.add_command(label="Очистить все таблицы", command=self.clear_all_tables)
-        menu_bar.add_cascade(label="Операции", menu=self.operations_menu)
-
-    def enable_all_actions(self):
-        """Включает все действия кроме создания и открытия БД."""
-        self.is_db_open = True
-        self.table_menu.entryconfig("Отели", state="normal")
-        self.table_menu.entryconfig("Номера", state="normal")
-        self.table_menu.entryconfig("Бронирования", state="normal")
-        self.table_menu.entryconfig("Забронированные номера", state="normal")
-
-        self.operations_menu.entryconfig("Показать все данные", state="normal")
-        self.operations_menu.entryconfig("Очистить таблицу", state="normal")
-        self.operations_menu.entryconfig("Вставить данные", state="normal")
-        self.operations_menu.entryconfig("Обновить данные", state="normal")
-        self.operations_menu.entryconfig("Удалить данные", state="normal")
-        self.operations_menu.entryconfig("Поиск данных", state="normal")
-        self.operations_menu.entryconfig("Очистить все таблицы", state="normal")
-
-    def disable_all_actions(self):
-        """Отключает все действия, кроме создания и открытия БД."""
-        self.is_db_open = False
-        self.table_menu.entryconfig("Отели", state="disabled")
-        self.table_menu.entryconfig("Номера", state="disabled")
-        self.table_menu.entryconfig("Бронирования", state="disabled")
-        self.table_menu.entryconfig("Забронированные номера", state="disabled")
-
-        self.operations_menu.entryconfig("Показать все данные", state="disabled")
-        self.operations_menu.entryconfig("Очистить таблицу", state="disabled")
-        self.operations_menu.entryconfig("Вставить данные", state="disabled")
-        self.operations_menu.entryconfig("Обновить данные", state="disabled")
-        self.operations_menu.entryconfig("Удалить данные", state="disabled")
-        self.operations_menu.entryconfig("Поиск данных", state="disabled")
-        self.operations_menu.entryconfig("Очистить все таблицы", state="disabled")
-
-    def create_database(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
-        if file_path:
-            self.db.set_db_name(file_path)
-            if self.db.connect():
-                self.db.create_tables()
-                self.db.create_trigger()
-                self.db.create_indexes()
-                self.db.disconnect()
-                self.enable_all_actions()
-                messagebox.showinfo("Успех", "База данных создана успешно!")
-                self.show_table_data("Hotels")  # Открыть таблицу отели
-            else:
-                messagebox.showerror("Ошибка", "Не удалось создать базу данных!")
-
-    def open_database(self):
-        file_path = filedialog.askopenfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
-        if file_path:
-            if self.db.conn:
-                self.db.disconnect()
-            self.db.set_db_name(file_path)
-            if self.db.connect():
-                self.enable_all_actions()
-                messagebox.showinfo("Успех", "База данных открыта успешно!")
-                self.show_table_data("Hotels")
-            else:
-                messagebox.showerror("Ошибка", "Не удалось открыть базу данных!")
-
-    def delete_database(self):
-        file_path = filedialog.askopenfilename(defaultextension=".db", filetypes=[("Database files", "*.db")])
-        if file_path:
-            if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить выбранную базу данных?"):
-                try:
-
-                    db_to_delete = Database(file_path)
-                    if db_to_delete.connect():
-                        for _ in range(3):  # несколько попыток закрытия
-                            db_to_delete.disconnect()
-                            time.sleep(0.1)
-                            if not db_to_delete.conn:
-                                break
-
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        if self.db.db_name == file_path:
-                            self.disable_all_actions()
-                            self.clear_treeview()
-                            self.db.set_db_name(None)
-                        messagebox.showinfo("Успех", "База данных удалена успешно!")
-
-                    else:
-                        messagebox.showinfo("Информация", "База данных не найдена.")
-
-                except FileNotFoundError:
-                    messagebox.showerror("Ошибка", "Файл базы данных не найден!")
-                except Exception as e:
-                    messagebox.showerror("Ошибка", f"Не удалось удалить базу данных: {e}")
-
-    def show_table_data(self, table):
-        self.current_table = table
-        if self.db.connect():
-            data = self.db.select_data(table)
-            display_columns, db_columns = self.get_table_columns(table)
-            self.original_data = data
-            self.table_label.config(text=self.get_translated_table_name(table))
-            self.show_data_in_tree(data, display_columns, self.root)  # передаю root
-            self.db.disconnect()
-        else:
-            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-    def _recalculate_number_of_nights(self, booking_id):
-        """Пересчитывает количество ночей и обновляет записи в BookedRooms"""
-        if self.db.connect():
-            sql = f"SELECT CheckInDate, CheckOutDate FROM Bookings WHERE Id = ?"
-            result = self.db._execute_sql(sql, (booking_id,))
-            if result and result[0]:
-                check_in_date_str, check_out_date_str = result[0]
-                check_in = datetime.strptime(check_in_date_str, '%d.%m.%Y')
-                check_out = datetime.strptime(check_out_date_str, '%d.%m.%Y')
-                number_of_nights = (check_out - check_in).days
-                update_sql = f"UPDATE BookedRooms SET NumberOfNights = ? WHERE BookingId = ?"
-                self.db._execute_sql(update_sql, (number_of_nights, booking_id))
-
-            else:
-                messagebox.showerror("Ошибка", "Не удалось получить даты бронирования.")
-                return False
-        else:
-            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных.")
-            return False
-        return True
-
-    def get_translated_table_name(self, table):
-        translations = {
-            "Hotels": "Отели",
-            "Rooms": "Номера",
-            "Bookings": "Бронирования",
-            "BookedRooms": "Забронированные номера"
-        }
-        return translations.get(table, table)
-
-    def show_all_data(self):
-        if self.db.connect():
-            data = {}
-            for table in ["Hotels", "Rooms", "Bookings", "BookedRooms"]:
-                data[table] = self.db.select_data(table)
-            self.db.disconnect()
-            self.show_all_data_in_tabs(data)
-        else:
-            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-    def get_table_columns(self, table):
-        if self.db.connect():
-            self.db.cursor.execute(f"PRAGMA table_info({table})")
-            columns = [column[1] for column in self.db.cursor.fetchall()]
-            self.db.disconnect()
-
-            translations = {
-                "Name": "Название",
-                "City": "Город",
-                "Address": "Адрес",
-                "Rating": "Рейтинг",
-                "HotelId": "ID отеля",
-                "RoomType": "Тип номера",
-                "PricePerNight": "Цена за ночь",
-                "MaxGuests": "Макс гостей",
-                "GuestName": "Имя гостя",
-                "CheckInDate": "Дата заезда",
-                "CheckOutDate": "Дата выезда",
-                "TotalCost": "Общая стоимость",
-                "NumberOfNights": "Количество ночей",
-                "BookingId": "ID бронирования",
-                "RoomId": "ID номера"
-
-            }
-
-            display_columns = [translations.get(col, col) for col in columns]  # перевод, если есть, иначе как есть
-            display_columns = [col.replace('_', ' ') for col in display_columns]
-            return display_columns, columns  # возвращаем кортеж: отображаемые и реальные имена столбцов
-        else:
-            return [], []
-
-    def clear_table_data(self):
-        if not self.current_table:
-            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
-            return
-        if self.db.connect():
-            if messagebox.askyesno("Подтверждение",
-                                   f"Вы уверены, что хотите очистить таблицу {self.get_translated_table_name(self.current_table)}?"):
-                self.db.clear_table(self.current_table)
-                self.show_table_data(self.current_table)
-            self.db.disconnect()
-        else:
-            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-    def show_all_data_in_tabs(self, data):
-        """Отображает все данные из всех таблиц в разных вкладках"""
-        if data is None:
-            messagebox.showerror("Ошибка", "Нет данных для отображения")
-            return
-
-        window = tk.Toplevel(self.root)
-        window.title("Все данные")
-        tabControl = ttk.Notebook(window)
-        tabControl.pack(expand=1, fill="both")
-
-        translations = {
-            "Hotels": "Отели",
-            "Rooms": "Номера",
-            "Bookings": "Бронирования",
-            "BookedRooms": "Забронированные номера"
-        }
-
-        for table, rows in data.items():
-            frame = ttk.Frame(tabControl)
-            tabControl.add(frame, text=translations.get(table, table))
-            display_columns, _ = self.get_table_columns(table)
-            self.show_data_in_tree(rows, display_columns, frame)
-
-    def show_data_in_tree(self, data, columns, parent=None, table_name=None):
-        """Отображает данные в виджете Treeview"""
-        if parent is None:
-            parent = self.root
-            for child in parent.winfo_children():
-                if isinstance(child, ttk.Treeview):
-                    child.destroy()
-        else:
-            for child in parent.winfo_children():
-                if isinstance(child, ttk.Treeview):
-                    child.destroy()
-
-        tree = ttk.Treeview(parent, columns=columns, show='headings')
-        for column in columns:
-            tree.heading(column, text=column)
-
-        for row in data:
-            tree.insert('', 'end', values=row)
-
-        tree.pack(expand=1, fill="both")
-
-        if self.search_results and parent == self.root:
-            if not self.reset_button:
-                self.reset_button = tk.Button(self.reset_button_frame, text="Сбросить поиск", command=self.reset_search)
-                self.reset_button.pack(pady=5)
-
-        return tree
-
-    def clear_treeview(self):
-        """Очищает все виджеты treeview"""
-        for child in self.root.winfo_children():
-            if isinstance(child, ttk.Treeview):
-                child.destroy()
-
-    def validate_input(self, new_value, reason):
-        """Проверяет, что в поле ввода только цифры"""
-        if reason == 'focusin' or reason == 'focusout' or new_value == "":
-            return True  # Разрешаем фокус и пустое поле
-        return re.match(r'^\d*$', new_value) is not None
-
-    def validate_date(self, date_text):
-        try:
-            datetime.strptime(date_text, '%d.%m.%Y')
-            return True
-        except ValueError:
-            return False
-
-    def insert_data_window(self):
-        """Окно для вставки данных"""
-        if not self.current_table:
-            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
-            return
-
-        window = tk.Toplevel(self.root)
-        window.title(f"Вставить данные в {self.get_translated_table_name(self.current_table)}")
-        display_columns, db_columns = self.get_table_columns(self.current_table)
-        labels, entries = [], []
-
-        # get next id
-        next_id = self._get_next_id(self.current_table)
-
-        for i, column in enumerate(display_columns):
-            if column == "Общая стоимость" or column == "Количество ночей":
-                continue
-            tk.Label(window, text=column).grid(row=i, column=0, padx=5, pady=5)
-            if column == "Id":
-                entry = tk.Entry(window, validate="key", validatecommand=(self.input_validation, '%P', '%V'))
-                entry.insert(0, next_id)  # fill with next id
-            elif column in ["Дата заезда", "Дата выезда"]:
-                entry = tk.Entry(window)
-            elif column == "Количество ночей" or column == "Общая стоимость":
-                continue
-            else:
-                entry = tk.Entry(window)
-            entry.grid(row=i, column=1, padx=5, pady=5)
-            labels.append(db_columns[i])  # Используем db_columns для записи в БД
-            entries.append(entry)
-
-        def insert_action():
-            data = {}
-            for i, label in enumerate(labels):
-                data[label] = entries[i].get()
-
-            if self.current_table == "Bookings":
-                check_in_date = data.get("CheckInDate")
-                check_out_date = data.get("CheckOutDate")
-                if not (check_in_date and check_out_date):
-                    messagebox.showerror("Ошибка", "Необходимо ввести дату заезда и выезда.")
-                    return
-                if not (self.validate_date(check_in_date) and self.validate_date(check_out_date)):
-                    messagebox.showerror("Ошибка", "Неверный формат даты")
-                    return
-
-                check_in = datetime.strptime(check_in_date, '%d.%m.%Y')
-                check_out = datetime.strptime(check_out_date, '%d.%m.%Y')
-                if check_out <= check_in:
-                    messagebox.showerror("Ошибка", "Дата выезда должна быть больше даты заезда хотя бы на 1 день.")
-                    return
-                data["TotalCost"] = 0  # Default total cost for Bookings
-
-            elif self.current_table == "BookedRooms":
-                if not self._check_foreign_keys(self.current_table, data):
-                    return
-                booking_id = data.get("BookingId")
-                if self.db.connect():
-                    sql = f"SELECT CheckInDate, CheckOutDate FROM Bookings WHERE Id = ?"
-                    result = self.db._execute_sql(sql, (booking_id,))
-                    self.db.disconnect()
-                    if result and result[0]:
-                        check_in_date_str, check_out_date_str = result[0]
-                        check_in = datetime.strptime(check_in_date_str, '%d.%m.%Y')
-                        check_out = datetime.strptime(check_out_date_str, '%d.%m.%Y')
-                        number_of_nights = (check_out - check_in).days
-                        data["NumberOfNights"] = number_of_nights
-
-                    else:
-                        messagebox.showerror("Ошибка", "Не удалось получить даты бронирования.")
-                        return
-            if not self._check_foreign_keys(self.current_table, data):
-                return  # Exit if foreign key check fails
-
-            if not self._check_id_not_exists(self.current_table, data.get("Id")):
-                return  # Exit if ID exists
-
-            if self.db.connect():
-                self.db.insert_data(self.current_table, data)
-
-                if self.current_table == "Bookings":
-                    if self._recalculate_number_of_nights(data.get("Id")):
-                        self.db.disconnect()
-                    else:
-                        self.db.disconnect()
-                        return
-
-                self.db.disconnect()
-
-                self.show_table_data(self.current_table)
-                window.destroy()
-            else:
-                messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-        tk.Button(window, text="Вставить", command=insert_action).grid(row=len(labels), column=0, columnspan=2, padx=5,
-                                                                       pady=10)
-
-    def _check_id_not_exists(self, table, record_id):
-        if not record_id:
-            return True
-        if self.db.connect():
-            sql = f"SELECT COUNT(*) FROM {table} WHERE Id=?"
-            result = self.db._execute_sql(sql, (record_id,))
-            self.db.disconnect()
-            if result and result[0][0] > 0:
-                messagebox.showerror("Ошибка", "Введённый ID уже занят")
-                return False
-        return True
-
-    def _check_foreign_keys(self, table, data):
-        if table == "Rooms":
-            if not self._check_id_exists("Hotels", data.get("HotelId")):
-                messagebox.showerror("Ошибка", "Введённый ID отеля не существует")
-                return False
-        elif table == "Bookings":
-            if not self._check_id_exists("Hotels", data.get("HotelId")):
-                messagebox.showerror("Ошибка", "Введённый ID отеля не существует")
-                return False
-        elif table == "BookedRooms":
-            if not self._check_id_exists("Bookings", data.get("BookingId")):
-                messagebox.showerror("Ошибка", "Введённый ID бронирования не существует")
-                return False
-            if not self._check_id_exists("Rooms", data.get("RoomId")):
-                messagebox.showerror("Ошибка", "Введённый ID номера не существует")
-                return False
-
-        return True
-
-    def _check_id_exists(self, table, record_id):
-        if not record_id:
-            return True
-        if self.db.connect():
-            sql = f"SELECT COUNT(*) FROM {table} WHERE Id=?"
-            result = self.db._execute_sql(sql, (record_id,))
-            self.db.disconnect()
-            if result and result[0][0] > 0:
-                return True
-        return False
-
-    def _get_next_id(self, table):
-        if self.db.connect():
-            sql = f"SELECT MAX(Id) FROM {table}"
-            result = self.db._execute_sql(sql)
-            self.db.disconnect()
-            if result and result[0][0] is not None:
-                return result[0][0] + 1
-            else:
-                return 1
-        return 1
-
-    def update_data_window(self):
-        """Окно для обновления данных"""
-        if not self.current_table:
-            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
-            return
-
-        window = tk.Toplevel(self.root)
-        window.title(f"Обновить данные в {self.get_translated_table_name(self.current_table)}")
-        display_columns, db_columns = self.get_table_columns(self.current_table)
-        labels, entries = [], []
-
-        tk.Label(window, text="ID записи:").grid(row=0, column=0, padx=5, pady=5)
-        id_entry = tk.Entry(window, validate="key", validatecommand=(self.input_validation, '%P', '%V'))
-        id_entry.grid(row=0, column=1, padx=5, pady=5)
-
-        for i, column in enumerate(display_columns[1:]):
-            if column == "Общая стоимость" or column == "Количество ночей":
-                continue
-            tk.Label(window, text=column).grid(row=i + 1, column=0, padx=5, pady=5)
-            entry = tk.Entry(window)
-            entry.grid(row=i + 1, column=1, padx=5, pady=5)
-            labels.append(db_columns[i + 1])  # Используем db_columns для записи в БД
-            entries.append(entry)
-
-        def update_action():
-            record_id = id_entry.get()
-            data = {}
-            for i, label in enumerate(labels):
-                data[label] = entries[i].get()
-
-            if not self._check_id_exists(self.current_table, record_id):
-                messagebox.showerror("Ошибка", "Введённый ID не существует")
-                return
-
-            if self.current_table == "Bookings":
-                check_in_date = data.get("CheckInDate")
-                check_out_date = data.get("CheckOutDate")
-
-                if check_in_date and check_out_date:
-                    if not (self.validate_date(check_in_date) and self.validate_date(check_out_date)):
-                        messagebox.showerror("Ошибка", "Неверный формат даты")
-                        return
-
-                    check_in = datetime.strptime(check_in_date, '%d.%m.%Y')
-                    check_out = datetime.strptime(check_out_date, '%d.%m.%Y')
-                    if check_out <= check_in:
-                        messagebox.showerror("Ошибка", "Дата выезда должна быть больше даты заезда хотя бы на 1 день.")
-                        return
-
-                    if self.db.connect():
-                        condition = f"Id={record_id}"
-                        self.db.update_data(self.current_table, data, condition)
-
-                        if self._recalculate_number_of_nights(record_id):
-                            self.db.disconnect()
-                        else:
-                            self.db.disconnect()
-                            return
-                        self.db.disconnect()
-
-                    else:
-                        messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-                        return
-                else:
-                    if self.db.connect():
-                        condition = f"Id={record_id}"
-                        self.db.update_data(self.current_table, data, condition)
-                        self.db.disconnect()
-
-                    else:
-                        messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-                        return
-
-            elif self.current_table == "BookedRooms":
-                if self.db.connect():
-                    condition = f"Id={record_id}"
-                    self.db.update_data(self.current_table, data, condition)
-                    self.db.disconnect()
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-                    return
-
-
-            else:
-                if self.db.connect():
-                    condition = f"Id={record_id}"
-                    self.db.update_data(self.current_table, data, condition)
-                    self.db.disconnect()
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-                    return
-
-            self.show_table_data(self.current_table)
-            window.destroy()
-
-        tk.Button(window, text="Обновить", command=update_action).grid(row=len(labels) + 2, column=0, columnspan=2,
-                                                                       padx=5, pady=10)
-
-    def delete_data_window(self):
-        """Окно для удаления данных"""
-        if not self.current_table:
-            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
-            return
-        window = tk.Toplevel(self.root)
-        window.title(f"Удалить данные из {self.get_translated_table_name(self.current_table)}")
-        display_columns, db_columns = self.get_table_columns(self.current_table)
-
-        tk.Label(window, text="Выбрать столбец:").grid(row=0, column=0, padx=5, pady=5)
-        column_var = tk.StringVar(window)
-        column_var.set(display_columns[1])  # select second column by default
-        column_dropdown = ttk.Combobox(window, textvariable=column_var, values=display_columns)
-        column_dropdown.grid(row=0, column=1, padx=5, pady=5)
-
-        tk.Label(window, text="Значение:").grid(row=1, column=0, padx=5, pady=5)
-        condition_entry = tk.Entry(window)
-        condition_entry.grid(row=1, column=1, padx=5, pady=5)
-
-        def delete_action():
-            selected_column_index = display_columns.index(column_var.get())
-            column = db_columns[selected_column_index]
-            condition = f"{column} = '{condition_entry.get()}'"
-            if self.db.connect():
-                if messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить записи?"):
-                    booking_ids = []
-                    if self.current_table == "Bookings":
-                        sql = f"SELECT Id from Bookings where {condition}"
-                        result = self.db._execute_sql(sql)
-                        if result:
-                            booking_ids = [row[0] for row in result]
-                    elif self.current_table == "BookedRooms":
-                        sql = f"SELECT BookingId from BookedRooms where {condition}"
-                        result = self.db._execute_sql(sql)
-                        if result:
-                            booking_ids = [row[0] for row in result]
-                    elif self.current_table == "Rooms":
-                        sql = f"SELECT br.BookingId FROM BookedRooms br JOIN Rooms r ON br.RoomId = r.Id where {condition}"
-                        result = self.db._execute_sql(sql)
-                        if result:
-                            booking_ids = [row[0] for row in result]
-
-                    self.db.delete_data(self.current_table, condition)
-                    if booking_ids:
-                        for booking_id in booking_ids:
-                            if self._recalculate_number_of_nights(booking_id):
-                                continue
-                            else:
-                                self.db.disconnect()
-                                return
-                    self.show_table_data(self.current_table)
-                    self.db.disconnect()
-                    window.destroy()
-            else:
-                messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-        tk.Button(window, text="Удалить", command=delete_action).grid(row=2, column=0, columnspan=2, padx=5, pady=10)
-
-    def search_data_window(self):
-        """Окно для поиска данных"""
-        if not self.current_table:
-            messagebox.showinfo("Информация", "Пожалуйста, сначала выберите таблицу.")
-            return
-        window = tk.Toplevel(self.root)
-        window.title(f"Поиск данных в {self.get_translated_table_name(self.current_table)}")
-        display_columns, db_columns = self.get_table_columns(self.current_table)
-
-        tk.Label(window, text="Искать по столбцу:").grid(row=0, column=0, padx=5, pady=5)
-        column_var = tk.StringVar(window)
-        column_var.set(display_columns[1])  # Выбираем второй столбец по умолчанию
-        column_dropdown = ttk.Combobox(window, textvariable=column_var, values=display_columns)
-        column_dropdown.grid(row=0, column=1, padx=5, pady=5)
-
-        tk.Label(window, text="Поисковый запрос:").grid(row=1, column=0, padx=5, pady=5)
-        search_entry = tk.Entry(window)
-        search_entry.grid(row=1, column=1, padx=5, pady=5)
-
-        def search_action():
-            selected_column_index = display_columns.index(column_var.get())
-            column = db_columns[selected_column_index]
-            search_term = search_entry.get()
-            if self.db.connect():
-                data = self.db.search_data(self.current_table, column, search_term)
-                self.search_results = data
-                self.show_data_in_tree(data, display_columns, self.root)
-                self.db.disconnect()
-            else:
-                messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-        tk.Button(window, text="Поиск", command=search_action).grid(row=2, column=0, columnspan=2, padx=5, pady=10)
-
-    def reset_search(self):
-        if self.original_data:
-            if self.reset_button:
-                self.reset_button.destroy()
-                self.reset_button = None
-            self.search_results = None
-            display_columns, _ = self.get_table_columns(self.current_table)
-            sorted_data = sorted(self.original_data, key=lambda row: row[0])  # Сортируем по id
-            self.show_data_in_tree(sorted_data, display_columns, self.root)
-
-    def clear_all_tables(self):
-        if self.db.connect():
-            if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите очистить все таблицы?"):
-                for table in ["Hotels", "Rooms", "Bookings", "BookedRooms"]:
-                    self.db.clear_table(table)
-                messagebox.showinfo("Успех", "Все таблицы очищены")
-            self.db.disconnect()
-        else:
-            messagebox.showerror("Ошибка", "Не удалось подключиться к базе данных!")
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = HotelBookingApp(root)
-    root.mainloop()
\ No newline at end of file
+import sqlite3
+import random
+import time
+import re
+import json
+import os
+import threading
+import archive
+from backends import SQLiteBackend
+from cascade import DeleteRestricted, drop_materialized, execute_delete, materialize, plan_delete
+from instrumentation import Instrumentation
+from query_builder import StatementCache, identifier, normalize, params, shape, where
+from schema_catalog import SchemaCatalog
+from contextlib import contextmanager
+from datetime import date
+
+DATE_FORMAT = '%d.%m.%Y'  # формат ввода и отображения дат в формах
+
+
+def parse_date(text):
+    """Разбирает дату dd.mm.yyyy или yyyy-mm-dd; быстрее strptime на больших объемах"""
+    text = str(text)
+    try:
+        if "." in text:
+            day, month, year = text.split(".")
+        else:
+            year, month, day = text.split("-")
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(f"неверный формат даты {text!r}")
+
+
+def check_stay_date(value):
+    """Проверяет, что дата заезда или выезда (date) лежит в Database.CALENDAR_RANGE.
+
+    Ночи вне справочника Calendar не попали бы в DailyStats, поэтому такие даты
+    отклоняются при вводе, а не теряются в отчетах молча.
+    """
+    start, end = Database.CALENDAR_RANGE
+    if not start <= value <= end:
+        raise ValueError(f"дата {value.strftime(DATE_FORMAT)} вне поддерживаемого диапазона "
+                         f"{start.strftime(DATE_FORMAT)} - {end.strftime(DATE_FORMAT)}")
+    return value
+
+
+def to_storage_date(text):
+    """Дата из формы (dd.mm.yyyy) в формат хранения ISO-8601 (yyyy-mm-dd)"""
+    return parse_date(text).isoformat()
+
+
+def to_display_date(value):
+    """Дата ISO-8601 из БД в формат форм dd.mm.yyyy; прочие значения возвращаются как есть"""
+    if isinstance(value, str) and len(value) == 10 and value[4] == "-" and value[7] == "-":
+        return f"{value[8:10]}.{value[5:7]}.{value[0:4]}"
+    return value
+
+
+def _sql_to_storage_date(value):
+    try:
+        return to_storage_date(value)
+    except ValueError:
+        return value
+
+
+class Database:
+    # Версия схемы хранится в PRAGMA user_version (в PostgreSQL - в таблице SchemaVersion);
+    # migrate() доводит файл до SCHEMA_VERSION
+    SCHEMA_VERSION = 6
+    DATE_COLUMNS = {"Bookings": ("CheckInDate", "CheckOutDate")}
+
+    # Триггеры, поддерживающие Bookings.TotalCost; bulk-загрузка временно их снимает
+    COST_TRIGGERS = [
+        "CalculateBookingCostOnInsert",
+        "CalculateBookingCostOnUpdate",
+        "CalculateBookingCostOnDelete",
+        "CalculateBookingCostOnRoomsUpdate",
+        "CalculateBookingCostOnRoomsDelete",
+        "CalculateBookingCostOnBookingsUpdate",
+        "CalculateBookingCostOnBookingsDelete",
+    ]
+    # Триггеры, поддерживающие RoomOccupancy - интервалы занятости номеров для поиска свободных
+    OCCUPANCY_TRIGGERS = [
+        "RoomOccupancyOnInsert",
+        "RoomOccupancyOnUpdate",
+        "RoomOccupancyOnDelete",
+        "RoomOccupancyOnBookingsUpdate",
+        "RoomOccupancyOnBookingsDelete",
+    ]
+    # Триггеры, поддерживающие дневные агрегаты DailyStats (analytics.py)
+    ANALYTICS_TRIGGERS = [
+        "DailyStatsOnOccupancyInsert",
+        "DailyStatsOnOccupancyUpdate",
+        "DailyStatsOnOccupancyDelete",
+        "DailyStatsOnRoomsUpdate",
+        "DailyStatsOnRoomsDelete",
+    ]
+    # Дни, на которые раскладываются бронирования в DailyStats: [начало, конец);
+    # даты проживания вне него отклоняет check_stay_date
+    CALENDAR_RANGE = (date(2000, 1, 1), date(2061, 1, 1))
+    # Полнотекстовые индексы FTS5 (external content) по текстовым полям таблиц
+    FTS_COLUMNS = {
+        "Bookings": ("GuestName",),
+        "Hotels": ("Name", "City", "Address"),
+    }
+
+    MAX_RETRY_DELAY = 1.0  # верхняя граница паузы между повторами, с
+    # С этого числа строк delete_cascade снимает триггеры и правит производные данные запросами по множествам
+    CASCADE_TRIGGER_LIMIT = 200
+
+    # Таблицы базы данных; Id назначает AUTOINCREMENT (в PostgreSQL - identity)
+    TABLE_SCHEMAS = [
+        """
+        CREATE TABLE IF NOT EXISTS Hotels (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Name TEXT NOT NULL,
+            City TEXT NOT NULL,
+            Address TEXT NOT NULL,
+            Rating REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Rooms (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            HotelId INTEGER NOT NULL,
+            RoomType TEXT NOT NULL,
+            PricePerNight REAL NOT NULL,
+            MaxGuests INTEGER NOT NULL,
+            FOREIGN KEY (HotelId) REFERENCES Hotels(Id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Bookings (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            HotelId INTEGER NOT NULL,
+            GuestName TEXT NOT NULL,
+            CheckInDate TEXT NOT NULL,
+            CheckOutDate TEXT NOT NULL,
+            TotalCost REAL DEFAULT 0,
+            FOREIGN KEY (HotelId) REFERENCES Hotels(Id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS BookedRooms (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            BookingId INTEGER NOT NULL,
+            RoomId INTEGER NOT NULL,
+            NumberOfNights INTEGER NOT NULL,
+            FOREIGN KEY (BookingId) REFERENCES Bookings(Id) ON DELETE CASCADE,
+            FOREIGN KEY (RoomId) REFERENCES Rooms(Id) ON DELETE RESTRICT
+        )
+        """,
+        # Денормализованные интервалы [CheckInDate, CheckOutDate) каждой строки BookedRooms
+        """
+        CREATE TABLE IF NOT EXISTS RoomOccupancy (
+            BookedRoomId INTEGER PRIMARY KEY,
+            RoomId INTEGER NOT NULL,
+            CheckInDate TEXT NOT NULL,
+            CheckOutDate TEXT NOT NULL
+        )
+        """,
+        # Справочник дней для разложения интервалов по ночам
+        """
+        CREATE TABLE IF NOT EXISTS Calendar (
+            Day TEXT PRIMARY KEY
+        )
+        """,
+        # Проданные номера и выручка за ночь по отелю и типу номера
+        """
+        CREATE TABLE IF NOT EXISTS DailyStats (
+            HotelId INTEGER NOT NULL,
+            RoomType TEXT NOT NULL,
+            Day TEXT NOT NULL,
+            RoomsSold INTEGER NOT NULL DEFAULT 0,
+            Revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (HotelId, RoomType, Day)
+        )
+        """
+    ]
+
+    def __init__(self, db_name=None, synchronous="NORMAL", checkpoint_interval=100,
+                 busy_timeout=5.0, lock_retries=5, retry_delay=0.05, backend=None, statement_cache_size=128):
+        self.db_name = db_name
+        # Хранилище (backends.py); по умолчанию - SQLiteBackend для файла db_name
+        self.backend = backend
+        self._conn_backend = None
+        self.conn = None
+        self.cursor = None
+        # Политика надёжности: WAL-журнал, уровень synchronous и периодический checkpoint
+        self.synchronous = synchronous
+        self.checkpoint_interval = checkpoint_interval
+        # Работа нескольких программ с одним файлом: сколько SQLite ждёт снятия блокировки,
+        # и сколько раз (с удвоением паузы) повторить BEGIN/COMMIT, если ожидание не помогло
+        self.busy_timeout = busy_timeout
+        self.lock_retries = lock_retries
+        self.retry_delay = retry_delay
+        self._conn_db_name = None
+        self._commits_since_checkpoint = 0
+        self._tx_depth = 0
+        self._catalog = None
+        # Тексты запросов insert/update/delete/select_data по форме (таблица, столбцы, операторы)
+        self.statements = StatementCache(statement_cache_size)
+        # Счетчики и журнал медленных запросов; None - выключено (см. enable_instrumentation)
+        self.instrumentation = None
+        # Строки без родителя, перенесенные последней migrate() в таблицы Orphaned{таблица}: {таблица: число}
+        self.quarantined = {}
+        # Файл архива старых бронирований (archive.py), присоединяемый к соединению SQLite;
+        # None - {имя базы}.archive.db, если такой файл есть рядом с базой
+        self.archive_path = None
+        # Соединение используется и из потока Tk, и из DbWorker: запросы и транзакции
+        # выполняются под этой блокировкой
+        self._lock = threading.RLock()
+
+    def set_db_name(self, db_name):
+        if db_name != self._conn_db_name:
+            self.close()
+            self.archive_path = None
+        self.db_name = db_name
+
+    @property
+    def dialect(self):
+        backend = self._conn_backend or self.backend
+        return backend.dialect if backend else SQLiteBackend.dialect
+
+    @property
+    def Error(self):
+        """Базовый класс ошибок DB-API текущего хранилища (sqlite3.Error для файлов SQLite)"""
+        backend = self._conn_backend or self.backend
+        return backend.Error if backend else sqlite3.Error
+
+    def connect(self):
+        """Открывает соединение с файлом БД или переиспользует уже открытое"""
+        if not self.db_name and self.backend is None:
+            return False
+        with self._lock:
+            if self.conn and (self.backend is not None or self._conn_db_name == self.db_name):
+                return True
+            self.close()
+            backend = self.backend or SQLiteBackend(self.db_name, self.synchronous, self.busy_timeout,
+                                                    self.statements.maxsize, self._attachments())
+            self._conn_backend = backend
+            try:
+                self.conn = self._with_retry(backend.connect)
+                self.cursor = self.conn.cursor()
+                self._conn_db_name = self.db_name
+                self._commits_since_checkpoint = 0
+                self._tx_depth = 0
+                self._catalog = None
+                if self.instrumentation is not None:
+                    self.instrumentation.connections += 1
+                return True
+            except backend.Error as e:
+                print(f"Error connecting to database: {e}")
+                self.conn = None
+                self.cursor = None
+                self._conn_backend = None
+                return False
+
+    def _attachments(self):
+        """Файлы, присоединяемые к соединению SQLite: {схема: путь}"""
+        path = self.archive_path
+        if path is None and self.db_name != ":memory:":
+            path = archive.archive_file_for(self.db_name)
+            if not os.path.exists(path):
+                return {}
+        return {archive.ARCHIVE_SCHEMA: path}
+
+    def disconnect(self):
+        """Фиксирует изменения; соединение остаётся открытым для следующих вызовов"""
+        with self._lock:
+            if self.conn and not self._tx_depth:
+                try:
+                    self.conn.commit()
+                except self._conn_backend.Error as e:
+                    print(f"Error committing changes: {e}")
+
+    def close(self):
+        """Закрывает соединение (для SQLite - перенося содержимое WAL в основной файл)"""
+        with self._lock:
+            if self.conn:
+                backend = self._conn_backend
+                try:
+                    if backend.in_transaction(self.conn):
+                        self.conn.rollback()
+                    backend.release(self.conn)
+                except backend.Error as e:
+                    print(f"Error closing database: {e}")
+                self.conn = None
+                self.cursor = None
+                self._conn_backend = None
+                self._conn_db_name = None
+                self._tx_depth = 0
+                self._catalog = None
+
+    def interrupt(self):
+        """Прерывает выполняющийся запрос; безопасно вызывать из другого потока"""
+        conn, backend = self.conn, self._conn_backend
+        if conn and backend:
+            backend.interrupt(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Объединяет операции в одну транзакцию с одним commit.
+
+        Вложенные вызовы создают savepoint: исключение внутри вложенного блока
+        откатывает только его, исключение во внешнем блоке - всю транзакцию.
+        """
+        with self._lock:
+            if not self.connect():
+                raise OSError("База данных не открыта")
+            depth = self._tx_depth
+            savepoint = f"sp_{depth}"
+            if depth == 0:
+                # В SQLite это BEGIN IMMEDIATE: блокировку записи лучше ждать до первых изменений
+                self._with_retry(self.cursor.execute, self._conn_backend.BEGIN)
+            else:
+                self.cursor.execute(f"SAVEPOINT {savepoint}")
+            self._tx_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._tx_depth -= 1
+                # Прерванный запрос (interrupt) мог уже откатить транзакцию целиком
+                if self._conn_backend.in_transaction(self.conn):
+                    if depth == 0:
+                        self.cursor.execute("ROLLBACK")
+                        if self.instrumentation is not None:
+                            self.instrumentation.rollbacks += 1
+                    else:
+                        self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                        self.cursor.execute(f"RELEASE {savepoint}")
+                raise
+            self._tx_depth -= 1
+            if depth == 0:
+                try:
+                    self._with_retry(self.cursor.execute, "COMMIT")
+                except BaseException:
+                    if self._conn_backend.in_transaction(self.conn):
+                        self.cursor.execute("ROLLBACK")
+                    raise
+                self._after_commit()
+            else:
+                self.cursor.execute(f"RELEASE {savepoint}")
+
+    def _with_retry(self, fn, *args):
+        """Вызывает fn, повторяя его при блокировке БД другим соединением.
+
+        Пауза между попытками удваивается (со случайным разбросом, чтобы программы
+        не просыпались одновременно) и не превышает MAX_RETRY_DELAY.
+        """
+        delay = self.retry_delay
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return fn(*args)
+            except self._conn_backend.Error as e:
+                if attempt == self.lock_retries or not self._conn_backend.is_lock_error(e):
+                    raise
+                if self.instrumentation is not None:
+                    self.instrumentation.lock_retries += 1
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+
+    def checkpoint(self):
+        """Переносит накопленные страницы WAL в основной файл без блокировки читателей"""
+        if self.conn:
+            self._conn_backend.checkpoint(self.cursor)
+            self._commits_since_checkpoint = 0
+            if self.instrumentation is not None:
+                self.instrumentation.checkpoints += 1
+
+    def _after_commit(self):
+        if self.instrumentation is not None:
+            self.instrumentation.commits += 1
+        self._commits_since_checkpoint += 1
+        if self.checkpoint_interval and self._commits_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def _execute_sql(self, sql, params=None):
+        """Выполнение SQL запроса с обработкой исключений.
+
+        Вне transaction() каждый запрос фиксируется сам по себе. Внутри транзакции
+        ошибка пробрасывается дальше, чтобы transaction() откатил её целиком.
+        """
+        with self._lock:
+            backend = self._conn_backend
+            instrumentation = self.instrumentation
+            if instrumentation is not None:
+                started = time.perf_counter()
+            try:
+                changes = backend.changes(self.conn)
+                query = backend.translate(sql, bool(params))
+                args = (query, params) if params else (query,)
+                if self._tx_depth:
+                    self.cursor.execute(*args)
+                else:
+                    # Одиночный запрос сам является транзакцией и может упереться в чужую блокировку
+                    self._with_retry(self.cursor.execute, *args)
+                result = self.cursor.fetchall() if self.cursor.description is not None else []
+                if instrumentation is not None:
+                    self._record(instrumentation, sql, params, started, len(result))
+                if not self._tx_depth and backend.changes(self.conn) != changes:
+                    self._after_commit()
+                return result
+            except backend.Error as e:
+                if instrumentation is not None:
+                    self._record(instrumentation, sql, params, started, 0, error=True)
+                print(f"SQL Execution Error: {e}")
+                if self._tx_depth:
+                    raise
+                return None
+
+    def _record(self, instrumentation, sql, params, started, rows, error=False):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        instrumentation.record(sql, elapsed_ms, rows, error)
+        if not error and instrumentation.is_slow(elapsed_ms):
+            instrumentation.add_slow(sql, params, elapsed_ms, self.explain(sql, params))
+
+    def explain(self, sql, params=None):
+        """План выполнения запроса строками; для DDL и прочих команд - пустой список"""
+        command = sql.split(None, 1)[:1]
+        if not command or command[0].upper() not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+            return []
+        backend = self._conn_backend
+        try:
+            return backend.explain(self.conn, backend.translate(sql, bool(params)), params or ())
+        except backend.Error as e:
+            return [f"план недоступен: {e}"]
+
+    def enable_instrumentation(self, slow_ms=100.0, slow_log_size=100):
+        """Включает сбор статистики запросов (или меняет порог) и возвращает Instrumentation.
+
+        Без блокировки соединения, чтобы окно диагностики не ждало долгих транзакций:
+        _execute_sql читает self.instrumentation один раз на запрос.
+        """
+        instrumentation = self.instrumentation or Instrumentation(slow_ms, slow_log_size)
+        instrumentation.slow_ms = slow_ms
+        self.instrumentation = instrumentation
+        return instrumentation
+
+    def disable_instrumentation(self):
+        self.instrumentation = None
+
+    def diagnostics(self):
+        """Счетчики запросов и кеша выражений словарем; без инструментирования - только кеш.
+
+        Читается без блокировки, чтобы окно диагностики не ждало долгих транзакций.
+        """
+        instrumentation = self.instrumentation
+        result = instrumentation.snapshot(self.synchronous) if instrumentation is not None else {}
+        result.update(statement_cache_size=len(self.statements), statement_cache_hits=self.statements.hits,
+                      statement_cache_misses=self.statements.misses)
+        return result
+
+    def create_tables(self):
+        """Создает таблицы базы данных"""
+        for query in self.TABLE_SCHEMAS:
+            self._execute_sql(query)
+
+    def migrate(self):
+        """Приводит схему открытого файла к SCHEMA_VERSION одной транзакцией.
+
+        Версия 1 - исходные таблицы, версия 2 - даты бронирований в ISO-8601
+        (лексикографический порядок совпадает с хронологическим) и составной индекс
+        по (HotelId, CheckInDate, CheckOutDate), версия 3 - таблица интервалов
+        RoomOccupancy для поиска свободных номеров, версия 4 - полнотекстовые
+        индексы FTS5 по FTS_COLUMNS (если SQLite собран с FTS5), версия 5 -
+        справочник Calendar и дневные агрегаты DailyStats, версия 6 - действия
+        ON DELETE у внешних ключей (строки, оставшиеся без родителя, переносятся в
+        таблицы Orphaned{таблица}, их число - в self.quarantined).
+        Триггеры и индексы пересоздаются после каждой миграции.
+        """
+        with self._lock:
+            if not self.connect():
+                raise OSError("База данных не открыта")
+            version = self._conn_backend.user_version(self.cursor)
+        self.quarantined = {}
+        if version >= self.SCHEMA_VERSION:
+            return version
+        # Таблицы SQLite перестраиваются с выключенной проверкой внешних ключей (как советует
+        # документация SQLite), а внутри транзакции PRAGMA foreign_keys не действует
+        rebuild = version < 6 and self.dialect == "sqlite"
+        if rebuild:
+            self._execute_sql("PRAGMA foreign_keys = OFF")
+        try:
+            self._migrate(version)
+        finally:
+            if rebuild:
+                self._execute_sql("PRAGMA foreign_keys = ON")
+        self._catalog = None
+        if self.quarantined:
+            moved = ", ".join(f"{table}: {count}" for table, count in self.quarantined.items())
+            print(f"Orphaned rows moved to Orphaned* tables during migration ({moved})")
+        return self.SCHEMA_VERSION
+
+    def _migrate(self, version):
+        with self.transaction():
+            self.create_tables()
+            self.drop_all_triggers()
+            # Даты в прежнем формате бывают только в старых файлах SQLite
+            if version < 2 and self.dialect == "sqlite":
+                self.conn.create_function("to_storage_date", 1, _sql_to_storage_date, deterministic=True)
+                self._execute_sql("""
+                    UPDATE Bookings
+                    SET CheckInDate = to_storage_date(CheckInDate),
+                        CheckOutDate = to_storage_date(CheckOutDate)
+                """)
+            if version < 3:
+                self.rebuild_occupancy()
+            if version < 4:
+                self.create_search_index()
+            if version < 5:
+                self.fill_calendar()
+                self.rebuild_daily_stats()
+            if version < 6:
+                self.quarantined = self.quarantine_orphans()
+                if self.quarantined:
+                    self.rebuild_derived()
+                self.apply_foreign_key_actions()
+            self.create_trigger()
+            self.create_indexes()
+            self._conn_backend.set_user_version(self.cursor, self.SCHEMA_VERSION)
+
+    def create_trigger(self):
+        """Создает все триггеры производных данных: стоимости, занятости, аналитики и поиска"""
+        self.create_cost_triggers()
+        self.create_occupancy_triggers()
+        self.create_analytics_triggers()
+        self.create_search_triggers()
+
+    def create_cost_triggers(self):
+        """Создает триггеры, поддерживающие общую стоимость бронирования.
+
+        Триггеры не пересчитывают SUM по всем номерам бронирования, а добавляют или
+        вычитают вклад OLD/NEW строки, поэтому их стоимость не зависит от размера
+        BookedRooms. Существующие триггеры пересоздаются, чтобы старые файлы БД
+        получили актуальные определения.
+        """
+        for name in self.COST_TRIGGERS:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+        # Триггер для BookedRooms при вставке
+        query = """
+            CREATE TRIGGER CalculateBookingCostOnInsert
+            AFTER INSERT ON BookedRooms
+            BEGIN
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0)
+                    + COALESCE((SELECT PricePerNight FROM Rooms WHERE Id = NEW.RoomId), 0) * NEW.NumberOfNights
+                WHERE Id = NEW.BookingId;
+            END;
+        """
+        self._execute_sql(query)
+
+        # Триггер для BookedRooms при обновлении: снимаем старый вклад и добавляем новый
+        query_update = """
+            CREATE TRIGGER CalculateBookingCostOnUpdate
+            AFTER UPDATE OF BookingId, RoomId, NumberOfNights ON BookedRooms
+            BEGIN
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0)
+                    - COALESCE((SELECT PricePerNight FROM Rooms WHERE Id = OLD.RoomId), 0) * OLD.NumberOfNights
+                WHERE Id = OLD.BookingId;
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0)
+                    + COALESCE((SELECT PricePerNight FROM Rooms WHERE Id = NEW.RoomId), 0) * NEW.NumberOfNights
+                WHERE Id = NEW.BookingId;
+            END;
+        """
+        self._execute_sql(query_update)
+
+        # Триггер для BookedRooms при удалении
+        query_delete = """
+            CREATE TRIGGER CalculateBookingCostOnDelete
+            AFTER DELETE ON BookedRooms
+            BEGIN
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0)
+                    - COALESCE((SELECT PricePerNight FROM Rooms WHERE Id = OLD.RoomId), 0) * OLD.NumberOfNights
+                WHERE Id = OLD.BookingId;
+            END;
+        """
+        self._execute_sql(query_delete)
+
+        # Триггер для Rooms при изменении цены: срабатывает только если цена действительно изменилась
+        query_rooms_update = """
+            CREATE TRIGGER CalculateBookingCostOnRoomsUpdate
+            AFTER UPDATE OF PricePerNight ON Rooms
+            WHEN NEW.PricePerNight IS NOT OLD.PricePerNight
+            BEGIN
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0) + (NEW.PricePerNight - OLD.PricePerNight) * (
+                    SELECT SUM(br.NumberOfNights)
+                    FROM BookedRooms br
+                    WHERE br.RoomId = NEW.Id AND br.BookingId = Bookings.Id
+                )
+                WHERE Id IN (SELECT BookingId FROM BookedRooms WHERE RoomId = NEW.Id);
+            END;
+        """
+        self._execute_sql(query_rooms_update)
+
+        # Триггер для Rooms при удалении: номер больше не учитывается в стоимости
+        query_rooms_delete = """
+            CREATE TRIGGER CalculateBookingCostOnRoomsDelete
+            AFTER DELETE ON Rooms
+            BEGIN
+                UPDATE Bookings
+                SET TotalCost = COALESCE(TotalCost, 0) - OLD.PricePerNight * (
+                    SELECT SUM(br.NumberOfNights)
+                    FROM BookedRooms br
+                    WHERE br.RoomId = OLD.Id AND br.BookingId = Bookings.Id
+                )
+                WHERE Id IN (SELECT BookingId FROM BookedRooms WHERE RoomId = OLD.Id);
+            END;
+        """
+        self._execute_sql(query_rooms_delete)
+
+        # Триггер для Bookings при изменении дат: пересчет ночей одним UPDATE,
+        # стоимость затем поправит CalculateBookingCostOnUpdate
+        query_bookings_update = """
+            CREATE TRIGGER CalculateBookingCostOnBookingsUpdate
+            AFTER UPDATE OF CheckInDate, CheckOutDate ON Bookings
+            BEGIN
+                UPDATE BookedRooms
+                SET NumberOfNights = CAST(julianday(NEW.CheckOutDate) - julianday(NEW.CheckInDate) AS INTEGER)
+                WHERE BookingId = NEW.Id;
+            END;
+        """
+        self._execute_sql(query_bookings_update)
+        # CalculateBookingCostOnBookingsDelete больше не создается: строка бронирования уже удалена,
+        # и обновлять у нее TotalCost не нужно
+
+    def fts5_supported(self):
+        if self.dialect != "sqlite":
+            return False
+        result = self._execute_sql("PRAGMA compile_options") or []
+        return any(row[0] == "ENABLE_FTS5" for row in result)
+
+    def catalog(self):
+        """Метаданные схемы; перестраиваются только при изменении PRAGMA schema_version.
+
+        У PostgreSQL такого счетчика нет - там каталог сбрасывается после migrate().
+        """
+        with self._lock:
+            version = self._conn_backend.schema_version(self.cursor)
+            if self._catalog is None or (version is not None and self._catalog.version != version):
+                self._catalog = SchemaCatalog.load(self)
+            return self._catalog
+
+    def fts_tables(self):
+        """Таблицы, для которых в файле есть полнотекстовый индекс {table}_fts"""
+        catalog = self.catalog()
+        return {table for table in self.FTS_COLUMNS if catalog.has_table(f"{table}_fts")}
+
+    def create_search_index(self):
+        """Создает и заполняет FTS5-таблицы {table}_fts поверх таблиц из FTS_COLUMNS.
+
+        unicode61 приводит к одному регистру любые буквы Юникода (в отличие от LIKE,
+        который сворачивает только ASCII), prefix='2 3' ускоряет поиск по началу слова.
+        """
+        if not self.fts5_supported():
+            print("FTS5 is not available, full-text search falls back to LIKE")
+            return
+        for table, columns in self.FTS_COLUMNS.items():
+            self._execute_sql(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                    {", ".join(columns)},
+                    content='{table}', content_rowid='Id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            """)
+            self._execute_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+    def create_search_triggers(self):
+        """Создает триггеры, синхронизирующие FTS-таблицы с исходными таблицами"""
+        for table, columns in self.FTS_COLUMNS.items():
+            for suffix in ("ai", "ad", "au"):
+                self._execute_sql(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            if table not in self.fts_tables():
+                continue
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"NEW.{column}" for column in columns)
+            old_values = ", ".join(f"OLD.{column}" for column in columns)
+            insert_new = f"INSERT INTO {table}_fts(rowid, {column_list}) VALUES (NEW.Id, {new_values});"
+            delete_old = (f"INSERT INTO {table}_fts({table}_fts, rowid, {column_list}) "
+                          f"VALUES ('delete', OLD.Id, {old_values});")
+            self._execute_sql(f"""
+                CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table}
+                BEGIN {insert_new} END;
+            """)
+            self._execute_sql(f"""
+                CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table}
+                BEGIN {delete_old} END;
+            """)
+            self._execute_sql(f"""
+                CREATE TRIGGER {table}_fts_au AFTER UPDATE OF Id, {column_list} ON {table}
+                BEGIN {delete_old} {insert_new} END;
+            """)
+
+    def create_occupancy_triggers(self):
+        """Создает триггеры, синхронизирующие RoomOccupancy с BookedRooms и датами Bookings"""
+        for name in self.OCCUPANCY_TRIGGERS:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        queries = [
+            """
+            CREATE TRIGGER RoomOccupancyOnInsert
+            AFTER INSERT ON BookedRooms
+            BEGIN
+                INSERT OR REPLACE INTO RoomOccupancy (BookedRoomId, RoomId, CheckInDate, CheckOutDate)
+                SELECT NEW.Id, NEW.RoomId, b.CheckInDate, b.CheckOutDate FROM Bookings b WHERE b.Id = NEW.BookingId;
+            END;
+            """,
+            """
+            CREATE TRIGGER RoomOccupancyOnUpdate
+            AFTER UPDATE OF Id, BookingId, RoomId ON BookedRooms
+            BEGIN
+                DELETE FROM RoomOccupancy WHERE BookedRoomId = OLD.Id;
+                INSERT OR REPLACE INTO RoomOccupancy (BookedRoomId, RoomId, CheckInDate, CheckOutDate)
+                SELECT NEW.Id, NEW.RoomId, b.CheckInDate, b.CheckOutDate FROM Bookings b WHERE b.Id = NEW.BookingId;
+            END;
+            """,
+            """
+            CREATE TRIGGER RoomOccupancyOnDelete
+            AFTER DELETE ON BookedRooms
+            BEGIN
+                DELETE FROM RoomOccupancy WHERE BookedRoomId = OLD.Id;
+            END;
+            """,
+            """
+            CREATE TRIGGER RoomOccupancyOnBookingsUpdate
+            AFTER UPDATE OF CheckInDate, CheckOutDate ON Bookings
+            BEGIN
+                UPDATE RoomOccupancy
+                SET CheckInDate = NEW.CheckInDate, CheckOutDate = NEW.CheckOutDate
+                WHERE BookedRoomId IN (SELECT Id FROM BookedRooms WHERE BookingId = NEW.Id);
+            END;
+            """,
+            # Строки BookedRooms удаленного бронирования больше не занимают номер
+            """
+            CREATE TRIGGER RoomOccupancyOnBookingsDelete
+            AFTER DELETE ON Bookings
+            BEGIN
+                DELETE FROM RoomOccupancy
+                WHERE BookedRoomId IN (SELECT Id FROM BookedRooms WHERE BookingId = OLD.Id);
+            END;
+            """,
+        ]
+        for query in queries:
+            self._execute_sql(query)
+
+    def create_analytics_triggers(self):
+        """Создает триггеры, поддерживающие DailyStats.
+
+        Источник - RoomOccupancy: каждая ее строка дает по одной проданной ночи номера
+        на каждый день [CheckInDate, CheckOutDate) из Calendar. Триггеры добавляют или
+        вычитают вклад OLD/NEW строки, как и триггеры стоимости; изменение цены, типа
+        или отеля номера переносит вклад всех его интервалов.
+        """
+        for name in self.ANALYTICS_TRIGGERS:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        add_interval = """
+                INSERT INTO DailyStats (HotelId, RoomType, Day, RoomsSold, Revenue)
+                SELECT r.HotelId, r.RoomType, c.Day, 1, r.PricePerNight
+                FROM Rooms r
+                JOIN Calendar c ON c.Day >= NEW.CheckInDate AND c.Day < NEW.CheckOutDate
+                WHERE r.Id = NEW.RoomId
+                ON CONFLICT (HotelId, RoomType, Day) DO UPDATE
+                SET RoomsSold = DailyStats.RoomsSold + excluded.RoomsSold,
+                    Revenue = DailyStats.Revenue + excluded.Revenue;
+        """
+        remove_interval = """
+                UPDATE DailyStats
+                SET RoomsSold = RoomsSold - 1,
+                    Revenue = Revenue - (SELECT PricePerNight FROM Rooms WHERE Id = OLD.RoomId)
+                WHERE (HotelId, RoomType) = (SELECT HotelId, RoomType FROM Rooms WHERE Id = OLD.RoomId)
+                  AND Day >= OLD.CheckInDate AND Day < OLD.CheckOutDate;
+        """
+        # Ночи номера по дням: (Day, n) для всех его интервалов в RoomOccupancy
+        room_nights = """
+                SELECT c.Day, COUNT(*) AS n
+                FROM RoomOccupancy o
+                JOIN Calendar c ON c.Day >= o.CheckInDate AND c.Day < o.CheckOutDate
+                WHERE o.RoomId = {room}.Id
+                GROUP BY c.Day
+        """
+        remove_room = f"""
+                UPDATE DailyStats
+                SET RoomsSold = RoomsSold - t.n, Revenue = Revenue - t.n * OLD.PricePerNight
+                FROM ({room_nights.format(room="OLD")}) AS t
+                WHERE DailyStats.HotelId = OLD.HotelId AND DailyStats.RoomType = OLD.RoomType
+                  AND DailyStats.Day = t.Day;
+        """
+        queries = [
+            f"""
+            CREATE TRIGGER DailyStatsOnOccupancyInsert
+            AFTER INSERT ON RoomOccupancy
+            BEGIN {add_interval} END;
+            """,
+            f"""
+            CREATE TRIGGER DailyStatsOnOccupancyUpdate
+            AFTER UPDATE OF RoomId, CheckInDate, CheckOutDate ON RoomOccupancy
+            BEGIN {remove_interval} {add_interval} END;
+            """,
+            f"""
+            CREATE TRIGGER DailyStatsOnOccupancyDelete
+            AFTER DELETE ON RoomOccupancy
+            BEGIN {remove_interval} END;
+            """,
+            f"""
+            CREATE TRIGGER DailyStatsOnRoomsUpdate
+            AFTER UPDATE OF HotelId, RoomType, PricePerNight ON Rooms
+            BEGIN
+                {remove_room}
+                INSERT INTO DailyStats (HotelId, RoomType, Day, RoomsSold, Revenue)
+                SELECT NEW.HotelId, NEW.RoomType, t.Day, t.n, t.n * NEW.PricePerNight
+                FROM ({room_nights.format(room="NEW")}) AS t
+                WHERE true
+                ON CONFLICT (HotelId, RoomType, Day) DO UPDATE
+                SET RoomsSold = DailyStats.RoomsSold + excluded.RoomsSold,
+                    Revenue = DailyStats.Revenue + excluded.Revenue;
+            END;
+            """,
+            f"""
+            CREATE TRIGGER DailyStatsOnRoomsDelete
+            AFTER DELETE ON Rooms
+            BEGIN {remove_room} END;
+            """,
+        ]
+        for query in queries:
+            self._execute_sql(query)
+
+    def fill_calendar(self):
+        """Заполняет Calendar днями из CALENDAR_RANGE"""
+        start, end = self.CALENDAR_RANGE
+        days = ((date.fromordinal(day).isoformat(),) for day in range(start.toordinal(), end.toordinal()))
+        self._execute_sql("DELETE FROM Calendar")
+        self.bulk_insert("Calendar", ("Day",), days)
+
+    def rebuild_daily_stats(self):
+        """Пересчитывает DailyStats целиком одним INSERT ... SELECT по RoomOccupancy.
+
+        Если подключен архив, добавляются и архивные ночи - по снимку номера в
+        archive.BookedRooms и только для существующих отелей.
+        """
+        nights = """
+            SELECT r.HotelId, r.RoomType, r.PricePerNight, o.CheckInDate, o.CheckOutDate
+            FROM RoomOccupancy o
+            JOIN Rooms r ON r.Id = o.RoomId
+        """
+        if archive.is_attached(self):
+            nights += """
+            UNION ALL
+            SELECT ar.HotelId, ar.RoomType, ar.PricePerNight, ab.CheckInDate, ab.CheckOutDate
+            FROM archive.BookedRooms ar
+            JOIN archive.Bookings ab ON ab.Id = ar.BookingId
+            WHERE ar.HotelId IN (SELECT Id FROM Hotels)
+            """
+        self._execute_sql("DELETE FROM DailyStats")
+        self._execute_sql(f"""
+            INSERT INTO DailyStats (HotelId, RoomType, Day, RoomsSold, Revenue)
+            SELECT n.HotelId, n.RoomType, c.Day, COUNT(*), SUM(n.PricePerNight)
+            FROM ({nights}) AS n
+            JOIN Calendar c ON c.Day >= n.CheckInDate AND c.Day < n.CheckOutDate
+            GROUP BY n.HotelId, n.RoomType, c.Day
+        """)
+
+    def drop_cost_triggers(self):
+        """Удаляет триггеры пересчета стоимости (см. create_cost_triggers для восстановления)"""
+        for name in self.COST_TRIGGERS:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+    def drop_all_triggers(self):
+        """Удаляет все триггеры производных данных: стоимости, занятости, аналитики и поиска.
+
+        Для массовой загрузки: после нее rebuild_derived() пересчитывает данные
+        одним проходом, а create_trigger() возвращает триггеры.
+        """
+        names = self.COST_TRIGGERS + self.OCCUPANCY_TRIGGERS + self.ANALYTICS_TRIGGERS
+        names += [f"{table}_fts_{suffix}" for table in self.FTS_COLUMNS for suffix in ("ai", "ad", "au")]
+        for name in names:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+    def rebuild_occupancy(self):
+        """Заполняет RoomOccupancy заново по BookedRooms и датам бронирований"""
+        self._execute_sql("DELETE FROM RoomOccupancy")
+        self._execute_sql("""
+            INSERT OR REPLACE INTO RoomOccupancy (BookedRoomId, RoomId, CheckInDate, CheckOutDate)
+            SELECT br.Id, br.RoomId, b.CheckInDate, b.CheckOutDate
+            FROM BookedRooms br
+            JOIN Bookings b ON b.Id = br.BookingId
+        """)
+
+    def rebuild_derived(self):
+        """Пересчитывает всё, что поддерживают триггеры: ночи, стоимость, занятость, DailyStats и FTS"""
+        self.recalculate_nights()
+        self.recalculate_total_cost()
+        self.rebuild_occupancy()
+        self.rebuild_daily_stats()
+        for table in self.fts_tables():
+            self._execute_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+    def recalculate_total_cost(self, booking_ids=None):
+        """Пересчитывает TotalCost одним проходом по BookedRooms для всех или указанных бронирований"""
+        params = ()
+        bookings_filter = rooms_filter = ""
+        if booking_ids is not None:
+            params = (json.dumps(list(booking_ids)),)
+            bookings_filter = "WHERE Id IN (SELECT value FROM json_each(?))"
+            rooms_filter = "WHERE br.BookingId IN (SELECT value FROM json_each(?))"
+        self._execute_sql(f"UPDATE Bookings SET TotalCost = 0 {bookings_filter}", params)
+        self._execute_sql(f"""
+            UPDATE Bookings
+            SET TotalCost = t.Cost
+            FROM (
+                SELECT br.BookingId, SUM(r.PricePerNight * br.NumberOfNights) AS Cost
+                FROM BookedRooms br
+                JOIN Rooms r ON r.Id = br.RoomId
+                {rooms_filter}
+                GROUP BY br.BookingId
+            ) AS t
+            WHERE Bookings.Id = t.BookingId
+        """, params)
+
+    def recalculate_nights(self, booking_ids=None):
+        """Пересчитывает NumberOfNights одним UPDATE для всех или указанных бронирований"""
+        sql = """
+            UPDATE BookedRooms
+            SET NumberOfNights = CAST(julianday(b.CheckOutDate) - julianday(b.CheckInDate) AS INTEGER)
+            FROM Bookings b
+            WHERE b.Id = BookedRooms.BookingId
+              AND BookedRooms.NumberOfNights IS NOT CAST(julianday(b.CheckOutDate) - julianday(b.CheckInDate) AS INTEGER)
+        """
+        if booking_ids is None:
+            return self._execute_sql(sql)
+        sql += " AND BookedRooms.BookingId IN (SELECT value FROM json_each(?))"
+        return self._execute_sql(sql, (json.dumps(list(booking_ids)),))
+
+    def _create_index(self, table, *columns):
+        """Создает индекс для указанных колонок в таблице"""
+        index_name = f"idx_{table}_{'_'.join(columns)}"
+        sql = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({', '.join(columns)})"
+        self._execute_sql(sql)
+
+    def create_indexes(self):
+        self._create_index("Hotels", "Name")
+        self._create_index("Rooms", "RoomType")
+        self._create_index("Bookings", "GuestName")
+        # Диапазонные запросы по датам (заезды, загрузка) в пределах отеля
+        self._create_index("Bookings", "HotelId", "CheckInDate", "CheckOutDate")
+        # Поддержка триггеров стоимости: поиск строк бронирования по номеру и по бронированию
+        self._create_index("BookedRooms", "RoomId", "BookingId")
+        self._create_index("BookedRooms", "BookingId")
+        # Поиск свободных номеров: номера отеля/города и пересечение интервалов по номеру
+        self._create_index("Rooms", "HotelId")
+        self._create_index("Hotels", "City")
+        self._create_index("RoomOccupancy", "RoomId", "CheckOutDate", "CheckInDate")
+        # Отчеты по диапазону дат сразу по всем отелям
+        self._create_index("DailyStats", "Day")
+
+    def _statement(self, key, build):
+        """Текст SQL из кеша statements; build() строит его при первом обращении"""
+        with self._lock:
+            return self.statements.get(key, build)
+
+    def clear_table(self, table, conditions=None):
+        """Удаляет строки таблицы по условиям (тройкам столбец, оператор, значение) или все"""
+        conditions = normalize(conditions)
+        sql = self._statement(("DELETE", table, shape(conditions)),
+                              lambda: f"DELETE FROM {identifier(table)} {where(conditions)}")
+        self._execute_sql(sql, params(conditions))
+
+    def insert_data(self, table, data):
+        """Вставляет данные в таблицу и возвращает Id новой строки.
+
+        Пустой или отсутствующий Id назначает сама БД (AUTOINCREMENT) в момент вставки,
+        поэтому несколько программ, работающих с одним файлом, не получат одинаковых Id.
+        """
+        data = {key: value for key, value in data.items() if not (key == "Id" and value in (None, ""))}
+        columns = tuple(data)
+        sql = self._statement(("INSERT", table, columns), lambda: (
+            f"INSERT INTO {identifier(table)} ({', '.join(map(identifier, columns))}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) RETURNING Id"))
+        result = self._execute_sql(sql, tuple(data.values()))
+        return result[0][0] if result else None
+
+    def update_data(self, table, data, conditions):
+        """Обновляет столбцы data в строках, подходящих под условия, например [("Id", "=", 5)]"""
+        conditions = normalize(conditions)
+        if not conditions:
+            raise ValueError("Не задано условие обновления")
+        columns = tuple(data)
+        sql = self._statement(("UPDATE", table, columns, shape(conditions)), lambda: (
+            f"UPDATE {identifier(table)} SET {', '.join(f'{identifier(key)}=?' for key in columns)} "
+            f"{where(conditions)}"))
+        self._execute_sql(sql, tuple(data.values()) + params(conditions))
+
+    def delete_data(self, table, conditions):
+        """Удаляет строки по условиям; без условий - ошибка (для очистки есть clear_table)"""
+        conditions = normalize(conditions)
+        if not conditions:
+            raise ValueError("Не задано условие удаления")
+        self.clear_table(table, conditions)
+
+    def delete_in_batches(self, table, conditions, batch_size=1000, on_progress=None):
+        """Удаляет строки по условиям частями по batch_size, вызывая on_progress(удалено, всего).
+
+        Вызывается внутри transaction(): исключение из on_progress (например, отмена
+        операции) откатывает все уже удаленные части. Все части выполняются одним
+        и тем же подготовленным запросом.
+        """
+        conditions = normalize(conditions)
+        if not conditions:
+            raise ValueError("Не задано условие удаления")
+        table = identifier(table)
+        key = shape(conditions)
+        values = params(conditions)
+        count_sql = self._statement(("COUNT", table, key), lambda: f"SELECT COUNT(*) FROM {table} {where(conditions)}")
+        delete_sql = self._statement(("DELETE BATCH", table, key), lambda: (
+            f"DELETE FROM {table} WHERE Id IN (SELECT Id FROM {table} {where(conditions)} LIMIT ?)"))
+        total = self._execute_sql(count_sql, values)[0][0]
+        done = 0
+        while done < total:
+            self._execute_sql(delete_sql, values + (int(batch_size),))
+            deleted = self.cursor.rowcount
+            if deleted <= 0:
+                break
+            done += deleted
+            if on_progress:
+                on_progress(done, total)
+        return done
+
+    def preview_delete(self, table, conditions):
+        """План каскадного удаления без изменений: сколько строк каких таблиц будет удалено
+        и какие ссылки с RESTRICT не дают удалить"""
+        with self._lock:
+            if not self.connect():
+                raise OSError("База данных не открыта")
+            return plan_delete(self, table, conditions)
+
+    def delete_cascade(self, table, conditions, on_progress=None):
+        """Удаляет строки по условиям вместе с зависимыми (ON DELETE CASCADE) одной транзакцией.
+
+        Каждая таблица удаляется одним DELETE по подзапросу Id, от зависимых к
+        исходной; ссылка с RESTRICT на удаляемые строки - исключение DeleteRestricted.
+        Небольшие удаления оставляют пересчет стоимости, занятости, DailyStats и FTS
+        триггерам, а начиная с CASCADE_TRIGGER_LIMIT строк Id сохраняются во
+        временные таблицы, триггеры снимаются и эти данные правятся несколькими
+        запросами по множествам. Возвращает DeletePlan.
+        """
+        with self.transaction():
+            plan = plan_delete(self, table, conditions)
+            if plan.restricted:
+                raise DeleteRestricted(plan)
+            if plan.total < self.CASCADE_TRIGGER_LIMIT:
+                hotels = [row[0] for row in self._execute_sql(*plan.selects["Hotels"])] \
+                    if plan.affects("Hotels") else []
+                execute_delete(self, plan, on_progress)
+                if hotels:
+                    # Архивные ночи (archive.py) триггеры не вычитают - строки удаленных отелей убираются целиком
+                    self._execute_sql("DELETE FROM DailyStats WHERE HotelId IN (SELECT value FROM json_each(?))",
+                                      (json.dumps(hotels),))
+                return plan
+            materialize(self, plan)
+            self.drop_all_triggers()
+            bookings = self._forget_derived(plan)
+            execute_delete(self, plan, on_progress)
+            if bookings:
+                self.recalculate_total_cost(bookings)
+            self.create_trigger()
+            drop_materialized(self, plan)
+            return plan
+
+    def _forget_derived(self, plan):
+        """Убирает вклад удаляемых по плану строк из FTS, RoomOccupancy и DailyStats - вместо триггеров.
+
+        Возвращает Id бронирований, которые остаются, но теряют строки BookedRooms:
+        их стоимость пересчитывается после удаления.
+        """
+        for table in self.fts_tables():
+            if plan.affects(table):
+                columns = ", ".join(self.FTS_COLUMNS[table])
+                sql, values = plan.selects[table]
+                self._execute_sql(f"""
+                    INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+                    SELECT 'delete', Id, {columns} FROM {table} WHERE Id IN ({sql})
+                """, values)
+        hotels, hotel_values = plan.selects["Hotels"] if plan.affects("Hotels") else (None, ())
+        bookings = []
+        if plan.affects("BookedRooms"):
+            booked, booked_values = plan.selects["BookedRooms"]
+            # Строки DailyStats удаляемых отелей удаляются целиком, вычитать из них незачем
+            hotel_filter = f"AND r.HotelId NOT IN ({hotels})" if hotels else ""
+            self._execute_sql(f"""
+                UPDATE DailyStats
+                SET RoomsSold = RoomsSold - t.n, Revenue = Revenue - t.Amount
+                FROM (
+                    SELECT r.HotelId, r.RoomType, c.Day, COUNT(*) AS n, SUM(r.PricePerNight) AS Amount
+                    FROM RoomOccupancy o
+                    JOIN Rooms r ON r.Id = o.RoomId
+                    JOIN Calendar c ON c.Day >= o.CheckInDate AND c.Day < o.CheckOutDate
+                    WHERE o.BookedRoomId IN ({booked}) {hotel_filter}
+                    GROUP BY r.HotelId, r.RoomType, c.Day
+                ) AS t
+                WHERE DailyStats.HotelId = t.HotelId AND DailyStats.RoomType = t.RoomType
+                  AND DailyStats.Day = t.Day
+            """, booked_values + hotel_values)
+            self._execute_sql(f"DELETE FROM RoomOccupancy WHERE BookedRoomId IN ({booked})", booked_values)
+            query = f"SELECT DISTINCT BookingId FROM BookedRooms WHERE Id IN ({booked})"
+            values = booked_values
+            if plan.affects("Bookings"):
+                sql, bookings_values = plan.selects["Bookings"]
+                query += f" AND BookingId NOT IN ({sql})"
+                values += bookings_values
+            bookings = [row[0] for row in self._execute_sql(query, values)]
+        if hotels:
+            self._execute_sql(f"DELETE FROM DailyStats WHERE HotelId IN ({hotels})", hotel_values)
+        return bookings
+
+    def quarantine_orphans(self):
+        """Переносит строки, внешний ключ которых ссылается на несуществующую строку, в таблицы
+        Orphaned{таблица} с теми же столбцами; возвращает {таблица: число перенесенных строк}.
+
+        Такие строки остались от удалений до появления ON DELETE; они не удаляются,
+        чтобы их можно было просмотреть и вернуть вручную. Проход повторяется, пока
+        есть что переносить: номер без отеля оставляет без номера и строки BookedRooms.
+        """
+        catalog = self.catalog()
+        moved = {}
+        while True:
+            found = 0
+            for table, info in catalog.tables.items():
+                for column, (parent, parent_column) in info.foreign_keys.items():
+                    orphans = f"{column} IS NOT NULL AND {column} NOT IN (SELECT {parent_column} FROM {parent})"
+                    count = self._execute_sql(f"SELECT COUNT(*) FROM {table} WHERE {orphans}")[0][0]
+                    if not count:
+                        continue
+                    quarantine = f"Orphaned{table}"
+                    self._execute_sql(f"CREATE TABLE IF NOT EXISTS {quarantine} AS SELECT * FROM {table} WHERE 1 = 0")
+                    self._execute_sql(f"INSERT INTO {quarantine} SELECT * FROM {table} WHERE {orphans}")
+                    self._execute_sql(f"DELETE FROM {table} WHERE {orphans}")
+                    moved[table] = moved.get(table, 0) + count
+                    found += count
+            if not found:
+                return moved
+
+    def apply_foreign_key_actions(self):
+        """Приводит действия ON DELETE внешних ключей существующих таблиц к TABLE_SCHEMAS.
+
+        SQLite не меняет ограничения через ALTER TABLE, поэтому таблица пересоздается
+        с копированием строк; в PostgreSQL ограничение заменяется на месте.
+        """
+        catalog = self.catalog()
+        for schema in self.TABLE_SCHEMAS:
+            table = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", schema).group(1)
+            info = catalog.tables.get(table)
+            declared = re.findall(r"FOREIGN KEY \((\w+)\) REFERENCES (\w+)\((\w+)\) ON DELETE (\w+)", schema)
+            changed = [key for key in declared if info is not None and info.on_delete.get(key[0]) != key[3]]
+            if not changed:
+                continue
+            if self.dialect == "sqlite":
+                self._rebuild_table(table, schema, info.columns)
+                continue
+            for column, parent, parent_column, action in changed:
+                constraint = f"{table}_{column}_fkey".lower()
+                self._execute_sql(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+                self._execute_sql(f"""
+                    ALTER TABLE {table} ADD CONSTRAINT {constraint}
+                    FOREIGN KEY ({column}) REFERENCES {parent}({parent_column}) ON DELETE {action}
+                """)
+        if self.dialect == "sqlite":
+            violations = self._execute_sql("PRAGMA foreign_key_check")
+            if violations:
+                raise sqlite3.IntegrityError(f"Нарушены внешние ключи: {violations[:5]}")
+        self._catalog = None
+
+    def _rebuild_table(self, table, schema, columns):
+        """Пересоздает таблицу SQLite по schema, сохраняя строки и счетчик AUTOINCREMENT"""
+        sequence = self._execute_sql("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        column_list = ", ".join(columns)
+        self._execute_sql(schema.replace(f"EXISTS {table} (", f"EXISTS {table}_new (", 1))
+        self._execute_sql(f"INSERT INTO {table}_new ({column_list}) SELECT {column_list} FROM {table}")
+        self._execute_sql(f"DROP TABLE {table}")
+        self._execute_sql(f"ALTER TABLE {table}_new RENAME TO {table}")
+        # DROP TABLE удаляет и счетчик: без него Id удаленных последними строк выдавались бы снова
+        current = self._execute_sql("SELECT MAX(seq) FROM sqlite_sequence WHERE name = ?", (table,))[0][0]
+        self._execute_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+        self._execute_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                          (table, max(sequence[0][0] if sequence else 0, current or 0)))
+
+    def bulk_insert(self, table, columns, rows):
+        """Массовая вставка строк: executemany в SQLite, COPY в PostgreSQL"""
+        with self._lock:
+            self._conn_backend.copy_rows(self.cursor, table, columns, rows)
+
+    def iter_rows(self, sql, params=None, batch_size=1000):
+        """Построчно читает результат запроса частями по batch_size (в PostgreSQL - серверным курсором)"""
+        if not self.connect():
+            raise OSError("База данных не открыта")
+        backend = self._conn_backend
+        yield from backend.iter_query(self.conn, backend.translate(sql, bool(params)), params or (), batch_size)
+
+    def count_rows(self, table):
+        result = self._execute_sql(f"SELECT COUNT(*) FROM {table}")
+        return result[0][0] if result else 0
+
+    def select_data(self, table, columns="*", conditions=None):
+        """Строки таблицы по условиям; columns - "*" или список столбцов"""
+        conditions = normalize(conditions)
+        columns = ("*",) if columns == "*" else tuple(columns)
+        sql = self._statement(("SELECT", table, columns, shape(conditions)), lambda: (
+            f"SELECT {'*' if columns == ('*',) else ', '.join(map(identifier, columns))} "
+            f"FROM {identifier(table)} {where(conditions)}"))
+        return self._execute_sql(sql, params(conditions))
+
+    def find_available_rooms(self, check_in, check_out, guests=1, hotel_id=None, city=None):
+        """Свободные номера на интервал [check_in, check_out) с вместимостью не меньше guests.
+
+        Даты в формате хранения ISO-8601. Для каждого номера-кандидата занятость
+        проверяется поиском по индексу RoomOccupancy(RoomId, CheckOutDate, CheckInDate),
+        поэтому время ответа не зависит от общего числа бронирований.
+        """
+        conditions = ["r.MaxGuests >= ?"]
+        params = [check_out, check_in, guests]
+        if hotel_id:
+            conditions.append("r.HotelId = ?")
+            params.append(hotel_id)
+        if city:
+            conditions.append("h.City = ?")
+            params.append(city)
+        sql = f"""
+            SELECT r.Id, h.Name, h.City, r.RoomType, r.MaxGuests, r.PricePerNight,
+                   r.PricePerNight * CAST(julianday(?) - julianday(?) AS INTEGER) AS TotalCost
+            FROM Rooms r
+            JOIN Hotels h ON h.Id = r.HotelId
+            WHERE {" AND ".join(conditions)}
+              AND NOT EXISTS (
+                  SELECT 1 FROM RoomOccupancy o
+                  WHERE o.RoomId = r.Id AND o.CheckOutDate > ? AND o.CheckInDate < ?
+              )
+            ORDER BY r.PricePerNight, r.Id
+        """
+        return self._execute_sql(sql, tuple(params) + (check_in, check_out))
+
+    def select_page(self, table, after_id=None, before_id=None, limit=200):
+        """Страница строк таблицы по Id (keyset-пагинация): после after_id или перед before_id.
+
+        В отличие от OFFSET стоимость не растет с номером страницы - каждая страница
+        начинается с поиска по первичному ключу.
+        """
+        if before_id is not None:
+            sql = f"SELECT * FROM {table} WHERE Id < ? ORDER BY Id DESC LIMIT ?"
+            rows = self._execute_sql(sql, (before_id, limit))
+            return list(reversed(rows)) if rows else rows
+        if after_id is not None:
+            sql = f"SELECT * FROM {table} WHERE Id > ? ORDER BY Id LIMIT ?"
+            return self._execute_sql(sql, (after_id, limit))
+        return self._execute_sql(f"SELECT * FROM {table} ORDER BY Id LIMIT ?", (limit,))
+
+    def search_data(self, table, column, search_term, limit=1000, include_archive=False):
+        """Поиск данных по текстовому неключевому полю.
+
+        Для полей из FTS_COLUMNS используется полнотекстовый индекс (слова запроса
+        ищутся по началу, результаты упорядочены по релевантности), для остальных - LIKE.
+        include_archive дополняет результат до limit строками архива (archive.py).
+        """
+        if column in self.FTS_COLUMNS.get(table, ()) and table in self.fts_tables():
+            rows = self.full_text_search(table, column, search_term, limit)
+        else:
+            sql = f"SELECT * FROM {table} WHERE {column} LIKE ? LIMIT ?"
+            rows = self._execute_sql(sql, (f"%{search_term}%", limit))
+        if include_archive and rows is not None and len(rows) < limit and table in archive.ARCHIVE_COLUMNS \
+                and archive.is_attached(self):
+            rows = list(rows) + archive.search(self, table, column, search_term, limit - len(rows))
+        return rows
+
+    @staticmethod
+    def fts_match(column, search_term):
+        """Запрос FTS5 MATCH по столбцу: каждое слово - префикс, все слова обязательны; None - слов нет"""
+        words = re.findall(r"\w+", search_term)
+        if not words:
+            return None
+        return f"{column} : (" + " ".join(f'"{word}"*' for word in words) + ")"
+
+    def full_text_search(self, table, column, search_term, limit=1000):
+        """Ранжированный (bm25) поиск по FTS5: каждое слово запроса - префикс, все слова обязательны"""
+        match = self.fts_match(column, search_term)
+        if match is None:
+            return []
+        sql = f"""
+            SELECT t.* FROM {table}_fts f
+            JOIN {table} t ON t.Id = f.rowid
+            WHERE {table}_fts MATCH ?
+            ORDER BY f.rank
+            LIMIT ?
+        """
+        return self._execute_sql(sql, (match, limit))
+
+
+# Интерфейс живет в hotel_gui и загружается только при обращении к нему, чтобы импорт
+# Database в скриптах и на сервере не тянул tkinter
+_GUI_NAMES = ("HotelBookingApp", "PagedTreeview", "COLUMN_TRANSLATIONS")
+
+
+def __getattr__(name):
+    if name in _GUI_NAMES:
+        import hotel_gui
+        return getattr(hotel_gui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    import hotel_gui
+    hotel_gui.main()
@@ -0,0 +1,141 @@
+"""Счетчики и журнал медленных запросов для Database.
+
+Включается через Database.enable_instrumentation(); пока выключено, _execute_sql
+проверяет одну ссылку на None и больше ничего не делает.
+"""
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Верхние границы корзин гистограммы задержек, мс; последняя корзина - всё, что дольше
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class StatementStats:
+    """Задержки и число строк одного текста SQL"""
+
+    def __init__(self, sql):
+        self.sql = " ".join(sql.split())
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows):
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.histogram[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, q):
+        """Верхняя граница корзины, в которую попадает q-й процентиль, мс (для последней - максимум)"""
+        if not self.calls:
+            return 0.0
+        rank = self.calls * q / 100
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class SlowQuery:
+    def __init__(self, sql, params, elapsed_ms, plan):
+        self.time = time.time()
+        self.sql = " ".join(sql.split())
+        self.params = params
+        self.elapsed_ms = elapsed_ms
+        self.plan = plan  # строки EXPLAIN QUERY PLAN
+
+    def __str__(self):
+        plan = "\n".join(f"    {line}" for line in self.plan)
+        return f"{self.elapsed_ms:.1f} мс: {self.sql}\n{plan}"
+
+
+class Instrumentation:
+    """Статистика запросов одного Database.
+
+    slow_ms - порог журнала медленных запросов (None - журнал выключен); для
+    каждого такого запроса сохраняется его план, в журнале остаются последние
+    slow_log_size записей.
+    """
+
+    def __init__(self, slow_ms=100.0, slow_log_size=100):
+        self.slow_ms = slow_ms
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.reset()
+
+    def reset(self):
+        self.statements = {}  # текст SQL -> StatementStats
+        self.slow_log.clear()
+        self.commits = 0
+        self.rollbacks = 0
+        self.checkpoints = 0
+        self.connections = 0
+        self.lock_retries = 0
+        self.started = time.time()
+
+    def record(self, sql, elapsed_ms, rows, error=False):
+        stats = self.statements.get(sql)
+        if stats is None:
+            stats = self.statements[sql] = StatementStats(sql)
+        if error:
+            stats.errors += 1
+        stats.add(elapsed_ms, rows)
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_ms is not None and elapsed_ms >= self.slow_ms
+
+    def add_slow(self, sql, params, elapsed_ms, plan):
+        self.slow_log.append(SlowQuery(sql, params, elapsed_ms, plan))
+
+    def top(self, limit=20, key="total_ms"):
+        """Самые дорогие запросы по key (total_ms, calls, max_ms, rows)"""
+        return sorted(list(self.statements.values()), key=lambda stats: getattr(stats, key), reverse=True)[:limit]
+
+    def snapshot(self, synchronous="NORMAL"):
+        """Счетчики словарем (для API и окна диагностики).
+
+        fsync считаются оценочно: в WAL при synchronous=NORMAL синхронизирует диск
+        только checkpoint, при FULL/EXTRA - еще и каждый commit.
+        """
+        fsyncs = self.checkpoints + (self.commits if synchronous.upper() in ("FULL", "EXTRA") else 0)
+        # Копия списка: снимок могут читать из другого потока, пока запросы добавляются
+        statements = list(self.statements.values())
+        return {
+            "seconds": round(time.time() - self.started, 1),
+            "statements": len(statements),
+            "queries": sum(stats.calls for stats in statements),
+            "errors": sum(stats.errors for stats in statements),
+            "rows": sum(stats.rows for stats in statements),
+            "query_ms": round(sum(stats.total_ms for stats in statements), 1),
+            "commits": self.commits,
+            "rollbacks": self.rollbacks,
+            "checkpoints": self.checkpoints,
+            "fsyncs": fsyncs,
+            "connections": self.connections,
+            "lock_retries": self.lock_retries,
+            "slow_queries": len(self.slow_log),
+        }
+
+    def report(self, limit=10, synchronous="NORMAL"):
+        """Текстовый отчет: счетчики, самые дорогие запросы и журнал медленных"""
+        lines = [", ".join(f"{name}={value}" for name, value in self.snapshot(synchronous).items())]
+        lines.append(f"{'вызовов':>8} {'всего, мс':>10} {'сред.':>7} {'p95':>7} {'макс.':>7} {'строк':>8}  запрос")
+        for stats in self.top(limit):
+            lines.append(f"{stats.calls:>8} {stats.total_ms:>10.1f} {stats.avg_ms:>7.2f} {stats.percentile(95):>7.2f} "
+                         f"{stats.max_ms:>7.1f} {stats.rows:>8}  {stats.sql[:100]}")
+        slow_log = list(self.slow_log)
+        if slow_log:
+            lines.append("Медленные запросы:")
+            lines.extend(str(query) for query in slow_log)
+        return "\n".join(lines)
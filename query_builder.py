@@ -0,0 +1,113 @@
+"""Параметризованные условия WHERE и LRU-кеш текстов SQL.
+
+Условие задается тройками (столбец, оператор, значение): значения уходят в
+параметры, а текст запроса зависит только от столбцов и операторов. Поэтому
+повторные UPDATE/DELETE с разными значениями дают один и тот же SQL, и кеш
+подготовленных выражений sqlite3 (разобранный запрос вместе с планом) находит его.
+"""
+import json
+import re
+from collections import OrderedDict
+
+# Оператор -> шаблон условия; {column} - имя столбца
+OPERATORS = {
+    "=": "{column} = ?",
+    "!=": "{column} != ?",
+    "<": "{column} < ?",
+    "<=": "{column} <= ?",
+    ">": "{column} > ?",
+    ">=": "{column} >= ?",
+    "LIKE": "{column} LIKE ?",
+    # Список передается одним JSON-параметром, чтобы текст не зависел от его длины
+    "IN": "{column} IN (SELECT value FROM json_each(?))",
+    "IS NULL": "{column} IS NULL",
+    "IS NOT NULL": "{column} IS NOT NULL",
+}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def identifier(name):
+    """Проверяет имя таблицы или столбца: подставляется в SQL как есть, поэтому только [A-Za-z0-9_]"""
+    if not isinstance(name, str) or not _IDENTIFIER.match(name):
+        raise ValueError(f"Недопустимое имя столбца или таблицы: {name!r}")
+    return name
+
+
+def normalize(conditions):
+    """Одна тройка или список троек -> кортеж троек с проверенными столбцами и операторами"""
+    if conditions is None:
+        return ()
+    if isinstance(conditions, str):
+        raise TypeError("Условие задается тройками (столбец, оператор, значение), а не строкой SQL")
+    if isinstance(conditions, tuple) and len(conditions) == 3 and isinstance(conditions[1], str):
+        conditions = [conditions]
+    result = []
+    for condition in conditions:
+        column, op, value = condition
+        op = op.upper()
+        if op not in OPERATORS:
+            raise ValueError(f"Неподдерживаемый оператор: {op}")
+        result.append((identifier(column), op, value))
+    return tuple(result)
+
+
+def shape(conditions):
+    """Ключ текста условия: столбцы и операторы без значений"""
+    return tuple((column, op) for column, op, _ in conditions)
+
+
+def where(conditions):
+    """Фрагмент 'WHERE ...' (или '') для нормализованных троек"""
+    if not conditions:
+        return ""
+    return "WHERE " + " AND ".join(OPERATORS[op].format(column=column) for column, op, _ in conditions)
+
+
+def params(conditions):
+    """Параметры для where(conditions) в том же порядке"""
+    result = []
+    for _, op, value in conditions:
+        if op == "IN":
+            result.append(json.dumps(list(value)))
+        elif op not in ("IS NULL", "IS NOT NULL"):
+            result.append(value)
+    return tuple(result)
+
+
+class StatementCache:
+    """LRU-кеш построенных текстов SQL размером maxsize со счетчиками попаданий.
+
+    Размер совпадает с cached_statements соединения SQLite: пока текст есть
+    здесь, его подготовленное выражение обычно есть и в кеше sqlite3.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._statements = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Текст SQL для key; при промахе строится вызовом build()"""
+        sql = self._statements.get(key)
+        if sql is not None:
+            self._statements.move_to_end(key)
+            self.hits += 1
+            return sql
+        self.misses += 1
+        sql = self._statements[key] = build()
+        if len(self._statements) > self.maxsize:
+            self._statements.popitem(last=False)
+        return sql
+
+    def clear(self):
+        self._statements.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._statements)
+
+    def __str__(self):
+        total = self.hits + self.misses
+        ratio = 100.0 * self.hits / total if total else 0.0
+        return f"кеш запросов: {len(self)}/{self.maxsize}, попаданий {self.hits}, промахов {self.misses} ({ratio:.0f}%)"
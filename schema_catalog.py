@@ -0,0 +1,123 @@
+"""Кеш метаданных схемы: столбцы, типы, внешние ключи и индексы таблиц"""
+import re
+
+
+class TableInfo:
+    def __init__(self, name, columns, types, foreign_keys, indexes, on_delete=None):
+        self.name = name
+        self.columns = columns  # имена столбцов в порядке объявления
+        self.types = types  # {столбец: объявленный тип}
+        self.foreign_keys = foreign_keys  # {столбец: (таблица, столбец)}
+        self.indexes = indexes  # {индекс: [столбцы]}
+        self.on_delete = on_delete if on_delete is not None else {}  # {столбец: CASCADE, RESTRICT, NO ACTION...}
+
+
+class SchemaCatalog:
+    """Снимок схемы открытого файла БД.
+
+    Строится одним проходом по sqlite_master и PRAGMA; version - значение
+    PRAGMA schema_version на момент построения. SQLite увеличивает этот счетчик
+    при любом изменении схемы (в том числе из другого процесса), поэтому
+    Database.catalog() перестраивает снимок только когда счетчик изменился.
+    """
+
+    def __init__(self, version, tables):
+        self.version = version
+        self.tables = tables  # {таблица: TableInfo}
+
+    @classmethod
+    def load(cls, db):
+        if db.dialect == "postgresql":
+            return cls._load_postgres(db)
+        version = db._execute_sql("PRAGMA schema_version")[0][0]
+        names = db._execute_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'") or []
+        tables = {}
+        for (name,) in names:
+            columns_info = db._execute_sql(f"PRAGMA table_info({name})") or []
+            foreign_key_list = db._execute_sql(f"PRAGMA foreign_key_list({name})") or []
+            foreign_keys = {row[3]: (row[2], row[4]) for row in foreign_key_list}
+            indexes = {}
+            for row in db._execute_sql(f"PRAGMA index_list({name})") or []:
+                index_name = row[1]
+                indexes[index_name] = [info[2] for info in db._execute_sql(f"PRAGMA index_info({index_name})") or []]
+            tables[name] = TableInfo(
+                name,
+                [row[1] for row in columns_info],
+                {row[1]: row[2] for row in columns_info},
+                foreign_keys,
+                indexes,
+                {row[3]: row[6].upper() for row in foreign_key_list},
+            )
+        return cls(version, tables)
+
+    @classmethod
+    def _load_postgres(cls, db):
+        """Снимок по information_schema; имена возвращаются в написании из Database.TABLE_SCHEMAS.
+
+        PostgreSQL приводит имена без кавычек к нижнему регистру, а остальной код
+        обращается к таблицам и столбцам как Hotels/HotelId.
+        """
+        known = {}
+        for query in db.TABLE_SCHEMAS:
+            for name in re.findall(r"\b[A-Za-z_]\w*", query):
+                known.setdefault(name.lower(), name)
+
+        def name(value):
+            return known.get(value, value)
+
+        tables = {}
+        for table, column, data_type in db._execute_sql("""
+                SELECT c.table_name, c.column_name, c.data_type
+                FROM information_schema.columns c
+                JOIN information_schema.tables t
+                  ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+                WHERE c.table_schema = current_schema() AND t.table_type = 'BASE TABLE'
+                ORDER BY c.table_name, c.ordinal_position
+            """) or []:
+            info = tables.get(name(table))
+            if info is None:
+                info = tables[name(table)] = TableInfo(name(table), [], {}, {}, {})
+            info.columns.append(name(column))
+            info.types[name(column)] = data_type.upper()
+        for table, column, parent, parent_column, delete_rule in db._execute_sql("""
+                SELECT kcu.table_name, kcu.column_name, ccu.table_name, ccu.column_name, rc.delete_rule
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.key_column_usage kcu
+                  ON kcu.constraint_name = tc.constraint_name AND kcu.table_schema = tc.table_schema
+                JOIN information_schema.constraint_column_usage ccu
+                  ON ccu.constraint_name = tc.constraint_name AND ccu.table_schema = tc.table_schema
+                JOIN information_schema.referential_constraints rc
+                  ON rc.constraint_name = tc.constraint_name AND rc.constraint_schema = tc.table_schema
+                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = current_schema()
+            """) or []:
+            if name(table) in tables:
+                tables[name(table)].foreign_keys[name(column)] = (name(parent), name(parent_column))
+                tables[name(table)].on_delete[name(column)] = delete_rule.upper()
+        for table, index, definition in db._execute_sql(
+                "SELECT tablename, indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema()") or []:
+            if name(table) in tables:
+                columns = definition[definition.index("(") + 1:definition.rindex(")")]
+                tables[name(table)].indexes[index] = [name(column.strip()) for column in columns.split(",")]
+        return cls(None, tables)
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def columns(self, table):
+        info = self.tables.get(table)
+        return list(info.columns) if info else []
+
+    def foreign_keys(self, table):
+        info = self.tables.get(table)
+        return dict(info.foreign_keys) if info else {}
+
+    def referencing(self, table):
+        """Внешние ключи, ссылающиеся на table: [(таблица, столбец, действие ON DELETE)]"""
+        return [(info.name, column, info.on_delete.get(column, "NO ACTION"))
+                for info in self.tables.values()
+                for column, (parent, _) in info.foreign_keys.items() if parent == table]
+
+    def indexes(self, table):
+        info = self.tables.get(table)
+        return dict(info.indexes) if info else {}
@@ -0,0 +1,269 @@
+import re
+import unittest
+
+from backends import ConnectionPool, PostgresBackend, translate_to_postgres
+from hotel_management import Database
+
+
+class FakeError(Exception):
+    def __init__(self, message="", pgcode=None):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.description = None
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.driver.log.append((sql, params))
+        if sql == "BEGIN":
+            self.conn.status = 1
+        elif sql in ("COMMIT", "ROLLBACK"):
+            self.conn.status = 0
+        self.rows = list(self.conn.driver.results.get(sql, []))
+        self.description = [("column",)] if sql.lstrip().upper().startswith("SELECT") else None
+
+    def copy_expert(self, sql, buffer):
+        self.conn.driver.log.append((sql, buffer.read()))
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, driver):
+        self.driver = driver
+        self.closed = False
+        self.autocommit = False
+        self.status = 0
+        self.rollbacks = 0
+        self.cursor_names = []
+
+    def cursor(self, name=None, withhold=False):
+        self.cursor_names.append(name)
+        return FakeCursor(self, name)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = 0
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    """Заменяет psycopg2: запоминает выполненные запросы, SELECT возвращают results[sql]"""
+
+    Error = FakeError
+
+    def __init__(self):
+        self.log = []
+        self.results = {}
+        self.connections = []
+
+    def connect(self, dsn, **kwargs):
+        conn = FakeConnection(self)
+        self.connections.append(conn)
+        return conn
+
+    def statements(self):
+        return [sql for sql, _ in self.log]
+
+
+SQLITE_ONLY = re.compile(r"\bAUTOINCREMENT\b|\bjulianday\b|\bjson_each\b|\bPRAGMA\b|\bINSERT\s+OR\b|"
+                         r"\bsqlite_master\b|\bREAL\b|\bIS\s+NOT\s+(?!NULL\b)|\bfts5\b", re.IGNORECASE)
+
+
+class TranslateDatabaseSqlTest(unittest.TestCase):
+    """Все запросы, которые Database выполняет при создании схемы, переводятся в PostgreSQL"""
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.db = Database(backend=PostgresBackend(driver=self.driver))
+        self.assertTrue(self.db.connect())
+        self.db.migrate()
+        self.db.drop_all_triggers()
+        self.db.create_trigger()
+        self.db.rebuild_daily_stats()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_no_sqlite_syntax_left(self):
+        for sql in self.driver.statements():
+            self.assertIsNone(SQLITE_ONLY.search(sql), sql)
+
+    def test_every_trigger_becomes_function(self):
+        statements = self.driver.statements()
+        dropped = {re.match(r"DROP FUNCTION IF EXISTS (\w+)_fn\(\) CASCADE", sql).group(1)
+                   for sql in statements if sql.startswith("DROP FUNCTION")}
+        created = {}
+        for sql in statements:
+            match = re.match(r"CREATE OR REPLACE FUNCTION (\w+)_fn\(\)", sql)
+            if match:
+                created[match.group(1)] = sql
+        for name in ("CalculateBookingCostOnInsert", "CalculateBookingCostOnRoomsUpdate",
+                     "RoomOccupancyOnUpdate", "DailyStatsOnOccupancyInsert", "DailyStatsOnRoomsUpdate"):
+            self.assertIn(name, created)
+        # Триггеры полнотекстового поиска в PostgreSQL не создаются, но снимаются вместе с остальными
+        self.assertLessEqual(set(created), dropped)
+        for name, sql in created.items():
+            self.assertEqual(sql.count("$$"), 2, name)
+            self.assertTrue(sql.endswith(f"EXECUTE FUNCTION {name}_fn()"), name)
+            self.assertRegex(sql.split("$$")[1], r"RETURN (NULL|NEW);\nEND\n$", name)
+
+    def test_trigger_body_keeps_all_statements(self):
+        sql = next(sql for sql in self.driver.statements()
+                   if sql.startswith("CREATE OR REPLACE FUNCTION DailyStatsOnOccupancyUpdate_fn"))
+        self.assertEqual(sql.count("UPDATE DailyStats"), 1)
+        self.assertEqual(sql.count("INSERT INTO DailyStats"), 1)
+        self.assertIn("ON CONFLICT (HotelId, RoomType, Day) DO UPDATE", sql)
+
+    def test_parameters_use_psycopg_placeholders(self):
+        params = [(sql, args) for sql, args in self.driver.log if args and not isinstance(args, str)]
+        self.assertTrue(params)
+        for sql, _ in params:
+            self.assertNotIn("?", sql)
+
+
+class TranslateTriggerTest(unittest.TestCase):
+
+    def test_semicolon_inside_literal(self):
+        sql = translate_to_postgres(
+            "CREATE TRIGGER LogInsert AFTER INSERT ON Hotels BEGIN "
+            "INSERT INTO Log (Message) VALUES ('a; b'); DELETE FROM Log WHERE Message = 'x;'; END;")
+        self.assertIn("    INSERT INTO Log (Message) VALUES ('a; b');\n", sql)
+        self.assertIn("    DELETE FROM Log WHERE Message = 'x;';\n", sql)
+
+    def test_when_condition(self):
+        sql = translate_to_postgres(
+            "CREATE TRIGGER PriceChanged AFTER UPDATE OF PricePerNight ON Rooms "
+            "WHEN NEW.PricePerNight IS NOT OLD.PricePerNight BEGIN DELETE FROM Log; END")
+        self.assertIn("FOR EACH ROW WHEN (NEW.PricePerNight IS DISTINCT FROM OLD.PricePerNight) "
+                      "EXECUTE FUNCTION PriceChanged_fn()", sql)
+
+    def test_placeholders_outside_literals(self):
+        self.assertEqual(translate_to_postgres("SELECT '?', Id FROM Hotels WHERE Name LIKE ?", True),
+                         "SELECT '?', Id FROM Hotels WHERE Name ILIKE %s")
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.pool = ConnectionPool(lambda: self.driver.connect(""), maxconn=2, timeout=0.05)
+
+    def test_reuses_released_connection(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(len(self.driver.connections), 1)
+
+    def test_limit_and_timeout(self):
+        self.pool.acquire()
+        second = self.pool.acquire()
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire()
+        self.pool.release(second, discard=True)
+        self.assertTrue(second.closed)
+        self.assertIsNot(self.pool.acquire(), second)
+
+    def test_factory_error_frees_slot(self):
+        pool = ConnectionPool(self._failing_factory, maxconn=1, timeout=0.05)
+        for _ in range(2):
+            with self.assertRaises(FakeError):
+                pool.acquire()
+
+    @staticmethod
+    def _failing_factory():
+        raise FakeError("connection refused")
+
+    def test_close_closes_idle(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.pool.close()
+        self.assertTrue(conn.closed)
+
+
+class PostgresBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.backend = PostgresBackend("dbname=hotels", maxconn=1, pool_timeout=0.05, driver=self.driver)
+
+    def test_connection_is_autocommit_and_shared(self):
+        first = Database(backend=self.backend)
+        self.assertTrue(first.connect())
+        conn = first.conn
+        self.assertTrue(conn.autocommit)
+        first.close()
+        second = Database(backend=self.backend)
+        self.assertTrue(second.connect())
+        self.assertIs(second.conn, conn)
+        second.close()
+
+    def test_release_rolls_back_open_transaction(self):
+        conn = self.backend.connect()
+        conn.status = 2  # TRANSACTION_STATUS_INTRANS
+        self.backend.release(conn)
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertIs(self.backend.connect(), conn)
+
+    def test_broken_connection_is_discarded(self):
+        conn = self.backend.connect()
+        conn.closed = True
+        self.backend.release(conn)
+        self.assertIsNot(self.backend.connect(), conn)
+
+    def test_transaction_commits_once(self):
+        db = Database(backend=self.backend)
+        with db.transaction():
+            db._execute_sql("UPDATE Hotels SET Rating = ? WHERE Id = ?", (5, 1))
+        self.assertEqual(self.driver.statements(),
+                         ["BEGIN", "UPDATE Hotels SET Rating = %s WHERE Id = %s", "COMMIT"])
+        db.close()
+
+    def test_lock_errors(self):
+        self.assertTrue(self.backend.is_lock_error(FakeError(pgcode="40P01")))
+        self.assertFalse(self.backend.is_lock_error(FakeError(pgcode="23505")))
+        self.assertIs(Database(backend=self.backend).Error, FakeError)
+
+    def test_iter_query_uses_server_side_cursor(self):
+        sql = "SELECT Id FROM Hotels"
+        self.driver.results[sql] = [(1,), (2,), (3,)]
+        conn = self.backend.connect()
+        self.assertEqual(list(self.backend.iter_query(conn, sql, (), 2)), [(1,), (2,), (3,)])
+        self.assertTrue(conn.cursor_names[-1].startswith("stream_"))
+
+    def test_copy_rows_moves_identity(self):
+        conn = self.backend.connect()
+        self.backend.copy_rows(conn.cursor(), "Hotels", ("Id", "Name"), [(7, "Отель, центр")])
+        (copy_sql, data), (setval_sql, _) = self.driver.log
+        self.assertEqual(copy_sql, "COPY Hotels (Id, Name) FROM STDIN WITH (FORMAT csv)")
+        self.assertEqual(data, '7,"Отель, центр"\r\n')
+        self.assertIn("pg_get_serial_sequence('hotels', 'id')", setval_sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
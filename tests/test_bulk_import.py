@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from bulk_import import BulkImporter
+from hotel_management import Database
+
+
+class BulkImportTriggersTest(unittest.TestCase):
+    """Снятие триггеров стоимости на время загрузки BookedRooms"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "hotels.db"))
+        self.db.connect()
+        self.db.migrate()
+        with self.db.transaction():
+            self.db._execute_sql("INSERT INTO Hotels (Id, Name, City, Address) VALUES (1, 'Отель', 'Москва', 'ул. 1')")
+            for room_id, price in ((1, 1000), (2, 2500)):
+                self.db._execute_sql("INSERT INTO Rooms (Id, HotelId, RoomType, PricePerNight, MaxGuests) "
+                                     "VALUES (?, 1, 'Стандарт', ?, 2)", (room_id, price))
+            for booking_id in range(1, 5):
+                self.db._execute_sql("INSERT INTO Bookings (Id, HotelId, GuestName, CheckInDate, CheckOutDate) "
+                                     "VALUES (?, 1, ?, '2024-03-01', '2024-03-04')",
+                                     (booking_id, f"Гость {booking_id}"))
+        self.triggers = self._triggers()
+        self.path = os.path.join(self.tmp.name, "booked.csv")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("BookingId,RoomId\n1,1\n2,2\n3,1\n4,2\n")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def _triggers(self):
+        return {row[0] for row in self.db._execute_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+
+    def _costs(self):
+        return dict(self.db._execute_sql("SELECT Id, TotalCost FROM Bookings ORDER BY Id"))
+
+    def test_import_keeps_costs_and_triggers(self):
+        report = BulkImporter(self.db, batch_size=2).import_file("BookedRooms", self.path)
+        self.assertEqual(report.inserted, 4)
+        self.assertEqual(self._costs(), {1: 3000, 2: 7500, 3: 3000, 4: 7500})
+        self.assertEqual(self._triggers(), self.triggers)
+
+    def test_failed_second_batch_leaves_first_batch_consistent(self):
+        bulk_insert = self.db.bulk_insert
+        calls = []
+
+        def failing_bulk_insert(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise sqlite3.OperationalError("disk I/O error")
+            return bulk_insert(*args, **kwargs)
+
+        with mock.patch.object(self.db, "bulk_insert", side_effect=failing_bulk_insert):
+            with self.assertRaises(sqlite3.OperationalError):
+                BulkImporter(self.db, batch_size=2).import_file("BookedRooms", self.path)
+
+        self.assertEqual(self.db.count_rows("BookedRooms"), 2)
+        self.assertEqual(self._costs(), {1: 3000, 2: 7500, 3: 0, 4: 0})
+        self.assertEqual(self._triggers(), self.triggers)
+        # Триггеры на месте: следующая вставка пересчитывает стоимость сама
+        self.db._execute_sql("INSERT INTO BookedRooms (BookingId, RoomId, NumberOfNights) VALUES (3, 2, 3)")
+        self.assertEqual(self._costs()[3], 7500)
+
+    def test_dates_outside_calendar_rejected(self):
+        path = os.path.join(self.tmp.name, "bookings.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("HotelId,GuestName,CheckInDate,CheckOutDate\n"
+                    "1,Гость,30.12.1999,02.01.2000\n"
+                    "1,Гость,2024-05-01,2024-05-03\n"
+                    "1,Гость,2060-12-30,2061-01-02\n")
+        report = BulkImporter(self.db).import_file("Bookings", path)
+        self.assertEqual((report.inserted, report.rejected), (1, 2))
+        self.assertEqual([line_no for line_no, _ in report.errors], [2, 4])
+        self.assertIn("вне поддерживаемого диапазона", report.errors[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Пакетная проверка Id и внешних ключей перед вставкой строк"""
+import json
+
+
+class RowError:
+    """Ошибка в строке с номером row (индекс во входном списке)"""
+
+    def __init__(self, row, column, message):
+        self.row = row
+        self.column = column
+        self.message = message
+
+    def __repr__(self):
+        return f"RowError({self.row}, {self.column!r}, {self.message!r})"
+
+    def __str__(self):
+        return self.message
+
+
+def existing_ids(db, table, ids, column="Id"):
+    """Значения ids, которые есть в table.column - один запрос на весь набор"""
+    ids = list(set(ids))
+    if not ids:
+        return set()
+    sql = f"SELECT {column} FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))"
+    result = db._execute_sql(sql, (json.dumps(ids),)) or []
+    return {row[0] for row in result}
+
+
+def validate_rows(db, table, rows):
+    """Проверяет строки-словари перед вставкой в table и возвращает список RowError.
+
+    Id (если задан) не должен быть занят ни в таблице, ни в другой строке пакета,
+    а каждый внешний ключ из схемы должен ссылаться на существующую запись.
+    На каждую таблицу выполняется один запрос, сколько бы строк ни проверялось.
+    """
+    errors = []
+    # (столбец, таблица, столбец в ней, ссылка ли это на другую таблицу)
+    checks = [("Id", table, "Id", False)]
+    for column, (parent, parent_column) in db.catalog().foreign_keys(table).items():
+        checks.append((column, parent, parent_column or "Id", True))
+
+    values = {}  # столбец -> [(номер строки, значение)]
+    for column, _, _, required in checks:
+        values[column] = []
+        for index, row in enumerate(rows):
+            value = row.get(column)
+            if value in (None, ""):
+                if required:
+                    errors.append(RowError(index, column, f"не заполнено поле {column}"))
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                errors.append(RowError(index, column, f"{column}: ожидалось целое число, получено {value!r}"))
+                continue
+            values[column].append((index, value))
+
+    for column, parent, parent_column, is_reference in checks:
+        found = existing_ids(db, parent, [value for _, value in values[column]], parent_column)
+        seen = set()
+        for index, value in values[column]:
+            if is_reference:
+                if value not in found:
+                    errors.append(RowError(index, column, f"{column}={value} не существует в {parent}"))
+            elif value in found or value in seen:
+                errors.append(RowError(index, column, f"Id {value} уже занят"))
+            seen.add(value)
+
+    errors.sort(key=lambda error: error.row)
+    return errors